@@ -2,18 +2,17 @@ import datetime
 import pickle
 import time
 from golem.core.dag.verification_rules import DEFAULT_DAG_RULES
-from golem.core.optimisers.genetic.gp_optimizer import EvoGraphOptimizer
 from golem.core.optimisers.genetic.gp_params import GPAlgorithmParameters
 from golem.core.optimisers.genetic.operators.inheritance import \
     GeneticSchemeTypesEnum
 from golem.core.optimisers.genetic.operators.mutation import (MutationStrengthEnum)
 from golem.core.optimisers.genetic.operators.regularization import \
     RegularizationTypesEnum
-from golem.core.optimisers.objective import Objective, ObjectiveEvaluate
 from golem.core.optimisers.optimization_parameters import GraphRequirements
 from golem.core.optimisers.optimizer import GraphGenerationParams
 
 from rostok.adapters.golem_adapter import (GraphGrammarAdapter, GraphGrammarFactory)
+from rostok.adapters.golem_evolution import CachedFitness, run_evolution
 
 from rostok.graph_grammar.crossovers import subtree_crossover
 from app.golem_case.preapare_evo import load_init_population, terminal_nodes, custom_mutation_add, custom_mutation_del, create_balance_population, rule_vocab
@@ -21,11 +20,11 @@ from app.golem_case.evaluate_graph import mock_with_build_mech
 
 CACHED_POPULATION = True
 TIMEOUT_MINUTES = 5
+NUM_CPU_WORKERS = 4
 
 # Define objective
 name_objective = mock_with_build_mech.__name__
-objective = Objective({name_objective: mock_with_build_mech})
-objective_eval = ObjectiveEvaluate(objective)
+fitness = CachedFitness(mock_with_build_mech, num_cpu_workers=NUM_CPU_WORKERS)
 
 # Create init population
 init_population_gr = []
@@ -36,7 +35,6 @@ else:
 
 # Adapt nodes and init population
 adapter_local = GraphGrammarAdapter()
-adapted_initial_population = adapter_local.adapt(init_population_gr)
 adapted_nodes_types = adapter_local.adapt_node_seq(terminal_nodes)
 
 graph_generation_params = GraphGenerationParams(adapter=adapter_local,
@@ -56,8 +54,8 @@ requirements = GraphRequirements(max_arity=5,
                                  keep_n_best=3)
 
 optimizer_parameters = GPAlgorithmParameters(
-    pop_size=len(adapted_initial_population),
-    max_pop_size=len(adapted_initial_population) + 10,
+    pop_size=len(init_population_gr),
+    max_pop_size=len(init_population_gr) + 10,
     crossover_prob=0.5,
     mutation_prob=0.5,
     genetic_scheme_type=GeneticSchemeTypesEnum.parameter_free,
@@ -66,13 +64,10 @@ optimizer_parameters = GPAlgorithmParameters(
     regularization_type=RegularizationTypesEnum.none,
     mutation_strength=MutationStrengthEnum.mean)
 
-optimizer = EvoGraphOptimizer(objective=objective,
-                              initial_graphs=adapted_initial_population,
-                              requirements=requirements,
-                              graph_generation_params=graph_generation_params,
-                              graph_optimizer_params=optimizer_parameters)
-
-optimized_graphs = optimizer.optimise(objective_eval)
+with fitness:
+    optimized_graphs, optimizer = run_evolution(fitness, init_population_gr, requirements,
+                                                graph_generation_params, optimizer_parameters)
+print(f"Fitness cache hits: {fitness.hits}, calculated graphs: {fitness.misses}")
 name = str(int(time.time()))
 name2 = str(optimizer.history.final_choices.data[0].fitness)
 name2 = name2.replace(".", "_")
@@ -1,10 +1,7 @@
 import random
-from copy import deepcopy
 from random import choice
 from typing import Any, Dict, Iterable, Optional
 
-import networkx as nx
-import numpy as np
 from golem.core.adapter.nx_adapter import BaseNetworkxAdapter
 from golem.core.optimisers.graph import OptGraph, OptNode
 from golem.core.optimisers.opt_node_factory import DefaultOptNodeFactory
@@ -28,38 +25,50 @@ class GraphGrammarFactory(DefaultOptNodeFactory):
 
 
 class GraphGrammarAdapter(BaseNetworkxAdapter):
+    """Adapter between GraphGrammar and OptGraph of GOLEM.
+
+    The edges of OptGraph are directed from the children to the parents, so the root of the
+    mechanism is the final node of OptGraph. The graphs are converted without the deep copies,
+    the Node objects with the blueprints are shared by the graph and the OptGraph like in
+    :py:meth:`GraphGrammar.copy_structure`, so the Node objects must not be changed in place.
+    """
 
     def __init__(self):
         super().__init__()
         self.domain_graph_class = GraphGrammar
 
     def _node_adapt(self, data: Dict) -> OptNode:
-        if not "name" in data:
-            data["name"] = data["Node"].label
+        content = dict(data)
+        if not "name" in content:
+            content["name"] = content["Node"].label
+
+        return OptNode(content=content)
 
-        return OptNode(content=deepcopy(data))
+    def _node_restore(self, node: OptNode) -> Dict:
+        return dict(node.content)
 
     def _adapt(self, adaptee: GraphGrammar) -> OptGraph:
-        adaptee_copy = deepcopy(adaptee)
-        adaptee_copy = adaptee_copy.reverse(copy=False)
-        return super()._adapt(adaptee_copy)
+        mapped_nodes = {
+            node_id: self._node_adapt(node_data) for node_id, node_data in adaptee.nodes.items()
+        }
+        for node_id, opt_node in mapped_nodes.items():
+            opt_node.nodes_from = [mapped_nodes[child] for child in adaptee.successors(node_id)]
+        return OptGraph(list(mapped_nodes.values()))
 
     def _restore(self,
                  opt_graph: OptGraph,
                  metadata: Optional[Dict[str, Any]] = None) -> GraphGrammar:
-
-        opt_graph_copy = deepcopy(opt_graph)
-        nx_adapt_graph = super()._restore(opt_graph_copy, metadata)
-        nx_adapt_graph = nx_adapt_graph.reverse(copy=False)
         graph = GraphGrammar()
         # Remove start node
         unused_root = graph.find_nodes(ROOT)
         graph.remove_node(unused_root[0])
 
-        graph.add_nodes_from(nx_adapt_graph.nodes(data=True))
-        graph.add_edges_from(nx_adapt_graph.edges(data=True))
-        relabel = {golem_id: graph.get_uniq_id() for golem_id in list(graph.nodes)}
-        graph = nx.relabel_nodes(graph, relabel, copy=False)
+        node_ids = {opt_node.uid: graph.get_uniq_id() for opt_node in opt_graph.nodes}
+        graph.add_nodes_from(
+            (node_ids[opt_node.uid], self._node_restore(opt_node)) for opt_node in opt_graph.nodes)
+        graph.add_edges_from((node_ids[opt_node.uid], node_ids[child.uid])
+                             for opt_node in opt_graph.nodes
+                             for child in opt_node.nodes_from)
         return graph
 
     def adapt_node_seq(self, list_node: list[Node]) -> list[OptNode]:
@@ -0,0 +1,197 @@
+import atexit
+import multiprocessing
+from typing import Callable, Optional, Sequence
+
+from golem.core.optimisers.genetic.gp_optimizer import EvoGraphOptimizer
+from golem.core.optimisers.genetic.gp_params import GPAlgorithmParameters
+from golem.core.optimisers.objective import Objective, ObjectiveEvaluate
+from golem.core.optimisers.optimization_parameters import GraphRequirements
+from golem.core.optimisers.optimizer import GraphGenerationParams
+
+from rostok.adapters.golem_adapter import GraphGrammarAdapter
+from rostok.graph_grammar.node import GraphGrammar
+from rostok.trajectory_optimizer.control_optimizer import GraphRewardCalculator
+
+# Fitness function of the worker process of CachedFitness, set once by the pool initializer
+_worker_fitness: Optional[Callable[[GraphGrammar], float]] = None
+
+
+def _init_fitness_worker(fitness: Callable[[GraphGrammar], float]):
+    global _worker_fitness
+    _worker_fitness = fitness
+
+
+def _fitness_worker_task(graph: GraphGrammar) -> float:
+    return _worker_fitness(graph)
+
+
+class CachedFitness:
+    """Fitness of the graphs with the cache by the canonical key of the graph.
+
+    The fitness is minimized like in GOLEM. The fitness can be a function of the graph or the
+    reward calculator, the fitness of the calculator is the negative reward and the batches are
+    calculated by :py:meth:`GraphRewardCalculator.calculate_rewards`. The batches of the function
+    are calculated in the pool of processes that lives between the calls of evaluate, the
+    function must be picklable. Call shutdown to stop the workers.
+
+    Attributes:
+        fitness (Callable[[GraphGrammar], float] | GraphRewardCalculator): fitness of one graph
+        num_cpu_workers (int | str): number of the worker processes, "auto" uses all processors
+        chunksize (int): number of the graphs sent to the worker at once
+        cache (dict[tuple, float]): fitness by the canonical key of the graph
+        hits (int): number of the graphs of the batches found in the cache
+        misses (int): number of the calculated graphs
+    """
+
+    def __init__(self,
+                 fitness: Callable[[GraphGrammar], float] | GraphRewardCalculator,
+                 num_cpu_workers=1,
+                 chunksize=1):
+        self.fitness = fitness
+        self.num_cpu_workers = num_cpu_workers
+        self.chunksize = chunksize
+        self.cache: dict[tuple, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self._pool = None
+
+    def get_name(self) -> str:
+        return getattr(self.fitness, "__name__", type(self.fitness).__name__)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    def is_parallel(self) -> bool:
+        return self.num_cpu_workers == "auto" or self.num_cpu_workers > 1
+
+    def get_pool(self):
+        """Return the worker pool, the pool is started at the first call."""
+        if self._pool is None:
+            pool_size = (multiprocessing.cpu_count()
+                         if self.num_cpu_workers == "auto" else self.num_cpu_workers)
+            self._pool = multiprocessing.Pool(pool_size,
+                                              initializer=_init_fitness_worker,
+                                              initargs=(self.fitness,))
+            atexit.register(self.shutdown)
+        return self._pool
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            atexit.unregister(self.shutdown)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def calculate(self, graphs: list[GraphGrammar]) -> list[float]:
+        """Calculate the fitness of the different graphs without the cache."""
+        if isinstance(self.fitness, GraphRewardCalculator):
+            return [-result[0] for result in self.fitness.calculate_rewards(graphs)]
+        if self.is_parallel() and len(graphs) > 1:
+            return self.get_pool().map(_fitness_worker_task, graphs, self.chunksize)
+        return [self.fitness(graph) for graph in graphs]
+
+    def evaluate(self, graphs: Sequence[GraphGrammar]) -> list[float]:
+        """Return the fitness of the graphs in their order. The equal graphs and the graphs from
+        the cache are not calculated.
+
+        Args:
+            graphs (Sequence[GraphGrammar]): graphs of the population
+
+        Returns:
+            list[float]: fitness of each graph
+        """
+        keys = [graph.get_canonical_key() for graph in graphs]
+        missed = {}
+        for key, graph in zip(keys, graphs):
+            if key not in self.cache and key not in missed:
+                missed[key] = graph
+        self.misses += len(missed)
+        self.hits += len(keys) - len(missed)
+        if missed:
+            self.cache.update(zip(missed, self.calculate(list(missed.values()))))
+        return [self.cache[key] for key in keys]
+
+    def __call__(self, graph: GraphGrammar) -> float:
+        """Return the fitness of the graph. The graphs of the evaluated batch are taken from the
+        cache without the change of the counters."""
+        fitness = self.cache.get(graph.get_canonical_key())
+        if fitness is None:
+            return self.evaluate([graph])[0]
+        return fitness
+
+
+class BatchEvaluationDispatcher:
+    """Wrapper of the evaluation dispatcher of GOLEM that calculates the fitness of the whole
+    population by CachedFitness before the dispatcher evaluates the individuals one by one, so
+    the objective of the individuals is taken from the cache. Only the individuals without the
+    valid fitness are calculated.
+
+    Attributes:
+        dispatcher: the evaluation dispatcher of the optimizer
+        adapter (GraphGrammarAdapter): adapter of the graphs
+        fitness (CachedFitness): fitness of the graphs
+    """
+
+    def __init__(self, dispatcher, adapter: GraphGrammarAdapter, fitness: CachedFitness):
+        self.dispatcher = dispatcher
+        self.adapter = adapter
+        self.fitness = fitness
+
+    def dispatch(self, objective, timer=None):
+        evaluate_population = self.dispatcher.dispatch(objective, timer)
+
+        def evaluate_batch(individuals):
+            self.fitness.evaluate([
+                self.adapter.restore(ind.graph) for ind in individuals if not ind.fitness.valid
+            ])
+            return evaluate_population(individuals)
+
+        return evaluate_batch
+
+    def __getattr__(self, name):
+        return getattr(self.dispatcher, name)
+
+
+def run_evolution(fitness: CachedFitness,
+                  initial_graphs: list[GraphGrammar],
+                  requirements: GraphRequirements,
+                  graph_generation_params: GraphGenerationParams,
+                  optimizer_parameters: GPAlgorithmParameters
+                  ) -> tuple[list[GraphGrammar], EvoGraphOptimizer]:
+    """Run EvoGraphOptimizer of GOLEM with the batch evaluation of the populations.
+
+    The fitness of each population is calculated at once by CachedFitness, the objective of the
+    individuals is taken from its cache. The parallelism of GOLEM should be disabled by
+    n_jobs=1 of the requirements, the parallel work is done by the fitness.
+
+    Args:
+        fitness (CachedFitness): fitness of the graphs
+        initial_graphs (list[GraphGrammar]): initial population
+        requirements (GraphRequirements): requirements of the optimization
+        graph_generation_params (GraphGenerationParams): parameters of the generation of the
+            graphs with GraphGrammarAdapter
+        optimizer_parameters (GPAlgorithmParameters): parameters of the genetic algorithm
+
+    Returns:
+        tuple[list[GraphGrammar], EvoGraphOptimizer]: the best graphs and the optimizer with the
+            history
+    """
+    adapter = graph_generation_params.adapter
+    objective = Objective({fitness.get_name(): fitness})
+    optimizer = EvoGraphOptimizer(objective=objective,
+                                  initial_graphs=adapter.adapt(initial_graphs),
+                                  requirements=requirements,
+                                  graph_generation_params=graph_generation_params,
+                                  graph_optimizer_params=optimizer_parameters)
+    optimizer.eval_dispatcher = BatchEvaluationDispatcher(optimizer.eval_dispatcher, adapter,
+                                                          fitness)
+    optimized_graphs = optimizer.optimise(ObjectiveEvaluate(objective))
+    return adapter.restore(optimized_graphs), optimizer
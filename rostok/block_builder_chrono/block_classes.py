@@ -1,9 +1,9 @@
 import pathlib
 import random
+from contextlib import contextmanager
 from enum import Enum
 from typing import Optional, Union
 
-import open3d
 import pychrono.core as chrono
 
 import rostok.block_builder_api.easy_body_shapes as easy_body_shapes
@@ -13,11 +13,48 @@ from rostok.block_builder_chrono.block_types import (BlockBody, BlockBridge,
                                                      BlockTransform)
 from rostok.block_builder_chrono.blocks_utils import (
     SpringTorque, frame_transform_to_chcoordsys, rotation_z_q)
-from rostok.block_builder_chrono.mesh import o3d_to_chrono_trianglemesh
+from rostok.block_builder_chrono.mesh import load_chrono_trianglemesh
 from rostok.utils.dataset_materials.material_dataclass_manipulating import (
     DefaultChronoMaterialNSC, DefaultChronoMaterialSMC,
     struct_material2object_material)
 
+# The bodies are created with the visual shapes, the headless simulations switch them off
+_visual_assets_enabled = True
+
+
+def is_visual_assets_enabled() -> bool:
+    return _visual_assets_enabled
+
+
+@contextmanager
+def visual_assets(enabled: bool):
+    """Create the bodies in the context with or without the visual shapes and colors.
+
+    Args:
+        enabled (bool): False creates the bodies with the visualization disabled
+    """
+    global _visual_assets_enabled
+    previous = _visual_assets_enabled
+    _visual_assets_enabled = enabled
+    try:
+        yield
+    finally:
+        _visual_assets_enabled = previous
+
+
+def set_random_color(body: chrono.ChBody, color: Optional[list[int]] = None):
+    """Set the color of the first visual shape, the color is random if it is None. The bodies
+    without the visual assets are skipped."""
+    if not _visual_assets_enabled:
+        return
+    if color is None:
+        rgb = [random.random(), random.random(), random.random()]
+        rgb[int(random.random() * 2)] *= 0.2
+        body.GetVisualShape(0).SetColor(chrono.ChColor(*rgb))
+    else:
+        color = [x / 256 for x in color]
+        body.GetVisualShape(0).SetColor(chrono.ChColor(*color))
+
 
 class BuildingBody(BlockBody):
     """Abstract class, that interpreting nodes of a robot body part in a
@@ -86,13 +123,7 @@ class BuildingBody(BlockBody):
         self.body.SetCollide(is_collide)
         # Normal Forces
         # set a color for the body, default is random
-        if color is None:
-            rgb = [random.random(), random.random(), random.random()]
-            rgb[int(random.random() * 2)] *= 0.2
-            self.body.GetVisualShape(0).SetColor(chrono.ChColor(*rgb))
-        else:
-            color = [x / 256 for x in color]
-            self.body.GetVisualShape(0).SetColor(chrono.ChColor(*color))
+        set_random_color(self.body, color)
 
     def reset_transformed_frame_out(self):
         """Reset all transforms output frame of the body and back to initial
@@ -363,8 +394,8 @@ class ChronoRevolveJointWithBody(BlockBridge):
 
         if (self.with_collision):
             eps = 0.005
-            cylinder = chrono.ChBodyEasyCylinder(chrono.ChAxis_Z, self.radius - eps, self.length, self.density, True,
-                                                 True, self.material)
+            cylinder = chrono.ChBodyEasyCylinder(chrono.ChAxis_Z, self.radius - eps, self.length, self.density,
+                                                 _visual_assets_enabled, True, self.material)
             cylinder.SetCoord(joint_transform)
             cylinder.SetNameString(self.name)
             system.Add(cylinder)
@@ -373,7 +404,7 @@ class ChronoRevolveJointWithBody(BlockBridge):
             fix_joint.Initialize(cylinder, in_block.body,
                                  chrono.ChFrameD(joint_transform))
             system.Add(fix_joint)
-        else:
+        elif _visual_assets_enabled:
             # Add cylinder visual only
             cylinder = chrono.ChCylinder()
             cylinder.p2 = chrono.ChVectorD(0, 0, self.length / 2)
@@ -437,11 +468,12 @@ class PrimitiveBody(BuildingBody):
 
         if isinstance(shape, easy_body_shapes.Box):
             body = chrono.ChBodyEasyBox(shape.width_x, shape.length_y, shape.height_z, density,
-                                        True, True, material)
+                                        _visual_assets_enabled, True, material)
             pos_in_marker = chrono.ChVectorD(0, -shape.length_y * 0.5 - eps, 0)
             pos_out_marker = chrono.ChVectorD(0, shape.length_y * 0.5 + eps, 0)
         elif isinstance(shape, easy_body_shapes.Cylinder):
-            body = chrono.ChBodyEasyCylinder(chrono.ChAxis_Z, shape.radius, shape.height_y, density, True, True,
+            body = chrono.ChBodyEasyCylinder(chrono.ChAxis_Z, shape.radius, shape.height_y, density,
+                                             _visual_assets_enabled, True,
                                              material)
             # pos_in_marker = chrono.ChVectorD(0, -shape.height_y * 0.5 - eps, 0)
             # pos_out_marker = chrono.ChVectorD(0, shape.height_y * 0.5 + eps, 0)
@@ -449,7 +481,7 @@ class PrimitiveBody(BuildingBody):
             pos_out_marker = chrono.ChVectorD(0, 0, 0)
         elif isinstance(shape, easy_body_shapes.Sphere):
             body = chrono.ChBodyEasySphere(
-                shape.radius, density, True, True, material)
+                shape.radius, density, _visual_assets_enabled, True, material)
             # pos_in_marker = chrono.ChVectorD(0, -shape.radius * 0.5 - eps, 0)
             # pos_out_marker = chrono.ChVectorD(0, shape.radius * 0.5 + eps, 0)
             pos_in_marker = chrono.ChVectorD(0, 0, 0)
@@ -457,7 +489,7 @@ class PrimitiveBody(BuildingBody):
         elif isinstance(shape, easy_body_shapes.Ellipsoid):
             body = chrono.ChBodyEasyEllipsoid(
                 chrono.ChVectorD(shape.radius_x, shape.radius_y,
-                                 shape.radius_z), density, True,
+                                 shape.radius_z), density, _visual_assets_enabled,
                 True, material)
             #pos_in_marker = chrono.ChVectorD(0, -shape.radius_y * 0.5 - eps, 0)
             #pos_out_marker = chrono.ChVectorD(0, shape.radius_y * 0.5 + eps, 0)
@@ -504,29 +536,29 @@ class ChronoEasyShapeObject():
         material = struct_material2object_material(material)
         if isinstance(shape, easy_body_shapes.Box):
             body = chrono.ChBodyEasyBox(shape.width_x, shape.length_y, shape.height_z, density,
-                                        True, True, material)
+                                        _visual_assets_enabled, True, material)
         elif isinstance(shape, easy_body_shapes.Cylinder):
-            body = chrono.ChBodyEasyCylinder(chrono.ChAxis_Y, shape.radius, shape.height_y, density, True, True,
+            body = chrono.ChBodyEasyCylinder(chrono.ChAxis_Y, shape.radius, shape.height_y, density,
+                                             _visual_assets_enabled, True,
                                              material)
         elif isinstance(shape, easy_body_shapes.Sphere):
             body = chrono.ChBodyEasySphere(
-                shape.radius, density, True, True, material)
+                shape.radius, density, _visual_assets_enabled, True, material)
         elif isinstance(shape, easy_body_shapes.Ellipsoid):
             body = chrono.ChBodyEasyEllipsoid(
                 chrono.ChVectorD(shape.radius_x, shape.radius_y,
-                                 shape.radius_z), density, True,
+                                 shape.radius_z), density, _visual_assets_enabled,
                 True, material)
         elif isinstance(shape, easy_body_shapes.FromMesh):
             if not pathlib.Path(shape.path).exists():
                 raise Exception(f"Wrong path: {shape.path}")
 
-            mesh = open3d.io.read_triangle_mesh(shape.path)
-            mesh_chrono = o3d_to_chrono_trianglemesh(mesh)
+            mesh_chrono = load_chrono_trianglemesh(shape.path)
             body = chrono.ChBodyEasyMesh(
                 mesh_chrono,  # mesh filename
                 density,  # density kg/m^3
                 True,  # automatically compute mass and inertia
-                True,  # visualize?>
+                _visual_assets_enabled,  # visualize?>
                 True,  # collide?
                 material,  # contact material
             )
@@ -535,7 +567,7 @@ class ChronoEasyShapeObject():
             for p_i in shape.points:
                 points_shape.append(chrono.ChVectorD(*p_i))
             body = chrono.ChBodyEasyConvexHull(
-                points_shape, density, True, True, material)
+                points_shape, density, _visual_assets_enabled, True, material)
         else:
             raise Exception("Unknown shape for ChronoBodyEnv object")
 
@@ -544,13 +576,7 @@ class ChronoEasyShapeObject():
         body.GetCollisionModel().SetDefaultSuggestedMargin(0.00005)
         body.SetCollide(is_collide)
         self.body = body
-        if color is None:
-            rgb = [random.random(), random.random(), random.random()]
-            rgb[int(random.random() * 2)] *= 0.2
-            self.body.GetVisualShape(0).SetColor(chrono.ChColor(*rgb))
-        else:
-            color = [x / 256 for x in color]
-            self.body.GetVisualShape(0).SetColor(chrono.ChColor(*color))
+        set_random_color(self.body, color)
 
     def set_coord(self, frame: FrameTransform):
         self.body.SetCoord(frame_transform_to_chcoordsys(frame))
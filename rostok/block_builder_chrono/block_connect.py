@@ -1,5 +1,4 @@
 import pychrono.core as chrono
-import pychrono.irrlicht as chronoirr
 
 from rostok.block_builder_api.easy_body_shapes import Box
 from rostok.block_builder_chrono.block_classes import (BLOCK_CLASS_TYPES,
@@ -124,6 +123,8 @@ def place_and_connect(sequence: list[BLOCK_CLASS_TYPES], system: chrono.ChSystem
             previous_joint = block
 
 if __name__ == "__main__":
+    import pychrono.irrlicht as chronoirr
+
     chrono_system = chrono.ChSystemNSC()
     chrono_system.SetSolverType(chrono.ChSolver.Type_BARZILAIBORWEIN)
     chrono_system.SetSolverMaxIterations(100)
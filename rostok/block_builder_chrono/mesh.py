@@ -1,7 +1,89 @@
+from pathlib import Path
+
+import numpy as np
 import open3d as o3d
-from numpy import asarray
 from pychrono import ChTriangleMeshConnected, ChVectorD
 
+# Coordinates of the triangles of the loaded meshes, path -> (modification time, coordinates)
+_mesh_cache: dict[str, tuple[int, np.ndarray]] = {}
+# Chrono meshes built from the files, path -> (modification time, mesh)
+_chrono_mesh_cache: dict[str, tuple[int, ChTriangleMeshConnected]] = {}
+
+
+def triangle_coordinates(mesh: o3d.geometry.TriangleMesh) -> np.ndarray:
+    """Return the coordinates of the vertices of the mesh triangles.
+
+    Returns:
+        np.ndarray: array of shape (number of triangles, 3, 3)
+    """
+    triangles = np.asarray(mesh.triangles)
+    vertices = np.asarray(mesh.vertices)
+    return vertices[triangles]
+
+
+def load_triangle_coordinates(path) -> np.ndarray:
+    """Load the coordinates of the mesh triangles from the file. The coordinates are cached in the
+    process by the path and the modification time of the file.
+
+    Args:
+        path (Path): path to the mesh file
+
+    Returns:
+        np.ndarray: read-only array of shape (number of triangles, 3, 3)
+    """
+    path = Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _mesh_cache.get(str(path))
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    coordinates = triangle_coordinates(o3d.io.read_triangle_mesh(str(path)))
+    coordinates.setflags(write=False)
+    _mesh_cache[str(path)] = (mtime, coordinates)
+    return coordinates
+
+
+def load_chrono_trianglemesh(path) -> ChTriangleMeshConnected:
+    """Return the chrono mesh of the file. The mesh is built from the triangles once per the path
+    and the modification time of the file, the calls get its copies made by the copy constructor
+    of the chrono mesh. ChBodyEasyMesh moves the mesh to the COG, so the cached mesh is not given
+    to the bodies.
+
+    Args:
+        path (Path): path to the mesh file
+
+    Returns:
+        chrono.ChTriangleMeshConnected: The spatial mesh for describing ChBodyEasyMesh
+    """
+    path = Path(path).resolve()
+    mtime = path.stat().st_mtime_ns
+    cached = _chrono_mesh_cache.get(str(path))
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, coordinates_to_chrono_trianglemesh(load_triangle_coordinates(path)))
+        _chrono_mesh_cache[str(path)] = cached
+    return ChTriangleMeshConnected(cached[1])
+
+
+def clear_mesh_cache():
+    _mesh_cache.clear()
+    _chrono_mesh_cache.clear()
+
+
+def coordinates_to_chrono_trianglemesh(coordinates: np.ndarray) -> ChTriangleMeshConnected:
+    """Create ChTriangleMeshConnected from the coordinates of the triangles. The coordinates are
+    converted to the python floats at once.
+
+    Args:
+        coordinates (np.ndarray): array of shape (number of triangles, 3, 3)
+
+    Returns:
+        chrono.ChTriangleMeshConnected: The spatial mesh for describing ChBodyEasyMesh
+    """
+    ch_mesh = ChTriangleMeshConnected()
+    for vert1, vert2, vert3 in coordinates.tolist():
+        ch_mesh.addTriangle(ChVectorD(*vert1), ChVectorD(*vert2), ChVectorD(*vert3))
+    return ch_mesh
+
 
 def o3d_to_chrono_trianglemesh(mesh: o3d.geometry.TriangleMesh) -> ChTriangleMeshConnected:
     """Converting the spatial mesh format from O3D to ChTriangleMeshConnected to create
@@ -9,14 +91,4 @@ def o3d_to_chrono_trianglemesh(mesh: o3d.geometry.TriangleMesh) -> ChTriangleMes
     Returns:
         chrono.ChTriangleMeshConnected: The spatial mesh for describing ChBodyEasyMesh
     """
-    triangles = asarray(mesh.triangles)
-    vertices = asarray(mesh.vertices)
-    ch_mesh = ChTriangleMeshConnected()
-
-    for item in triangles:
-        vert1_index, vert2_index, vert3_index = item[0], item[1], item[2]
-        ch_mesh.addTriangle(
-            ChVectorD(vertices[vert1_index][0], vertices[vert1_index][1], vertices[vert1_index][2]),
-            ChVectorD(vertices[vert2_index][0], vertices[vert2_index][1], vertices[vert2_index][2]),
-            ChVectorD(vertices[vert3_index][0], vertices[vert3_index][1], vertices[vert3_index][2]))
-    return ch_mesh
+    return coordinates_to_chrono_trianglemesh(triangle_coordinates(mesh))
@@ -13,6 +13,10 @@ class ForceTorqueContainer:
         for i in self.controller_list:
             i.update(time, data)
 
+    def flush_data_dump(self):
+        for i in self.controller_list:
+            i.flush_data_dump()
+
     def add(self, controller: ForceChronoWrapper):
         if controller.is_bound:
             self.controller_list.append(controller)
@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from copy import deepcopy
 from math import sin
 from typing import Dict, List
 
@@ -18,6 +19,8 @@ class RobotControllerChrono:
             trajectories: trajectories for the joints
             functions: list of functions currently attached to joints
     """
+    # the attributes bound to the chrono objects of the simulation, they are not in the state
+    bound_attributes = ("built_graph", "graph", "joint_map_ordered", "functions")
 
     def __init__(self, built_graph: BuiltGraphChrono, parameters = {}):
         """Initialize class fields and call the initialize_functions() to set starting state"""
@@ -61,6 +64,24 @@ class RobotControllerChrono:
     def update_functions(self, time, robot_data, environment_data):
         pass
 
+    def flush_data_dump(self):
+        """Save the rest of the recorded data of the controller forces at the end of the run."""
+
+    def get_state(self):
+        """Return the copy of the attributes that aren't bound to the chrono objects and the
+        values of the joint functions."""
+        attributes = {
+            key: value for key, value in vars(self).items() if key not in self.bound_attributes
+        }
+        return deepcopy(attributes), [function.Get_yconst() for function in self.functions]
+
+    def set_state(self, state):
+        """Restore the attributes and the values of the joint functions returned by get_state."""
+        attributes, values = deepcopy(state)
+        vars(self).update(attributes)
+        for function, value in zip(self.functions, values):
+            function.Set_yconst(value)
+
 
 class ConstController(RobotControllerChrono):
 
@@ -1,10 +1,12 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
+from pathlib import Path
 import numpy as np
 from typing import Any, Callable, List, Optional
 
 import pychrono.core as chrono
 
+from rostok.block_builder_chrono.block_classes import is_visual_assets_enabled
 from rostok.criterion.simulation_flags import SimulationSingleEvent
 
 
@@ -64,6 +66,76 @@ class ForceTorque:
 
 CALLBACK_TYPE = Callable[[float, Any], ForceTorque]
 
+FORCE_DATA_COLUMNS = ("time", "point_x", "point_y", "point_z", "force_x", "force_y", "force_z")
+
+
+class ForceDataRecorder:
+    """Buffered recorder of the application point and the force of the external force.
+
+    The rows are collected in the preallocated array and saved by chunks to the .npy files
+    `{name}_{chunk number}.npy` in the directory. The directory must not contain the chunks of
+    the force with the same name, use the new directory for each run. The simulation calls flush
+    at the end of the run to save the rest of the buffer. The copies of the force share the
+    recorder, the runs of the forks of the simulation follow each other in the data.
+
+    Attributes:
+        path (Path): directory of the chunks
+        name (str): name of the force, prefix of the chunk files
+        buffer_size (int): number of the rows in one chunk
+    """
+
+    def __init__(self, path, name: str, buffer_size: int = 1024):
+        self.path = Path(path)
+        self.name = name
+        self.buffer_size = buffer_size
+        self._buffer = np.empty((buffer_size, len(FORCE_DATA_COLUMNS)))
+        self._n_rows = 0
+        self._n_chunks = 0
+        self.path.mkdir(parents=True, exist_ok=True)
+        if any(self.path.glob(f"{name}_*.npy")):
+            raise Exception(f"The data of the force {name} already exists in {self.path}")
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def record(self, time: float, point: chrono.ChVectorD, force: chrono.ChVectorD):
+        self._buffer[self._n_rows] = (time, point.x, point.y, point.z, force.x, force.y, force.z)
+        self._n_rows += 1
+        if self._n_rows == self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        """Save the buffered rows as the next chunk."""
+        if self._n_rows == 0:
+            return
+        chunk_path = self.path / f"{self.name}_{self._n_chunks:05d}.npy"
+        if chunk_path.exists():
+            raise Exception(f"The chunk {chunk_path} is written by another recorder")
+        np.save(chunk_path, self._buffer[:self._n_rows])
+        self._n_chunks += 1
+        self._n_rows = 0
+
+
+def load_force_data(path, name: Optional[str] = None) -> dict[str, np.ndarray]:
+    """Read the data saved by ForceDataRecorder.
+
+    Args:
+        path (Path): directory of the chunks
+        name (Optional[str], optional): name of the force. Defaults to None. None means all forces.
+
+    Returns:
+        dict[str, np.ndarray]: arrays with FORCE_DATA_COLUMNS for each force name
+    """
+    chunks: dict[str, list[Path]] = {}
+    for chunk in sorted(Path(path).glob("*.npy")):
+        force_name = chunk.stem.rsplit("_", 1)[0]
+        if name is None or force_name == name:
+            chunks.setdefault(force_name, []).append(chunk)
+    return {
+        force_name: np.concatenate([np.load(chunk) for chunk in force_chunks])
+        for force_name, force_chunks in chunks.items()
+    }
+
 
 class ABCForceCalculator(ABC):
 
@@ -72,6 +144,7 @@ class ABCForceCalculator(ABC):
                  start_time: float = 0.0,
                  pos: np.ndarray = np.zeros(3)) -> None:
         self.path = None
+        self.recorder: Optional[ForceDataRecorder] = None
         self.name = name
         self.pos = pos
         self.start_time = start_time
@@ -94,11 +167,15 @@ class ABCForceCalculator(ABC):
         
         return time_activation or event_activation
 
-    def enable_data_dump(self, path):
+    def enable_data_dump(self, path, buffer_size: int = 1024):
+        """Record the data of the force to the directory, see ForceDataRecorder."""
         self.path = path
-        with open(path, 'w') as file:
-            file.write('Data for external action:')
-            file.write(self.__dict__)
+        self.recorder = ForceDataRecorder(path, self.name, buffer_size)
+
+    def flush_data_dump(self):
+        """Save the rest of the recorded data, the simulation calls it at the end of the run."""
+        if self.recorder is not None:
+            self.recorder.flush()
 
 
 class ForceChronoWrapper():
@@ -178,6 +255,8 @@ class ForceChronoWrapper():
                                     size=0.005,
                                     color=chrono.ChColor(1, 0, 0),
                                     body_opacity=0.6):
+        if not is_visual_assets_enabled():
+            return
         sph_1 = chrono.ChSphereShape(size)
         sph_1.SetColor(color)
         self.__body.AddVisualShape(sph_1,
@@ -189,10 +268,12 @@ class ForceChronoWrapper():
     def body(self):
         return self.__body
 
-    def enable_data_dump(self, path):
+    def enable_data_dump(self, path, buffer_size: int = 1024):
         self.path = path
-        with open(path, 'w') as file:
-            file.write('Data for external action:', self.force.name)
+        self.force.enable_data_dump(path, buffer_size)
+
+    def flush_data_dump(self):
+        self.force.flush_data_dump()
 
 
 class ForceControllerOnCallback(ABCForceCalculator):
@@ -348,6 +429,13 @@ class ExternalForces(ABCForceCalculator):
         super().__init__(name="external_forces", start_time=0.0, pos=np.zeros(3))
         self.force_controller = force_controller
 
+    def flush_data_dump(self):
+        super().flush_data_dump()
+        controllers = (self.force_controller
+                       if isinstance(self.force_controller, list) else [self.force_controller])
+        for controller in controllers:
+            controller.flush_data_dump()
+
     def add_force(self, force: ABCForceCalculator):
         if isinstance(self.force_controller, list):
             self.force_controller.append(force)
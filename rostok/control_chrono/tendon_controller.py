@@ -33,11 +33,8 @@ class PulleyForce(ABCForceCalculator):
         force_v = ((post_point - point).GetNormalized() +
                    (pre_point - point).GetNormalized()) * tension
         spatial_force[3:] = np.array([force_v.x, force_v.y, force_v.z])
-        if self.path:
-            with open(self.path, 'a') as file:
-                file.write(
-                    f'{self.name} {round(time, 5)} {round(point.x,5)} {round(point.y,5)} {round(point.z,5)} {round(force_v.x, 6)} {round(force_v.y,6)} {round(force_v.z,6)}\n'
-                )
+        if self.recorder is not None:
+            self.recorder.record(time, point, force_v)
         return spatial_force
 
 
@@ -50,11 +47,8 @@ class TipForce(ABCForceCalculator):
         tension = data[2]
         force_v = (pre_point - point).GetNormalized() * tension
         spatial_force[3:] = np.array([force_v.x, force_v.y, force_v.z])
-        if self.path:
-            with open(self.path, 'a') as file:
-                file.write(
-                    f'{self.name} {round(time, 5)} {round(point.x,5)} {round(point.y,5)} {round(point.z,5)} {round(force_v.x, 6)} {round(force_v.y,6)} {round(force_v.z,6)}\n'
-                )
+        if self.recorder is not None:
+            self.recorder.record(time, point, force_v)
         return spatial_force
 
 
@@ -140,6 +134,8 @@ PULLEY_LINES_TYPE = list[list[list[PulleyParameters, Union[PulleyForce, TipForce
 
 
 class TendonController_2p(RobotControllerChrono):
+    # the forces of the pulleys are recalculated from the positions at each update
+    bound_attributes = RobotControllerChrono.bound_attributes + ("pulley_lines",)
 
     def __init__(self, graph: BuiltGraphChrono, control_parameters: TendonControllerParameters):
         super().__init__(graph, control_parameters)
@@ -194,7 +190,7 @@ class TendonController_2p(RobotControllerChrono):
                     force_point[1].visualize_application_point()
 
                 elif force_point[0].force_type == ForceType.BASE_CONNECTION:
-                    tip_force = TipForce(pos=np.array(force_point[0].position))
+                    tip_force = TipForce(pos=np.array(force_point[0].position), name=f'{idx}_b')
                     force_point[1] = ForceChronoWrapper(tip_force)
                     force_point[1].bind_body(body.body)
                     force_point[1].visualize_application_point()
@@ -204,6 +200,11 @@ class TendonController_2p(RobotControllerChrono):
         self.set_pulley_positions(self.pulley_lines)
         self.set_forces_to_pulley_line(self.pulley_lines)
 
+    def flush_data_dump(self):
+        for line in self.pulley_lines:
+            for force_point in line:
+                force_point[1].flush_data_dump()
+
     def update_functions(self, time, robot_data: Sensor, environment_data):
         for i, line in enumerate(self.pulley_lines):
             tension = self.parameters.forces[i]
@@ -1,14 +1,17 @@
 import json
 from abc import ABC
-from typing import List
+from typing import List, Optional
 
 import numpy as np
 from scipy.spatial import distance
 
+from rostok.criterion.online_accumulators import (CriterionAccumulator, ForceModuleAccumulator,
+                                                  SensorValueAccumulator)
 from rostok.criterion.simulation_flags import (EventContactTimeOutBuilder, EventGraspBuilder,
                                                EventSlipOutBuilder)
 from rostok.simulation_chrono.simulation_utils import SimulationResult
 from rostok.utils.json_encoder import RostokJSONEncoder
+from rostok.virtual_experiment.sensors import SensorCalls
 
 
 #Interface for criterions
@@ -22,6 +25,21 @@ class Criterion(ABC):
         """
         pass
 
+    def create_accumulator(self) -> Optional[CriterionAccumulator]:
+        """Return the accumulator of the values used by the criterion during the simulation.
+        The criteria without the accumulator use the data stores of the simulation result."""
+        return None
+
+    def calculate_online_reward(self, accumulator: CriterionAccumulator,
+                                simulation_output: SimulationResult):
+        """Return the reward from the values collected by the accumulator of the criterion.
+
+        Args:
+            accumulator (CriterionAccumulator): the accumulator from create_accumulator
+            simulation_output (SimulationResult): the result of the simulation
+        """
+        return self.calculate_reward(simulation_output)
+
     def __repr__(self) -> str:
         json_data = json.dumps(self, cls=RostokJSONEncoder)
         return json_data
@@ -109,6 +127,17 @@ class ForceCriterion(Criterion):
             else:
                 return 0
 
+    def create_accumulator(self) -> ForceModuleAccumulator:
+        return ForceModuleAccumulator()
+
+    def calculate_online_reward(self, accumulator: ForceModuleAccumulator,
+                                simulation_output: SimulationResult) -> float:
+        event_timeout=self.event_timeout_builder.find_event(event_list=simulation_output.event_container)
+        mean_force = accumulator.get_mean()
+        if event_timeout.state or mean_force is None:
+            return 0
+        return 1 / (1 + mean_force)
+
 
 class InstantObjectCOGCriterion(Criterion):
     """Reward based on the distance between object COG and force centroid.
@@ -132,13 +161,31 @@ class InstantObjectCOGCriterion(Criterion):
             body_COG = env_data.get_data("COG")[0][grasp_event.step_n + 1]
             body_outer_force_center = env_data.get_data("force_center")[0][grasp_event.step_n +
                                                                            1]
-            if body_outer_force_center is np.nan:
+            if np.isnan(body_outer_force_center).any():
                 return 0
             dist = distance.euclidean(body_COG, body_outer_force_center)
             return 1 / (1 + dist)
         else:
             return 0
 
+    def create_accumulator(self) -> SensorValueAccumulator:
+        return SensorValueAccumulator(
+            self.grasp_event_builder, {
+                "COG": (SensorCalls.BODY_TRAJECTORY, False),
+                "force_center": (SensorCalls.FORCE_CENTER, False)
+            })
+
+    def calculate_online_reward(self, accumulator: SensorValueAccumulator,
+                                simulation_output: SimulationResult):
+        grasp_event = self.grasp_event_builder.find_event(event_list=simulation_output.event_container)
+        if not grasp_event.state:
+            return 0
+        body_outer_force_center = accumulator.values["force_center"][0]
+        if body_outer_force_center is None:
+            return 0
+        dist = distance.euclidean(accumulator.values["COG"][0], body_outer_force_center)
+        return 1 / (1 + dist)
+
 
 class InstantForceCriterion(Criterion):
     """Criterion based on the std of force modules.
@@ -171,6 +218,21 @@ class InstantForceCriterion(Criterion):
         else:
             return 0
 
+    def create_accumulator(self) -> SensorValueAccumulator:
+        return SensorValueAccumulator(self.grasp_event_builder,
+                                      {"forces": (SensorCalls.FORCE, False)})
+
+    def calculate_online_reward(self, accumulator: SensorValueAccumulator,
+                                simulation_output: SimulationResult):
+        grasp_event = self.grasp_event_builder.find_event(event_list=simulation_output.event_container)
+        if not grasp_event.state:
+            return 0
+        body_contacts = accumulator.values["forces"][0]
+        if len(body_contacts) == 0:
+            return 0
+        forces = [np.linalg.norm(force) for force in body_contacts]
+        return 1 / (1 + np.std(forces))
+
 
 class InstantContactingLinkCriterion(Criterion):
     """Criterion based on the percentage of contacting links.
@@ -202,6 +264,19 @@ class InstantContactingLinkCriterion(Criterion):
         else:
             return 0
 
+    def create_accumulator(self) -> SensorValueAccumulator:
+        return SensorValueAccumulator(self.grasp_event_builder,
+                                      {"n_contacts": (SensorCalls.AMOUNT_FORCE, True)})
+
+    def calculate_online_reward(self, accumulator: SensorValueAccumulator,
+                                simulation_output: SimulationResult):
+        grasp_event = self.grasp_event_builder.find_event(event_list=simulation_output.event_container)
+        if not grasp_event.state:
+            return 0
+        robot_contacts = accumulator.values["n_contacts"]
+        contacting_bodies = sum(1 for contacts in robot_contacts.values() if contacts > 0)
+        return contacting_bodies / len(robot_contacts)
+
 
 class GraspTimeCriterion(Criterion):
     """Criterion based on the time before grasp.
@@ -264,6 +339,22 @@ class FinalPositionCriterion(Criterion):
         else:
             return 0
 
+    def create_accumulator(self) -> SensorValueAccumulator:
+        return SensorValueAccumulator(self.grasp_event_builder,
+                                      {"COG": (SensorCalls.BODY_TRAJECTORY, False)},
+                                      at_end=True)
+
+    def calculate_online_reward(self, accumulator: SensorValueAccumulator,
+                                simulation_output: SimulationResult):
+        grasp_event = self.grasp_event_builder.find_event(event_list=simulation_output.event_container)
+        slipout_event = self.slipout_event_builder.find_event(event_list=simulation_output.event_container)
+        if not grasp_event.state or slipout_event.state:
+            return 0
+        dist = distance.euclidean(accumulator.values["COG"][0], accumulator.final_values["COG"][0])
+        if dist <= self.reference_distance:
+            return 1 - dist / self.reference_distance
+        return 0
+
 
 class SimulationReward:
     """Aggregate criterions and weights to calculate reward.
@@ -272,12 +363,15 @@ class SimulationReward:
             criteria (List[Criterion]): list of criterions
             weights (List[float]): criterion weights
             verbosity (int): parameter to control console output
+            online (bool): the criteria collect their values during the simulation by the
+                accumulators, the simulation doesn't need the data stores for them
     """
 
-    def __init__(self, verbosity=0) -> None:
+    def __init__(self, verbosity=0, online=False) -> None:
         self.criteria: List[Criterion] = []
         self.weights: List[float] = []
         self.verbosity = verbosity
+        self.online = online
 
     def add_criterion(self, citerion: Criterion, weight: float):
         """Add criterion and weight to the lists.
@@ -289,18 +383,29 @@ class SimulationReward:
         self.criteria.append(citerion)
         self.weights.append(weight)
 
+    def create_accumulators(self) -> List[Optional[CriterionAccumulator]]:
+        """Return the accumulators of the criteria for the simulation, None for the criteria
+        without the accumulator."""
+        return [criterion.create_accumulator() for criterion in self.criteria]
+
     def calculate_reward(self, simulation_output, partial=False):
         """Calculate all rewards and return weighted sum of them.
 
+        The criteria use their accumulators if the simulation output has them.
+
         Args:
             simulation_output (_type_): the results of the simulation
 
         Returns:
             float: total reward
         """
+        accumulators = simulation_output.accumulators
         partial_rewards = []
-        for criterion in self.criteria:
-            reward = criterion.calculate_reward(simulation_output)
+        for i, criterion in enumerate(self.criteria):
+            if accumulators and accumulators[i] is not None:
+                reward = criterion.calculate_online_reward(accumulators[i], simulation_output)
+            else:
+                reward = criterion.calculate_reward(simulation_output)
             partial_rewards.append(round(reward, 3))
 
         if partial:
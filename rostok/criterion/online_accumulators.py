@@ -0,0 +1,102 @@
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from rostok.criterion.simulation_flags import EventBuilder, SimulationSingleEvent
+from rostok.virtual_experiment.sensors import Sensor, SensorCalls
+
+
+class CriterionAccumulator:
+    """Base class of the values collected by a criterion during the simulation.
+
+    The simulation calls update after each step, on_event when an event occurs and finalize at
+    the last step, so the criterion doesn't need the data stores with the trajectories.
+    """
+
+    def update(self, step_n: int, robot_sensor: Sensor, env_sensor: Sensor):
+        """Collect the data of the step.
+
+        Args:
+            step_n (int): number of the step
+            robot_sensor (Sensor): sensor of the robot
+            env_sensor (Sensor): sensor of the environment
+        """
+
+    def on_event(self, step_n: int, event: SimulationSingleEvent, robot_sensor: Sensor,
+                 env_sensor: Sensor):
+        """Collect the data at the step of the event occurrence."""
+
+    def finalize(self, step_n: int, robot_sensor: Sensor, env_sensor: Sensor):
+        """Collect the data at the last step of the simulation."""
+
+
+class ForceModuleAccumulator(CriterionAccumulator):
+    """Running mean of the module of the total contact force acting on the object.
+
+    Attributes:
+        body_idx (int): index of the object in the environment sensor
+        max_force (float): the steps with the larger force are not counted
+        force_sum (float): sum of the counted force modules
+        n_steps (int): number of the counted steps
+    """
+
+    def __init__(self, body_idx: int = 0, max_force: float = 100):
+        self.body_idx = body_idx
+        self.max_force = max_force
+        self.force_sum = 0.0
+        self.n_steps = 0
+
+    def update(self, step_n: int, robot_sensor: Sensor, env_sensor: Sensor):
+        contacts = env_sensor.contact_reporter.get_contact_accumulator()
+        row = env_sensor.contact_reporter.get_body_indices().index(self.body_idx)
+        if contacts.counts[row] == 0:
+            return
+        force_module = np.linalg.norm(np.nan_to_num(contacts.get_forces(row)).sum(axis=0))
+        # Cut the steps with huge forces
+        if force_module < self.max_force:
+            self.force_sum += force_module
+            self.n_steps += 1
+
+    def get_mean(self) -> Optional[float]:
+        if self.n_steps == 0:
+            return None
+        return self.force_sum / self.n_steps
+
+
+class SensorValueAccumulator(CriterionAccumulator):
+    """Values of the sensors at the step of the event and at the last step.
+
+    Attributes:
+        event_builder (EventBuilder): builder of the event, the values are taken at its first
+            occurrence
+        sensor_calls (Dict[str, Tuple[SensorCalls, bool]]): maps the name of the value to the
+            sensor callback and the flag of the robot sensor
+        at_end (bool): take the values at the last step too
+        values (Dict[str, Any]): values at the step of the event
+        final_values (Dict[str, Any]): values at the last step
+    """
+
+    def __init__(self,
+                 event_builder: EventBuilder,
+                 sensor_calls: Dict[str, Tuple[SensorCalls, bool]],
+                 at_end: bool = False):
+        self.event_builder = event_builder
+        self.sensor_calls = sensor_calls
+        self.at_end = at_end
+        self.values: Dict[str, Any] = {}
+        self.final_values: Dict[str, Any] = {}
+
+    def read_values(self, robot_sensor: Sensor, env_sensor: Sensor) -> Dict[str, Any]:
+        return {
+            name: sensor_call(robot_sensor if is_robot else env_sensor)
+            for name, (sensor_call, is_robot) in self.sensor_calls.items()
+        }
+
+    def on_event(self, step_n: int, event: SimulationSingleEvent, robot_sensor: Sensor,
+                 env_sensor: Sensor):
+        if not self.values and isinstance(event, self.event_builder.even_class):
+            self.values = self.read_values(robot_sensor, env_sensor)
+
+    def finalize(self, step_n: int, robot_sensor: Sensor, env_sensor: Sensor):
+        if self.at_end:
+            self.final_values = self.read_values(robot_sensor, env_sensor)
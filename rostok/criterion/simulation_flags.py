@@ -17,6 +17,15 @@ class EventCommands(Enum):
     ACTIVATE = 2
 
 
+def count_contacting_links(robot_data: Sensor) -> int:
+    """Return the number of the robot bodies in contact with the environment except the palm.
+
+    It works only with current rule set, where the palm/flat always has the smallest index among
+    the bodies, therefore it is the first row of the contact counts.
+    """
+    return int(np.count_nonzero(robot_data.get_contact_counts()[1:]))
+
+
 class SimulationSingleEvent(ABC):
     """The abstract class for the event that can occur during the simulation only once.
 
@@ -85,21 +94,12 @@ class EventContact(SimulationSingleEvent):
 
         if not self.from_body:
             # the contact information from the object
-            if env_data.get_amount_contacts()[0] > 0:
+            if env_data.get_contact_counts()[0] > 0:
                 self.state = True
                 self.step_n = step_n
         else:
             # the contact information from the robot
-            robot_contacts = robot_data.get_amount_contacts()
-            # it works only with current rule set, where the palm/flat always has the smallest index among the bodies
-            flat_idx_ = list(robot_contacts.keys())[0]
-            contacts = 0
-            # we calculate only the amount of unique keys, therefore the amount of unique contacting bodies
-            for key, value in robot_contacts.items():
-                if key != flat_idx_ and value > 0:
-                    contacts += 1
-
-            if contacts > 0:
+            if count_contacting_links(robot_data) > 0:
                 self.state = True
                 self.step_n = step_n
 
@@ -224,17 +224,13 @@ class EventFlyingApart(SimulationSingleEvent):
                 )
             return EventCommands.STOP
 
-        trajectory_points = robot_data.get_body_trajectory_point()
+        positions = np.nan_to_num(robot_data.get_body_positions(), nan=9999)
         # It takes the position of the first block in the list, that should be the base body
-        base_position = trajectory_points[next(iter(trajectory_points))]
-        for position in trajectory_points.values():
-            if (
-                np.linalg.norm(np.array(base_position) - np.array(position))
-                > self.max_distance
-            ):
-                self.state = True
-                self.step_n = step_n
-                return EventCommands.STOP
+        distances = np.linalg.norm(positions - positions[0], axis=1)
+        if np.any(distances > self.max_distance):
+            self.state = True
+            self.step_n = step_n
+            return EventCommands.STOP
 
         return EventCommands.CONTINUE
 
@@ -287,14 +283,7 @@ class EventSlipOut(SimulationSingleEvent):
                 )
             return EventCommands.STOP
 
-        robot_contacts = robot_data.get_amount_contacts()
-        # it works only with current rule set, where the palm/flat always has the smallest index among the bodies
-        flat_idx_ = list(robot_contacts.keys())[0]
-        contacts = 0
-        # we calculate only the amount of unique keys, therefore the amount of unique contacting bodies
-        for key, value in robot_contacts.items():
-            if key != flat_idx_ and value > 0:
-                contacts += 1
+        contacts = count_contacting_links(robot_data)
 
         contact = contacts > 0
         if contact:
@@ -363,15 +352,10 @@ class EventGrasp(SimulationSingleEvent):
         return False
 
     def check_grasp_current_step(self, env_data: Sensor, robot_data: Sensor):
-        obj_velocity = np.linalg.norm(np.array(env_data.get_velocity()[0]))
-        robot_contacts = robot_data.get_amount_contacts()
-        # it works only with current rule set, where the palm/flat always has the smallest index among the bodies
-        flat_idx_ = list(robot_contacts.keys())[0]
-        contacts = 0
-        # we calculate only the amount of unique keys, therefore the amount of unique contacting bodies
-        for key, value in robot_contacts.items():
-            if key != flat_idx_ and value > 0:
-                contacts += 1
+        # the velocity components are rounded like the sensor data before the comparison
+        obj_velocity = np.linalg.norm(
+            np.nan_to_num(np.round(env_data.get_body_velocities()[0], 4), nan=9999))
+        contacts = count_contacting_links(robot_data)
 
         if obj_velocity <= 0.01 and contacts >= 2:
             self.grasp_steps += 1
@@ -492,11 +476,10 @@ class EventBodyTooLow(SimulationSingleEvent):
         self.ref_height = ref_height
 
     def event_check(self, current_time: float, step_n: int, robot_data: Sensor, env_data: Sensor):
-        robot_position = robot_data.get_body_trajectory_point()
         # it works only with current rule set, where the palm/flat always has the smallest index among the bodies
-        main_body_pos = list(robot_position.items())[0][1]
+        main_body_height = np.nan_to_num(robot_data.get_body_positions()[0, 1], nan=9999)
 
-        if main_body_pos[1] < self.ref_height:
+        if main_body_height < self.ref_height:
             return EventCommands.STOP
 
         return EventCommands.CONTINUE
@@ -508,8 +491,7 @@ class EventContactInInitialPosition(SimulationSingleEvent):
 
     def event_check(self, current_time: float, step_n: int, robot_data: Sensor, env_data: Sensor):
         if step_n <=3:
-            n_contacts = env_data.get_amount_contacts()
-            if n_contacts[0] > 0:
+            if env_data.get_contact_counts()[0] > 0:
                 return EventCommands.STOP
 
         return EventCommands.CONTINUE
@@ -1,8 +1,7 @@
-from collections import defaultdict
-from copy import deepcopy
+from collections import OrderedDict, defaultdict
 import pickle
 from abc import ABC, abstractmethod
-from typing import Any, Union, TypeAlias
+from typing import Any, Iterator, Union, TypeAlias
 import os
 from datetime import datetime
 
@@ -19,6 +18,118 @@ STATESTYPE = Union[int, str]
 StepType: TypeAlias = tuple[STATESTYPE, float, bool, bool]
 TransitionFunctionType: TypeAlias = dict[tuple[STATESTYPE, int], tuple[STATESTYPE, float, bool]]
 
+
+class StateGraphStore:
+    """Compact storage of the graphs of the states.
+
+    A state is stored as its parent state and the name of the applied rule, only the graphs of
+    the root states are stored completely. The graph of a state is built by the application of
+    the rules to the graph of the closest root or cached ancestor. The recently used graphs are
+    kept in the LRU cache. The store supports the dict interface used for the state2graph.
+
+    Attributes:
+        rule_vocabulary (RuleVocabulary): vocabulary with the rules of the records
+        cache_size (int): maximum number of the built graphs in the cache
+    """
+
+    def __init__(self, rule_vocabulary: RuleVocabulary, cache_size: int = 256):
+        self.rule_vocabulary = rule_vocabulary
+        self.cache_size = cache_size
+        self._records: dict[STATESTYPE, tuple[STATESTYPE, str]] = {}
+        self._root_graphs: dict[STATESTYPE, GraphGrammar] = {}
+        self._cache: OrderedDict[STATESTYPE, GraphGrammar] = OrderedDict()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        return state
+
+    def __contains__(self, state: STATESTYPE) -> bool:
+        return state in self._records or state in self._root_graphs
+
+    def __len__(self) -> int:
+        return len(self._records) + len(self._root_graphs)
+
+    def __iter__(self) -> Iterator[STATESTYPE]:
+        yield from self._root_graphs
+        yield from self._records
+
+    def keys(self):
+        return list(iter(self))
+
+    def values(self):
+        return (self[state] for state in self)
+
+    def items(self):
+        return ((state, self[state]) for state in self)
+
+    def __setitem__(self, state: STATESTYPE, graph: GraphGrammar):
+        """Store the graph of the state completely."""
+        self._records.pop(state, None)
+        self._root_graphs[state] = graph.copy_structure()
+        self._cache.pop(state, None)
+
+    def add_transition(self, state: STATESTYPE, rule_name: str, next_state: STATESTYPE,
+                       next_graph: GraphGrammar):
+        """Store the next state as the result of the rule application to the state.
+
+        Args:
+            state (STATESTYPE): parent state
+            rule_name (str): name of the rule applied to the parent state
+            next_state (STATESTYPE): the new state
+            next_graph (GraphGrammar): graph of the new state, it is put in the cache and must
+                not be changed after the call
+        """
+        if next_state in self:
+            return
+        if state not in self:
+            self[next_state] = next_graph
+            return
+        self._records[next_state] = (state, rule_name)
+        self._put_in_cache(next_state, next_graph)
+
+    def _put_in_cache(self, state: STATESTYPE, graph: GraphGrammar):
+        self._cache[state] = graph
+        self._cache.move_to_end(state)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def __getitem__(self, state: STATESTYPE) -> GraphGrammar:
+        """Return the graph of the state. The returned graph must not be changed."""
+        if state in self._cache:
+            self._cache.move_to_end(state)
+            return self._cache[state]
+        if state in self._root_graphs:
+            return self._root_graphs[state]
+
+        rule_names = []
+        ancestor = state
+        while ancestor not in self._cache and ancestor not in self._root_graphs:
+            ancestor, rule_name = self._records[ancestor]
+            rule_names.append(rule_name)
+        if ancestor in self._cache:
+            graph = self._cache[ancestor].copy_structure()
+        else:
+            graph = self._root_graphs[ancestor].copy_structure()
+        for rule_name in reversed(rule_names):
+            graph.apply_rule(self.rule_vocabulary.rule_dict[rule_name])
+        self._put_in_cache(state, graph)
+        return graph
+
+    def update(self, other):
+        """Add the states of other store or dict of graphs, the existing states are kept."""
+        if isinstance(other, StateGraphStore):
+            for state, graph in other._root_graphs.items():
+                if state not in self:
+                    self._root_graphs[state] = graph
+            for state, record in other._records.items():
+                if state not in self:
+                    self._records[state] = record
+        else:
+            for state, graph in other.items():
+                if state not in self:
+                    self[state] = graph
+
 class EnvironmentTerminalReward(ABC):
     def __init__(self, initial_state: STATESTYPE, actions: np.ndarray, verbosity=0):
         """Abstract class environment for defining design space of the problem.
@@ -33,6 +144,7 @@ class EnvironmentTerminalReward(ABC):
         self.terminal_states: dict[STATESTYPE, tuple[float, Any]] = {}
         self.transition_function: TransitionFunctionType = {}
         self.verbosity = verbosity
+        self.defer_rewards = False
 
     def is_terminal_state(self, state: STATESTYPE) -> tuple[bool, bool]:
         """Check if state is terminal. If state is terminal, return True and True if state is in terminal_states table, else False.
@@ -50,7 +162,8 @@ class EnvironmentTerminalReward(ABC):
 
     def get_reward(self, state: STATESTYPE) -> tuple[float, bool]:
         """Get reward of state. If state is terminal, return reward and True if state is in terminal_states table, else False.
-        For nonterminal states return 0.0 and False.
+        For nonterminal states return 0.0 and False. If defer_rewards is True, the reward of the unknown
+        terminal state isn't calculated and 0.0 is returned, the reward has to be added by add_terminal_reward.
 
         Args:
             state (STATESTYPE): state to get reward
@@ -63,6 +176,8 @@ class EnvironmentTerminalReward(ABC):
         if is_terminal:
             if is_known:
                 reward, __ = self.terminal_states[state]
+            elif self.defer_rewards:
+                reward = 0.0
             else:
                 reward, data = self._calculate_reward(state)
                 self.terminal_states[state] = (reward, data)
@@ -72,6 +187,28 @@ class EnvironmentTerminalReward(ABC):
 
         return reward, is_known
 
+    def is_reward_pending(self, state: STATESTYPE) -> bool:
+        """Check if state is terminal and its reward is deferred and still unknown.
+
+        Args:
+            state (STATESTYPE): state to check
+
+        Returns:
+            bool: condition of the pending reward
+        """
+        is_terminal, is_known = self.is_terminal_state(state)
+        return self.defer_rewards and is_terminal and not is_known
+
+    def add_terminal_reward(self, state: STATESTYPE, reward: float, data: Any = None):
+        """Save reward and data of the terminal state calculated outside the environment.
+
+        Args:
+            state (STATESTYPE): terminal state
+            reward (float): reward of the state
+            data (Any, optional): data of the state. Defaults to None.
+        """
+        self.terminal_states[state] = (reward, data)
+
     def info(self, verbosity=None) -> str:
         """Get info about environment.
 
@@ -203,6 +340,8 @@ class DesignEnvironment(EnvironmentTerminalReward):
         """Environment for design space of mechanism. Create dictionary of rules and convert it to actions by sorted name of rules.
         Create dictionary of nodes and convert it to states by sorted name of nodes.
         Save graph of state in state2graph dictionary.
+        The actions are the rule ids of the rule vocabulary, the mask of the available actions is
+        calculated once for each state and cached.
 
         Args:
             rule_vocabulary (RuleVocabulary): Vocabulary of rules
@@ -226,9 +365,19 @@ class DesignEnvironment(EnvironmentTerminalReward):
 
         self.reward_calculator = reward_calculator
 
-        self.state2graph: dict[STATESTYPE, GraphGrammar] = {
-            self.initial_state: deepcopy(initial_graph)
-        }
+        self.state2graph = StateGraphStore(rule_vocabulary)
+        self.state2graph[self.initial_state] = initial_graph
+
+        self._action_masks: dict[STATESTYPE, np.ndarray] = {}
+        terminal_rules_mask = self.rule_vocabulary.get_terminal_rules_mask()
+        self._terminal_actions = self._to_action_mask(terminal_rules_mask)
+        self._nonterminal_actions = self._to_action_mask(~terminal_rules_mask)
+
+    def _to_action_mask(self, rules_mask: np.ndarray) -> np.ndarray:
+        """Convert the boolean mask of the rule ids to the read-only mask of the actions."""
+        mask_actions = rules_mask.astype(self.actions.dtype)
+        mask_actions.setflags(write=False)
+        return mask_actions
 
     def next_state(self, state: STATESTYPE, action: int) -> StepType:
         """Get next state by action. If next state is not in state2graph dictionary, apply rule to graph of state and save it in state2graph dictionary.
@@ -248,7 +397,7 @@ class DesignEnvironment(EnvironmentTerminalReward):
             name_rule = self.action2rule[action]
             rule = self.rule_vocabulary.rule_dict[name_rule]
             graph = self.state2graph[state]
-            new_graph = deepcopy(graph)
+            new_graph = graph.copy_structure()
             new_graph.apply_rule(rule)
             next_state = self.data2state(new_graph)
             reward, is_known = self.update_environment(graph, action, new_graph)
@@ -284,13 +433,12 @@ class DesignEnvironment(EnvironmentTerminalReward):
         Returns:
             np.ndarray: mask of available actions
         """
-        graph = self.state2graph[state]
-        available_rules = self.rule_vocabulary.get_list_of_applicable_rules(graph)
-        mask_available_actions = np.zeros_like(self.actions)
-
-        rule_list = np.array(list(self.action2rule.values()))
-        mask = [rule in available_rules for rule in rule_list]
-        mask_available_actions[mask] = 1
+        mask_available_actions = self._action_masks.get(state)
+        if mask_available_actions is None:
+            graph = self.state2graph[state]
+            mask_available_actions = self._to_action_mask(
+                self.rule_vocabulary.get_applicable_rules_mask(graph))
+            self._action_masks[state] = mask_available_actions
 
         return mask_available_actions
 
@@ -300,13 +448,7 @@ class DesignEnvironment(EnvironmentTerminalReward):
         Returns:
             np.ndarray: mask of nonterminal actions
         """
-        nonterminal_rules = self.rule_vocabulary.nonterminal_rule_dict.keys()
-        mask_nonterminal_actions = np.zeros_like(self.actions)
-        rule_list = np.array(list(self.action2rule.values()))
-        mask = [rule in nonterminal_rules for rule in rule_list]
-        mask_nonterminal_actions[mask] = 1
-
-        return mask_nonterminal_actions
+        return self._nonterminal_actions
 
     def get_terminal_actions(self) -> np.ndarray:
         """Get mask of terminal actions. Terminal actions are actions that apply terminal rules.
@@ -314,16 +456,27 @@ class DesignEnvironment(EnvironmentTerminalReward):
         Returns:
             np.ndarray: mask of terminal actions
         """
-        terminal_rules = self.rule_vocabulary.terminal_rule_dict.keys()
-        mask_terminal_actions = np.zeros_like(self.actions)
-        rule_list = np.array(list(self.action2rule.values()))
-        mask = [rule in terminal_rules for rule in rule_list]
-        mask_terminal_actions[mask] = 1
+        return self._terminal_actions
 
-        return mask_terminal_actions
+    def calculate_graph_reward(self, state: STATESTYPE, graph: GraphGrammar) -> tuple[float, Any]:
+        """Calculate reward of the terminal state by _calculate_reward. The copies of the
+        environment, e.g. in the reward processes of ParallelMCTS, get the graph of the state
+        built by the master environment, it is added to state2graph.
+
+        Args:
+            state (STATESTYPE): state to calculate reward
+            graph (GraphGrammar): graph of the state
+
+        Returns:
+            tuple[float, Any]: reward and data of state
+        """
+        if state not in self.state2graph:
+            self.state2graph[state] = graph
+        return self._calculate_reward(state)
 
     def _calculate_reward(self, state: STATESTYPE) -> tuple[float, Any]:
-        """Calculate reward of state. Use reward_calculator to calculate reward.
+        """Calculate reward of state. Use reward_calculator to calculate reward, the calculator
+        looks up the reward in its reward_cache before the simulation.
         Don't use the method directly. Use get_reward instead.
 
         Args:
@@ -388,10 +541,10 @@ class DesignEnvironment(EnvironmentTerminalReward):
         """
         state = self.data2state(graph)
         next_state = self.data2state(next_graph)
-        if next_state not in self.state2graph:
-            self.state2graph[next_state] = deepcopy(next_graph)
+        self.state2graph.add_transition(state, self.action2rule[action], next_state, next_graph)
         reward, is_known = self.get_reward(next_state)
-        if (state, action) not in self.transition_function:
+        is_pending = self.is_reward_pending(next_state)
+        if (state, action) not in self.transition_function and not is_pending:
             self.transition_function[(state, action)] = (next_state, reward,
                                                          self.is_terminal_state(next_state)[0])
         return reward, is_known
@@ -568,18 +721,10 @@ class SubDesignEnvironment(DesignEnvironment):
         Returns:
             np.ndarray: mask of available actions
         """
-        graph = self.state2graph[state]
-        available_rules = self.rule_vocabulary.get_list_of_applicable_rules(graph)
-        mask_available_actions = np.zeros_like(self.actions)
-
-        rule_list = np.array(list(self.action2rule.values()))
-        mask = [rule in available_rules for rule in rule_list]
-        mask_available_actions[mask] = 1
-
-        mask_terminal = self.get_terminal_actions()
+        mask_available_actions = super().get_available_actions(state)
 
         if self.max_number_nonterminal_rules <= self.counter_nonterminal_rules[state]:
-            mask_available_actions *= mask_terminal
+            mask_available_actions = mask_available_actions * self.get_terminal_actions()
 
         return mask_available_actions
 
@@ -596,10 +741,10 @@ class SubDesignEnvironment(DesignEnvironment):
         """
         state = self.data2state(graph)
         next_state = self.data2state(next_graph)
-        if next_state not in self.state2graph:
-            self.state2graph[next_state] = deepcopy(next_graph)
+        self.state2graph.add_transition(state, self.action2rule[action], next_state, next_graph)
         reward, is_known = self.get_reward(next_state)
-        if (state, action) not in self.transition_function:
+        is_pending = self.is_reward_pending(next_state)
+        if (state, action) not in self.transition_function and not is_pending:
             self.transition_function[(state, action)] = (next_state, reward,
                                                          self.is_terminal_state(next_state)[0])
 
@@ -55,6 +55,8 @@ class RuleAction:
 
 
 class GraphEnvironment():
+    # attributes that are shared by the copies of the state instead of the deep copy
+    _shared_attributes = ("init_graph",)
 
     def __init__(self, initilize_graph, rules, max_numbers_rules_non_terminal=20):
         """Class of "environment" of graph grammar
@@ -178,8 +180,27 @@ class GraphEnvironment():
             return is_graph_eq
         return False
 
+    def __deepcopy__(self, memo):
+        """Copy the state for the next action.
+
+        The graph is copied with shared Node objects, the shared attributes are not copied.
+        """
+        cls = self.__class__
+        result = cls.__new__(cls)
+        memo[id(self)] = result
+        for k, v in self.__dict__.items():
+            if k in self._shared_attributes:
+                setattr(result, k, v)
+            elif k == "graph":
+                setattr(result, k, v.copy_structure())
+            else:
+                setattr(result, k, deepcopy(v, memo))
+
+        return result
+
 
 class GraphVocabularyEnvironment(GraphEnvironment):
+    _shared_attributes = ("init_graph", "actions", "optimizer")
 
     def __init__(self,
                  initilize_graph: GraphGrammar,
@@ -240,18 +261,6 @@ class GraphVocabularyEnvironment(GraphEnvironment):
             new_state.counter_action += 1
         return new_state
 
-    def __deepcopy__(self, memo):
-        cls = self.__class__
-        result = cls.__new__(cls)
-        memo[id(self)] = result
-        for k, v in self.__dict__.items():
-            if k in ["actions", "optimizer"]:
-                setattr(result, k, v)
-            else:
-                setattr(result, k, deepcopy(v, memo))
-
-        return result
-
 
 class GraphStubsEnvironment(GraphEnvironment):
 
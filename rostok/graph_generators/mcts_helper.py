@@ -2,7 +2,6 @@ import sys
 import os
 import pickle
 import time
-from copy import deepcopy
 from pathlib import Path
 from statistics import mean
 
@@ -312,6 +311,7 @@ class MCTSGraphEnvironment(GraphVocabularyEnvironment):
         actions (RuleVocabulary): rules for the search
         optimizer (ControlOptimizer): optimizer for simulation of the mechanism
         max_actions_not_terminal (int): max number of non-terminal rules for the MCTS run"""
+    _shared_attributes = ("init_graph", "actions", "optimizer", "helper")
 
     def __init__(self,
                  initial_graph: GraphGrammar,
@@ -352,18 +352,6 @@ class MCTSGraphEnvironment(GraphVocabularyEnvironment):
         print(self.reward)
         return self.reward
 
-    def __deepcopy__(self, memo):
-        cls = self.__class__
-        result = cls.__new__(cls)
-        memo[id(self)] = result
-        for k, v in self.__dict__.items():
-            if k in ["actions", "optimizer", "helper"]:
-                setattr(result, k, v)
-            else:
-                setattr(result, k, deepcopy(v, memo))
-
-        return result
-
 
 def prepare_mcts_state_and_helper(graph: GraphGrammar,
                                   rule_vocabulary: RuleVocabulary,
@@ -1,7 +1,9 @@
-from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import os
+from dataclasses import dataclass
 from datetime import datetime
 import pickle
+from typing import Optional
 
 import numpy as np
 
@@ -10,6 +12,58 @@ from rostok.graph_generators.environments.design_environment import STATESTYPE,
 
 EPS = 1e-8
 
+# State of the reward worker process, it is set once by the initializer of the pool
+_worker_environment = None
+
+
+def _init_reward_worker(environment: DesignEnvironment):
+    global _worker_environment
+    _worker_environment = environment
+    # the workers are already parallel, the simulations of one graph run in the worker
+    if hasattr(environment.reward_calculator, "num_cpu_workers"):
+        environment.reward_calculator.num_cpu_workers = 1
+
+
+def _calculate_terminal_reward(state, graph):
+    """Calculate reward of the terminal state in the worker process."""
+    return _worker_environment.calculate_graph_reward(state, graph)
+
+
+@dataclass
+class StateRecord:
+    """Statistics of the state in the search tree. The arrays are aligned with the available
+    actions of the state.
+
+    Attributes:
+        actions (np.ndarray): available actions of the state in the ascending order
+        Q (np.ndarray): estimation of the reward of each action
+        N (np.ndarray): visit count of each action
+        Ns (int): visit count of the state
+        V (Optional[float]): reward of the terminal state, 0.0 for the other states. None if
+            the state is not reached by the search yet.
+        virtual_N (np.ndarray): pending visit count of each action, see ParallelMCTS
+        virtual_Ns (int): pending visit count of the state
+    """
+    actions: np.ndarray
+    Q: np.ndarray = None
+    N: np.ndarray = None
+    Ns: int = 0
+    V: Optional[float] = None
+    virtual_N: np.ndarray = None
+    virtual_Ns: int = 0
+
+    def __post_init__(self):
+        if self.Q is None:
+            self.Q = np.zeros(len(self.actions))
+        if self.N is None:
+            self.N = np.zeros(len(self.actions), dtype=np.int64)
+        if self.virtual_N is None:
+            self.virtual_N = np.zeros(len(self.actions), dtype=np.int64)
+
+    def get_index(self, actions):
+        """Return the positions of the actions in the arrays of the record."""
+        return np.searchsorted(self.actions, actions)
+
 
 class MCTS:
 
@@ -25,10 +79,17 @@ class MCTS:
         self.c = c
         self.environment = environment
 
-        self.Qsa = defaultdict(float)  # total reward of each state-action pair
-        self.Nsa = defaultdict(int)  # total visit count for each state-action pair
-        self.Ns = defaultdict(int)  # total visit count for each state
-        self.Vs = defaultdict(float)  # total reward of each state
+        self.records: dict[STATESTYPE, StateRecord] = {}  # statistics of each state
+
+    def get_record(self, state: STATESTYPE) -> StateRecord:
+        """Return the record of the state, the record is created with the available actions of
+        the state at the first call."""
+        record = self.records.get(state)
+        if record is None:
+            mask = self.environment.get_available_actions(state)
+            record = StateRecord(self.environment.actions[mask == 1])
+            self.records[state] = record
+        return record
 
     def get_policy_by_N(self, state: STATESTYPE, weighted=False):
         """Get policy for state. Policy is a probability distribution over actions.
@@ -36,24 +97,23 @@ class MCTS:
         
             Args:
                 state (STATESTYPE): State for which we want to get policy.
+                weighted (bool, optional): If True, the visits of the actions, except the most
+                    visited ones, are weighted by their nonzero Q function. Defaults to False.
                 
             Returns:
                 pi (np.ndarray): Policy for state.
         """
+        record = self.get_record(state)
         pi = np.zeros_like(self.environment.actions, dtype=np.float32)
-        mask_actions = self.environment.get_available_actions(state)
-        for a in self.environment.actions[mask_actions == 1]:
-            pi[a] = 0.0 if self.Nsa[(state, a)] == 0 else self.Nsa[(state, a)]
-        
+        pi[record.actions] = record.N
+
         if weighted:
-            max_pi = np.max(pi)
-            for num in range(1,int(max_pi)):
-                actions = np.argwhere(pi == num)
-                for a in actions:
-                    pi[a] = num*self.Qsa[(state, a)] if self.Qsa.get((state, a),0) != 0 else num
+            counts = pi[record.actions]
+            is_weighted = (counts >= 1) & (counts < int(np.max(pi))) & (record.Q != 0)
+            pi[record.actions[is_weighted]] = counts[is_weighted] * record.Q[is_weighted]
         if np.isclose(np.sum(pi), 0.0):
-            pi = np.ones_like(self.environment.actions, dtype=np.float32)
-            pi *= mask_actions
+            pi = np.zeros_like(self.environment.actions, dtype=np.float32)
+            pi[record.actions] = 1
         pi /= np.sum(pi)
         return pi
     
@@ -67,13 +127,12 @@ class MCTS:
             Returns:
                 pi (np.ndarray): Policy for state.
         """
+        record = self.get_record(state)
         pi = np.zeros_like(self.environment.actions, dtype=np.float32)
-        mask_actions = self.environment.get_available_actions(state)
-        for a in self.environment.actions[mask_actions == 1]:
-            pi[a] = self.Qsa.get((state, a), 0)
+        pi[record.actions] = record.Q
         if np.isclose(np.sum(pi), 0.0):
-            pi = np.ones_like(self.environment.actions, dtype=np.float32)
-            pi *= mask_actions
+            pi = np.zeros_like(self.environment.actions, dtype=np.float32)
+            pi[record.actions] = 1
         pi /= np.sum(pi)
         return pi
 
@@ -89,14 +148,15 @@ class MCTS:
             Returns:
                 float: Value reward of state.
         """
-        if state not in self.Vs:
+        record = self.get_record(state)
+        if record.V is None:
             is_terminal_s, __ = self.environment.is_terminal_state(state)
-            self.Vs[state] = self.environment.terminal_states[state][0] if is_terminal_s else 0.0
+            record.V = self.environment.terminal_states[state][0] if is_terminal_s else 0.0
 
-        if self.Vs[state] != 0.0:
-            return self.Vs[state]
+        if record.V != 0.0:
+            return record.V
 
-        if state not in self.Ns or self.Ns[state] == 0:
+        if record.Ns == 0:
             hat_V = self.default_policy(state, num_actions)
 
             return hat_V
@@ -118,19 +178,23 @@ class MCTS:
             action: Action for which we want update Q function.
             reward: Reward for pair (state, action) based on Monte Carlo estimation.
         """
-        if (state, action) in self.Qsa:
-            self.Qsa[(
-                state,
-                action)] += (reward - self.Qsa[(state, action)]) / (self.Nsa[(state, action)])
-            self.Nsa[(state, action)] += 1
-        else:
-            self.Qsa[(state, action)] = reward
-            self.Nsa[(state, action)] = 1
+        self.update_Q_functions(state, [action], [reward])
 
-        if state in self.Ns:
-            self.Ns[state] += 1
-        else:
-            self.Ns[state] = 1
+    def update_Q_functions(self, state, actions, rewards):
+        """Update Q function for the different actions of the state at once.
+
+        Args:
+            state: State for which we want update Q function.
+            actions: Actions for which we want update Q function, each action once.
+            rewards: Reward for each action based on Monte Carlo estimation.
+        """
+        record = self.get_record(state)
+        idx = record.get_index(actions)
+        N = record.N[idx]
+        Q = record.Q[idx]
+        record.Q[idx] = np.where(N == 0, rewards, Q + (np.asarray(rewards) - Q) / np.maximum(N, 1))
+        record.N[idx] += 1
+        record.Ns += len(idx)
 
     def default_policy(self, state, num_actions = 0):
         """Default policy for unkown states. We use random actions until we reach terminal state.
@@ -145,8 +209,7 @@ class MCTS:
         """
         rewards = []
 
-        mask = self.environment.get_available_actions(state)
-        available_actions = self.environment.actions[mask == 1]
+        available_actions = self.get_record(state).actions
         print(f"Num actions: {num_actions}")
         if num_actions != 0:
             num_actions = min(num_actions, len(available_actions))
@@ -158,17 +221,17 @@ class MCTS:
             s, reward, is_terminal_state, __ = self.environment.next_state(state, a)
             while not is_terminal_state:
                 mask = self.environment.get_available_actions(s)
-                available_actions = self.environment.actions[mask == 1]
-                rnd_action = np.random.choice(available_actions)
+                available_actions_s = self.environment.actions[mask == 1]
+                rnd_action = np.random.choice(available_actions_s)
 
                 s, reward, is_terminal_state, __ = self.environment.next_state(s, rnd_action)
 
             rewards.append(reward)
-            self.update_Q_function(state, a, reward)
 
         if len(rewards) == 0:
             return self.environment.get_reward(state)[0]
 
+        self.update_Q_functions(state, available_actions, rewards)
         return np.mean(rewards)
 
     def tree_policy(self, state):
@@ -180,12 +243,10 @@ class MCTS:
         Returns:
             best_action: Best action for state.
         """
-        mask = self.environment.get_available_actions(state)
-        available_actions = self.environment.actions[mask == 1]
         uct_score = self.uct_score(state)
         max_score = np.max(uct_score)
         args_max_score = np.argwhere(uct_score == max_score).flatten()
-        best_action = available_actions[np.random.choice(args_max_score)]
+        best_action = self.get_record(state).actions[np.random.choice(args_max_score)]
         return best_action
     
     def uct_score(self, state):
@@ -197,14 +258,8 @@ class MCTS:
         Returns:
             float: uct score for each action.
         """
-        mask = self.environment.get_available_actions(state)
-        available_actions = self.environment.actions[mask == 1]
-        
-        state_action = [(state, a) for a in available_actions]
-        Q = np.array([self.Qsa.get(sa, 0) for sa in state_action])
-        N = np.array([self.Nsa.get(sa, 0) for sa in state_action])
-        
-        uct_scores = Q + self.c * np.sqrt(np.abs(np.log(self.Ns[state]) / (N + EPS)))
+        record = self.get_record(state)
+        uct_scores = record.Q + self.c * np.sqrt(np.abs(np.log(record.Ns) / (record.N + EPS)))
         
         return uct_scores
     
@@ -245,37 +300,79 @@ class MCTS:
             print(f"Create dictionary {os_path} and save MCTS")
         
         self.environment.save_environment(prefix="MCTS_env", path=os_path, rewrite=rewrite, use_date=False)
-        
-        file_names = [
-            "Qsa.p", "Nsa.p", "Ns.p", "Vs.p"
-        ]
-        variables = [
-            self.Qsa, self.Nsa, self.Ns, self.Vs
-        ]
-        for file, var in zip(file_names, variables):
-            with open(os.path.join(os_path, file), "wb") as f:
-                pickle.dump(var, f, protocol=pickle.HIGHEST_PROTOCOL)
-        
+        self.save_tree(os.path.join(os_path, "tree.npz"))
+
         return os_path
-                
+
+    def save_tree(self, file_path):
+        """Save the records of the states to the npz file. The arrays of the records are
+        concatenated, the pending visits are not saved.
+
+        Args:
+            file_path (str): Path to the file.
+        """
+        states = list(self.records)
+        records = [self.records[state] for state in states]
+        offsets = np.cumsum([0] + [len(record.actions) for record in records])
+        np.savez_compressed(
+            file_path,
+            states=np.array([str(state) for state in states]),
+            is_int_state=np.array([isinstance(state, int) for state in states], dtype=bool),
+            offsets=offsets,
+            actions=np.concatenate([record.actions for record in records] + [np.zeros(0, int)]),
+            Q=np.concatenate([record.Q for record in records] + [np.zeros(0)]),
+            N=np.concatenate([record.N for record in records] + [np.zeros(0, int)]),
+            Ns=np.array([record.Ns for record in records], dtype=np.int64),
+            V=np.array([np.nan if record.V is None else record.V for record in records]))
+
+    def load_tree(self, file_path):
+        """Load the records of the states from the npz file saved by save_tree. The loaded
+        records replace the records of the same states.
+
+        Args:
+            file_path (str): Path to the file.
+        """
+        with np.load(file_path) as data:
+            offsets = data["offsets"]
+            actions, Q, N = data["actions"], data["Q"], data["N"]
+            for i, (state, is_int_state) in enumerate(zip(data["states"].tolist(),
+                                                          data["is_int_state"].tolist())):
+                part = slice(offsets[i], offsets[i + 1])
+                V = float(data["V"][i])
+                self.records[int(state) if is_int_state else state] = StateRecord(
+                    actions[part], Q[part], N[part], int(data["Ns"][i]),
+                    None if np.isnan(V) else V)
+
     def load(self, path):
-        """Load MCTS data from path.
+        """Load MCTS data from path. The trees saved in the format of the dictionaries
+        Qsa.p, Nsa.p, Ns.p and Vs.p are loaded too.
 
         Args:
             path (str): Path to folder where we want to load MCTS data.
         """
         self.environment.load_environment(os.path.join(path, "MCTS_env"))
-        
+
+        if os.path.exists(os.path.join(path, "tree.npz")):
+            self.load_tree(os.path.join(path, "tree.npz"))
+            return
+
         file_names = [
             "Qsa.p", "Nsa.p", "Ns.p", "Vs.p"
         ]
-        variables = [
-            self.Qsa, self.Nsa, self.Ns, self.Vs
-        ]
-
-        for file, var in zip(file_names, variables):
+        variables = []
+        for file in file_names:
             with open(os.path.join(path, file), "rb") as f:
-                var.update(pickle.load(f))
+                variables.append(pickle.load(f))
+        Qsa, Nsa, Ns, Vs = variables
+        for (state, action), q in Qsa.items():
+            record = self.get_record(state)
+            idx = record.get_index(action)
+            record.Q[idx] = q
+            record.N[idx] = Nsa.get((state, action), 0)
+        for state, n in Ns.items():
+            self.get_record(state).Ns = n
+        for state, v in Vs.items():
+            self.get_record(state).V = v
     
     def get_data_state(self, state: STATESTYPE):
         """Get data for state. Data is a dictionary with keys:
@@ -291,8 +388,8 @@ class MCTS:
             Returns:
                 dict: Dictionary with data for state.
         """
-        mask = self.environment.get_available_actions(state)
-        possible_actions = self.environment.actions[mask == 1]
+        record = self.get_record(state)
+        possible_actions = record.actions
         if not possible_actions.any():
             pi_Q = np.zeros_like(self.environment.actions, dtype=np.float32)
             pi_N = np.zeros_like(self.environment.actions, dtype=np.float32)
@@ -300,11 +397,197 @@ class MCTS:
         else:
             pi_Q = self.get_policy_by_Q(state)
             pi_N = self.get_policy_by_Q(state)
-            V = sum([self.Qsa.get((state, a), 0) * pi_N[a] for a in possible_actions])
+            V = np.dot(record.Q, pi_N[possible_actions])
 
-        Q = {self.environment.action2rule[a]: self.Qsa.get((state, a), 0) for a in possible_actions}
-        N = self.Ns[state]
-        Na = {self.environment.action2rule[a]: self.Nsa.get((state, a), 0) for a in possible_actions}
+        rules = [self.environment.action2rule[a] for a in possible_actions]
+        Q = dict(zip(rules, record.Q.tolist()))
+        N = record.Ns
+        Na = dict(zip(rules, record.N.tolist()))
         return {"Qa": Q, "pi_N": pi_N, "pi_Q": pi_Q, "V": V, "N": N, "Na": Na}
-    
 
+
+class ParallelMCTS(MCTS):
+
+    def __init__(self,
+                 environment: DesignEnvironment,
+                 c=1.4,
+                 num_workers=2,
+                 batch_size=None,
+                 virtual_loss=1.0):
+        """Leaf-parallel Monte Carlo Tree Search. The selection, the rollouts and the updates of the
+        tree are done in the master process, the rewards of the new terminal states are calculated
+        by the pool of the processes. Each process gets the copy of the environment at the start
+        of the pool and calculates the rewards by its _calculate_reward. The pending evaluations add virtual loss to the pairs
+        (state, action) on their paths, so the next selections explore the other branches.
+
+        Args:
+            environment (DesignEnvironment): Environment for MCTS.
+            c (float, optional): Exploration coefficient. Defaults to 1.4.
+            num_workers (int, optional): Number of the reward processes. Defaults to 2.
+            batch_size (int, optional): Number of the tree descents in one search call. Defaults to None. None means num_workers.
+            virtual_loss (float, optional): Reward assumed for the pending visits is -virtual_loss. Defaults to 1.0.
+        """
+        super().__init__(environment, c)
+        self.num_workers = num_workers
+        self.batch_size = num_workers if batch_size is None else batch_size
+        self.virtual_loss = virtual_loss
+
+        self._pool = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        """Return the pool of the reward processes, the pool is created once."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers,
+                                             initializer=_init_reward_worker,
+                                             initargs=(self.environment,))
+        return self._pool
+
+    def shutdown(self):
+        """Stop the pool of the reward processes."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def search(self, state: STATESTYPE, num_actions=0):
+        """Run batch_size descents of the tree from the state. The number of the concurrent
+        reward evaluations is limited by num_workers. The method returns when all evaluations
+        are finished and backed up. If the reward calculation fails, the virtual loss of the
+        unfinished descents is removed and the exception is raised.
+
+            Args:
+                state (STATESTYPE): State for which we want explore tree of actions.
+                num_actions (int, optional): Number of actions which be explored in the new states. Defaults to 0.
+
+            Returns:
+                float: Mean value of the descents.
+        """
+        pending = {}  # terminal state -> list of the rollouts waiting for its reward
+        futures = {}
+        values = []
+        descents = []
+        self.environment.defer_rewards = True
+        try:
+            while len(descents) < self.batch_size or futures:
+                while len(descents) < self.batch_size and len(futures) < self.num_workers:
+                    self._descend(state, num_actions, pending, futures, values, descents)
+                if not futures:
+                    continue
+                done, __ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    terminal_state = futures.pop(future)
+                    reward, data = future.result()
+                    self.environment.add_terminal_reward(terminal_state, reward, data)
+                    for descent, leaf, action in pending.pop(terminal_state):
+                        self._finish_rollout(descent, leaf, action, reward, values)
+        finally:
+            self.environment.defer_rewards = False
+            for future in futures:
+                future.cancel()
+            for descent in descents:
+                if not descent["is_finished"]:
+                    self._remove_virtual_loss(descent["path"])
+
+        return np.mean(values) if values else 0.0
+
+    def _descend(self, state, num_actions, pending, futures, values, descents):
+        """Select the path by the tree policy with virtual loss and start the rollouts from its
+        leaf. The rollouts ended in the unknown terminal states are put to the pool. The descent
+        is added to descents."""
+        path = []
+        descent = {"path": path, "rewards": [], "waiting": 1, "is_finished": False}
+        descents.append(descent)
+        while True:
+            is_terminal_s, is_known = self.environment.is_terminal_state(state)
+            record = self.get_record(state)
+            if is_terminal_s and is_known:
+                record.V = self.environment.terminal_states[state][0]
+                self._backup(descent, record.V, values)
+                return
+            if is_terminal_s:
+                self._add_pending(state, (descent, None, None), pending, futures)
+                return
+            record.V = 0.0
+            if record.Ns == 0:
+                break
+            action = self.tree_policy(state)
+            path.append((state, action))
+            record.virtual_N[record.get_index(action)] += 1
+            record.virtual_Ns += 1
+            state = self.environment.next_state(state, action)[0]
+
+        available_actions = record.actions
+        if num_actions != 0:
+            num_actions = min(num_actions, len(available_actions))
+            available_actions = np.random.choice(available_actions, num_actions, replace=False)
+
+        descent["waiting"] = len(available_actions)
+        if len(available_actions) == 0:
+            self._backup(descent, self.environment.get_reward(state)[0], values)
+            return
+        for a in available_actions:
+            s, __, is_terminal_state, __ = self.environment.next_state(state, a)
+            while not is_terminal_state:
+                mask = self.environment.get_available_actions(s)
+                rnd_action = np.random.choice(self.environment.actions[mask == 1])
+                s, __, is_terminal_state, __ = self.environment.next_state(s, rnd_action)
+
+            if s in self.environment.terminal_states:
+                reward = self.environment.terminal_states[s][0]
+                self._finish_rollout(descent, state, a, reward, values)
+            else:
+                self._add_pending(s, (descent, state, a), pending, futures)
+
+    def _add_pending(self, terminal_state, rollout, pending, futures):
+        if terminal_state not in pending:
+            pending[terminal_state] = []
+            graph = self.environment.state2graph[terminal_state]
+            futures[self.get_pool().submit(_calculate_terminal_reward, terminal_state,
+                                           graph)] = terminal_state
+        pending[terminal_state].append(rollout)
+
+    def _finish_rollout(self, descent, leaf, action, reward, values):
+        """Update the first pair of the rollout, the path of the descent is backed up with the
+        mean reward when all its rollouts are finished."""
+        if leaf is not None:
+            self.update_Q_function(leaf, action, reward)
+        descent["rewards"].append(reward)
+        descent["waiting"] -= 1
+        if descent["waiting"] == 0:
+            self._backup(descent, np.mean(descent["rewards"]), values)
+
+    def _remove_virtual_loss(self, path):
+        for state, action in path:
+            record = self.get_record(state)
+            record.virtual_N[record.get_index(action)] -= 1
+            record.virtual_Ns -= 1
+
+    def _backup(self, descent, value, values):
+        descent["is_finished"] = True
+        self._remove_virtual_loss(descent["path"])
+        for state, action in descent["path"]:
+            self.update_Q_function(state, action, value)
+        values.append(value)
+
+    def uct_score(self, state):
+        """UCT formula with the pending visits counted as visits with the reward -virtual_loss.
+
+        Args:
+            state: State for which we want to get UCT score.
+
+        Returns:
+            float: uct score for each action.
+        """
+        record = self.get_record(state)
+        total_N = record.N + record.virtual_N
+        Q = np.where(record.virtual_N == 0, record.Q,
+                     (record.Q * record.N - self.virtual_loss * record.virtual_N) /
+                     np.maximum(total_N, 1))
+        Ns = record.Ns + record.virtual_Ns
+        uct_scores = Q + self.c * np.sqrt(np.abs(np.log(Ns) / (total_N + EPS)))
+
+        return uct_scores
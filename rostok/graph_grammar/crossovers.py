@@ -1,4 +1,3 @@
-from copy import deepcopy
 import random
 import rostok.graph_grammar.node as rostok_graph
 from rostok.graph_grammar.node import Node
@@ -114,7 +113,7 @@ def get_subtree_graph(graph: rostok_graph.GraphGrammar, id: int):
 
 
 def remove_subtree_without_root(graph_1: rostok_graph.GraphGrammar, id_1: int):
-    graph_1 = deepcopy(graph_1)
+    graph_1 = graph_1.copy_structure()
     subtree_to_remove = dfs_tree(graph_1, id_1)
     subtree_to_remove.remove_node(id_1)
     graph_1.remove_edges_from(subtree_to_remove.edges)
@@ -124,7 +123,7 @@ def remove_subtree_without_root(graph_1: rostok_graph.GraphGrammar, id_1: int):
 
 
 def add_subtree_using_rule(graph_1: rostok_graph.GraphGrammar, id_1: int, subtree: nx.DiGraph):
-    graph_1 = deepcopy(graph_1)
+    graph_1 = graph_1.copy_structure()
     rule = rostok_graph.Rule()
     rule.graph_insert = subtree
     # Normal result is list with one element
@@ -180,8 +179,8 @@ def subtree_crossover(
         [GraphGrammar, GraphGrammar]: Changed graphs
     """
     if not inplace:
-        graph_1 = deepcopy(graph_1)
-        graph_2 = deepcopy(graph_2)
+        graph_1 = graph_1.copy_structure()
+        graph_2 = graph_2.copy_structure()
 
     id_1 = random.choice(list(graph_1.nodes()))
     available_ids_2 = available_node_ids_both_directions(graph_1, id_1, graph_2, check_neighbours)
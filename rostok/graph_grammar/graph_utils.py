@@ -10,6 +10,8 @@ def replace_nodes(graph: GraphGrammar, mapping: dict[Node, Node]):
         id_replace = graph.find_nodes(node_replace)
         for id in id_replace:
             graph_dict[id]["Node"] = mapping[node_replace]
+    # the labels are changed bypassing the networkx methods
+    graph.invalidate_caches()
 
 
 def plot_graph(graph: GraphGrammar):
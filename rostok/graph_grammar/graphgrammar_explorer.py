@@ -1,5 +1,8 @@
-from copy import deepcopy
-from typing import Tuple
+import json
+from dataclasses import dataclass
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Tuple
 
 from rostok.graph_grammar.node import GraphGrammar, Rule
 from rostok.graph_grammar.rule_vocabulary import RuleVocabulary
@@ -45,70 +48,270 @@ def number_of_non_terminal_rules(seq: list[Rule]) -> int:
     return len(list(filter(is_terminal, seq)))
 
 
-def _ruleset_explorer(set_uniq_graphs: set[GraphGrammar],
-                      limit_non_terminal: int,
-                      rule_vocab: RuleVocabulary,
-                      mutable_counter: list[int],
-                      current_number_non_terminal: int = 0,
-                      seq_rule: list[Rule] = []):
+@dataclass
+class ExplorerState:
+    """Graph of the explorer frontier.
+
+    Attributes:
+        graph (GraphGrammar): the graph after the rules
+        rules (tuple[str, ...]): names of the applied rules
+        n_non_terminal (int): number of the applied non-terminal rules
+        n_sequences (int): number of the rule sequences that lead to the graph
+    """
+    graph: GraphGrammar
+    rules: tuple[str, ...] = ()
+    n_non_terminal: int = 0
+    n_sequences: int = 1
 
-    current_graph = create_graph_from_seq(seq_rule)
 
-    if (current_number_non_terminal >= limit_non_terminal):
-        rule_names = rule_vocab.get_list_of_applicable_terminal_rules(current_graph)
+def get_explorer_rule_names(state: ExplorerState, limit_non_terminal: int,
+                            rule_vocab: RuleVocabulary) -> list[str]:
+    """Return the sorted names of the rules applicable to the state."""
+    if state.n_non_terminal >= limit_non_terminal:
+        rule_names = rule_vocab.get_list_of_applicable_terminal_rules(state.graph)
     else:
-        rule_names = rule_vocab.get_list_of_applicable_rules(current_graph)
+        rule_names = rule_vocab.get_list_of_applicable_rules(state.graph)
+    return sorted(rule_names)
+
+
+def expand_frontier(frontier: list[ExplorerState], limit_non_terminal: int,
+                    rule_vocab: RuleVocabulary) -> tuple[list[ExplorerState], list[ExplorerState]]:
+    """Apply each applicable rule to each state of the frontier.
+
+    The children are copies of the parent graph with one more rule, the graph is not rebuilt
+    from the rule sequence. The children with the same canonical key and the same number of the
+    non-terminal rules are merged, their numbers of the sequences are summed.
+
+    Args:
+        frontier (list[ExplorerState]): states with the same number of the rules
+        limit_non_terminal (int): maximum number of the non-terminal rules
+        rule_vocab (RuleVocabulary): rules of the grammar
+
+    Returns:
+        tuple[list[ExplorerState], list[ExplorerState]]: the next frontier and the states without
+            the applicable rules
+    """
+    children: dict[tuple, ExplorerState] = {}
+    terminals: list[ExplorerState] = []
+    for state in frontier:
+        rule_names = get_explorer_rule_names(state, limit_non_terminal, rule_vocab)
+        # If graph grow not available
+        if not rule_names:
+            terminals.append(state)
+            continue
+        for rule_name in rule_names:
+            rule = rule_vocab.get_rule(rule_name)
+            n_non_terminal = state.n_non_terminal + (not rule.is_terminal)
+            graph = state.graph.copy_structure()
+            graph.apply_rule(rule)
+            key = (graph.get_canonical_key(), n_non_terminal)
+            child = children.get(key)
+            if child is None:
+                children[key] = ExplorerState(graph, state.rules + (rule_name,), n_non_terminal,
+                                              state.n_sequences)
+            else:
+                child.n_sequences += state.n_sequences
+    return list(children.values()), terminals
+
+
+def _explore(frontier: list[ExplorerState],
+             limit_non_terminal: int,
+             rule_vocab: RuleVocabulary,
+             on_terminal: Callable[[ExplorerState], None]) -> int:
+    """Expand the frontier level by level and pass the unique terminal graphs to on_terminal.
+
+    Args:
+        frontier (list[ExplorerState]): the starting states
+        limit_non_terminal (int): maximum number of the non-terminal rules
+        rule_vocab (RuleVocabulary): rules of the grammar
+        on_terminal (Callable[[ExplorerState], None]): called once for each unique terminal graph
+
+    Returns:
+        int: number of the rule sequences of the terminal graphs
+    """
+    seen_keys: set[tuple] = set()
+    n_sequences = 0
+    while frontier:
+        frontier, terminals = expand_frontier(frontier, limit_non_terminal, rule_vocab)
+        for state in terminals:
+            n_sequences += state.n_sequences
+            key = state.graph.get_canonical_key()
+            if key not in seen_keys:
+                seen_keys.add(key)
+                on_terminal(state)
+    return n_sequences
+
+
+# Rules of the explorer in the worker process, they are set once by the pool initializer
+_worker_rules: Optional[tuple[int, RuleVocabulary]] = None
+
+
+def _init_worker(limit_non_terminal: int, rule_vocab: RuleVocabulary):
+    global _worker_rules
+    _worker_rules = (limit_non_terminal, rule_vocab)
+
+
+def _expand_states(frontier: list[ExplorerState]) -> tuple[list[ExplorerState], list[tuple]]:
+    """Expand the part of the frontier in the worker process.
+
+    The states are sent with their graphs and the graph caches, so the worker applies only the
+    next rule to each graph. The chunk is pickled at once, therefore the Node objects shared by
+    the graphs of the chunk are sent once.
+
+    Returns:
+        tuple[list[ExplorerState], list[tuple]]: the children and the records (canonical key,
+            rules, number of sequences) of the terminal graphs
+    """
+    limit_non_terminal, rule_vocab = _worker_rules
+    children, terminals = expand_frontier(frontier, limit_non_terminal, rule_vocab)
+    return children, [(state.graph.get_canonical_key(), state.rules, state.n_sequences)
+                      for state in terminals]
+
+
+def _explore_parallel(limit_non_terminal: int, rule_vocab: RuleVocabulary,
+                      on_record: Callable[[tuple, tuple[str, ...]], None],
+                      num_workers: int, chunks_per_worker: int) -> int:
+    """Expand the frontier level by level in the worker processes.
 
-    # If graph grow not available
-    if len(rule_names) == 0:
-        set_uniq_graphs.add(current_graph)
-        mutable_counter[0] += 1
-        if mutable_counter[0] % 1000 == 0:
-            print(mutable_counter[0])
-        return current_graph
+    Each level is split into the chunks for the workers, the main process merges the children of
+    all chunks like :py:func:`expand_frontier`, so the equal graphs of the different chunks are
+    expanded once. The records of the terminal graphs are passed to on_record, it gets the same
+    graph several times if the graph is reached at the different levels.
 
-    for rule_name in rule_names:
-        rule = rule_vocab.get_rule(rule_name)
-        seq_rule_one = deepcopy(seq_rule)
-        seq_rule_one.append(rule)
-        number_nt_rules = number_of_non_terminal_rules(seq_rule_one)
-        _ruleset_explorer(set_uniq_graphs, limit_non_terminal, rule_vocab, mutable_counter,
-                          number_nt_rules, seq_rule_one)
+    Returns:
+        int: number of the rule sequences of the terminal graphs
+    """
+    frontier = [ExplorerState(GraphGrammar())]
+    n_sequences = 0
+    n_chunks = num_workers * chunks_per_worker
+    with Pool(num_workers, _init_worker, (limit_non_terminal, rule_vocab)) as pool:
+        while frontier:
+            chunks = [frontier[idx::n_chunks] for idx in range(min(n_chunks, len(frontier)))]
+            children: dict[tuple, ExplorerState] = {}
+            for chunk_children, terminals in pool.map(_expand_states, chunks):
+                for key, rules, n_terminal_sequences in terminals:
+                    n_sequences += n_terminal_sequences
+                    on_record(key, rules)
+                for state in chunk_children:
+                    # the canonical key is cached in the graph by the worker
+                    key = (state.graph.get_canonical_key(), state.n_non_terminal)
+                    child = children.get(key)
+                    if child is None:
+                        children[key] = state
+                    else:
+                        child.n_sequences += state.n_sequences
+            frontier = list(children.values())
+    return n_sequences
+
+
+def _read_records(path) -> Iterator[tuple[tuple[int, int], tuple[str, ...]]]:
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            record = json.loads(line)
+            yield tuple(record["signature"]), tuple(record["rules"])
 
 
 def ruleset_explorer(limit_non_terminal: int,
-                     rule_vocab: RuleVocabulary) -> Tuple[set[GraphGrammar], int]:
-    """Recursive iterate over all posible graph in rule_vocab with limitation on non-terminal rules.
+                     rule_vocab: RuleVocabulary,
+                     num_workers: int = 1,
+                     chunks_per_worker: int = 4) -> Tuple[set[GraphGrammar], int]:
+    """Iterate over all posible graph in rule_vocab with limitation on non-terminal rules.
     Counts all non-uniq graphs
 
-    Parameters
-    ----------
-    limit_non_terminal : int
-        
-    rule_vocab : RuleVocabulary
+    The graphs are expanded level by level, the equal intermediate graphs are merged, see
+    :py:func:`expand_frontier`.
 
     Parameters
     ----------
     limit_non_terminal : int
         
     rule_vocab : RuleVocabulary
-        
+
+    num_workers : int
+        number of the processes, each level of the frontier is split into the chunks for them
+
+    chunks_per_worker : int
+        number of the chunks of the level for each process
 
     Returns
     -------
     Tuple[set[GraphGrammar], int]
         first is set of uniq graphs
-        last is counter of uniq graphs
+        last is counter of all rule sequences that lead to the graphs
     """
     set_uniq_graphs: set[GraphGrammar] = set()
-    current_number_non_terminal: int = 0
-    seq_rule: list[Rule] = []
-    mutable_counter = [0]
+    if num_workers > 1:
+        keys: set[tuple] = set()
+
+        def on_record(key, rules):
+            if key not in keys:
+                keys.add(key)
+                set_uniq_graphs.add(
+                    create_graph_from_seq([rule_vocab.get_rule(name) for name in rules]))
+
+        n_sequences = _explore_parallel(limit_non_terminal, rule_vocab, on_record, num_workers,
+                                        chunks_per_worker)
+    else:
+        n_sequences = _explore([ExplorerState(GraphGrammar())], limit_non_terminal,
+                                  rule_vocab, lambda state: set_uniq_graphs.add(state.graph))
+    return set_uniq_graphs, n_sequences
 
-    _ruleset_explorer(set_uniq_graphs, limit_non_terminal, rule_vocab, mutable_counter,
-                      current_number_non_terminal, seq_rule)
 
-    return set_uniq_graphs, mutable_counter[0]
+def ruleset_explorer_to_file(limit_non_terminal: int,
+                             rule_vocab: RuleVocabulary,
+                             path,
+                             num_workers: int = 1,
+                             chunks_per_worker: int = 4) -> Tuple[int, int]:
+    """Iterate over all posible graphs like :py:func:`ruleset_explorer` and write the unique
+    graphs to the file instead of the memory.
+
+    Each line of the file is the JSON record with the canonical signature of the graph and the
+    names of the rules that build it, see :py:func:`load_explored_graphs`. Only the canonical
+    keys of the written graphs are kept in the memory.
+
+    Args:
+        limit_non_terminal (int): maximum number of the non-terminal rules
+        rule_vocab (RuleVocabulary): rules of the grammar
+        path: path to the output file
+        num_workers (int, optional): number of the processes. Defaults to 1.
+        chunks_per_worker (int, optional): number of the chunks of the frontier level for each
+            process. Defaults to 4.
+
+    Returns:
+        Tuple[int, int]: number of the unique graphs and number of all rule sequences
+    """
+    path = Path(path)
+    keys: set[tuple] = set()
+    with open(path, "w", encoding="utf-8") as file:
+
+        def on_record(key, rules):
+            if key not in keys:
+                keys.add(key)
+                record = {"signature": key[0], "rules": rules}
+                file.write(json.dumps(record) + "\n")
+
+        if num_workers > 1:
+            n_sequences = _explore_parallel(limit_non_terminal, rule_vocab, on_record,
+                                            num_workers, chunks_per_worker)
+        else:
+            on_terminal = lambda state: on_record(state.graph.get_canonical_key(), state.rules)
+            n_sequences = _explore([ExplorerState(GraphGrammar())], limit_non_terminal,
+                                   rule_vocab, on_terminal)
+    return len(keys), n_sequences
+
+
+def load_explored_graphs(path, rule_vocab: RuleVocabulary) -> Iterator[GraphGrammar]:
+    """Build the graphs written by :py:func:`ruleset_explorer_to_file` one by one.
+
+    Args:
+        path: path to the file
+        rule_vocab (RuleVocabulary): rules of the grammar used by the explorer
+
+    Yields:
+        GraphGrammar: the graphs in the order of the file
+    """
+    for _, rules in _read_records(path):
+        yield create_graph_from_seq([rule_vocab.get_rule(name) for name in rules])
 
 
 def random_search_mechs_n_branch(rule_vocabul: RuleVocabulary,
@@ -195,7 +195,7 @@ def add_mut(
     Returns:
         GraphGrammar: Mutated graph
     """
-    res_graph = deepcopy(graph)
+    res_graph = graph.copy_structure()
     node = get_random_node(nodes_list, type_distribution)
     add_node_mutation(node, res_graph)
     return res_graph
@@ -216,7 +216,7 @@ def del_mut(
     Returns:
         GraphGrammar: Mutated graph
     """
-    res_graph = deepcopy(graph)
+    res_graph = graph.copy_structure()
     node = get_random_node(nodes_list, type_distribution)
     delete_node_mutation(node, res_graph)
     return res_graph
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+import hashlib
 from typing import Optional
 
 import networkx as nx
@@ -71,6 +72,17 @@ class UniqueBlueprint:
 
 ROOT = Node("ROOT")
 
+_label_hash_cache: dict[str, bytes] = {}
+
+
+def _label_hash(label: str) -> bytes:
+    """Stable hash of the label, it doesn't depend on the hash seed of the process."""
+    label_hash = _label_hash_cache.get(label)
+    if label_hash is None:
+        label_hash = hashlib.blake2b(str(label).encode(), digest_size=16).digest()
+        _label_hash_cache[label] = label_hash
+    return label_hash
+
 
 class GraphGrammar(nx.DiGraph):
     """ A class for using generative rules (similar to L grammar) and
@@ -78,17 +90,218 @@ class GraphGrammar(nx.DiGraph):
         The mechanism for assignment a unique Id, each added node using :py:meth:`GraphGrammar.rule_apply`
         will increase the counter.
         Supports methods from :py:class:`networkx.DiGraph` ancestor class
+
+        Each node caches the number of paths from it to the leaves and the blake2b hash of its
+        label and the sorted hashes of its children (Merkle-style), the hash of the root is the
+        signature of the graph. The cache is updated by :py:meth:`GraphGrammar.apply_rule` only
+        for the changed nodes and their ancestors and is dropped by the networkx mutation methods.
+        The graphs are equal if the signatures and the label paths from the root to the leaves
+        are equal, see :py:meth:`GraphGrammar.get_canonical_key`. The signature is the hash of
+        the tree, so the equality compares the structure: ROOT->A->{B, C} and
+        ROOT->{A->B, A->C} have the same label paths but they are not equal. The earlier
+        versions compared only the label paths.
+
+        For the rule application the graph keeps the index of node ids by labels and the depth
+        of each node, they are updated by :py:meth:`GraphGrammar.apply_rule` in the same way.
+        The direct change of the node attributes is not tracked, call
+        :py:meth:`GraphGrammar.invalidate_caches` after it.
     """
 
     def __init__(self, **attr):
+        # maps node id to (number of paths to leaves, sum of the hashes of the paths)
+        self._subtree_hash: Optional[dict[int, tuple[int, int]]] = None
+        # the key of get_canonical_key, it is dropped with the other caches
+        self._canonical_key: Optional[tuple] = None
+        # maps node id to (number of nodes, joined labels, indices of the children) of its first
+        # path to a leaf in the order of get_sorted_root_based_paths, it is updated with the
+        # subtree hashes
+        self._path_order: Optional[dict[int, tuple[int, str, tuple]]] = None
+        # maps label to the ids of the nodes in the order of the graph nodes
+        self._label_index: Optional[dict[str, dict[int, None]]] = None
+        # maps node id to the length of the shortest path from the root
+        self._depth: Optional[dict[int, int]] = None
+        self._root_id: Optional[int] = None
         super().__init__(**attr)
         self.__uniq_id_counter = -1
         self.add_node(self.get_uniq_id(), Node=ROOT)
 
+    def invalidate_caches(self):
+        """Drop the cached signature and indices, they will be recalculated at the next request."""
+        self._subtree_hash = None
+        self._canonical_key = None
+        self._path_order = None
+        self._label_index = None
+        self._depth = None
+        self._root_id = None
+
+    def _take_caches(self):
+        """Return the caches before a mutation to update them after it."""
+        path_order = getattr(self, "_path_order", None)
+        # the graphs pickled without the path order rebuild the subtree hashes with it
+        subtree_hash = None if path_order is None else getattr(self, "_subtree_hash", None)
+        return (subtree_hash, getattr(self, "_label_index", None), getattr(self, "_depth", None),
+                getattr(self, "_root_id", None), path_order)
+
+    def _build_index(self):
+        self._root_id = self.get_root_id()
+        self._label_index = {}
+        for node_id, raw_node in self.nodes.items():
+            self._label_index.setdefault(raw_node["Node"].label, {})[node_id] = None
+        self._depth = dict(nx.single_source_shortest_path_length(self, self._root_id))
+
+    def _update_depth(self, start_id: int):
+        """Recalculate the depth of the start node descendants, the depth of start node is set."""
+        queue = list(self.successors(start_id))
+        visited = set(queue)
+        while queue:
+            node_id = queue.pop(0)
+            self._depth[node_id] = min(self._depth[parent]
+                                       for parent in self.predecessors(node_id)
+                                       if parent in self._depth) + 1
+            for child in self.successors(node_id):
+                if child not in visited:
+                    visited.add(child)
+                    queue.append(child)
+
+    def add_node(self, node_for_adding, **attr):
+        self.invalidate_caches()
+        super().add_node(node_for_adding, **attr)
+
+    def add_nodes_from(self, nodes_for_adding, **attr):
+        self.invalidate_caches()
+        super().add_nodes_from(nodes_for_adding, **attr)
+
+    def remove_node(self, n):
+        self.invalidate_caches()
+        super().remove_node(n)
+
+    def remove_nodes_from(self, nodes):
+        self.invalidate_caches()
+        super().remove_nodes_from(nodes)
+
+    def add_edge(self, u_of_edge, v_of_edge, **attr):
+        self.invalidate_caches()
+        super().add_edge(u_of_edge, v_of_edge, **attr)
+
+    def add_edges_from(self, ebunch_to_add, **attr):
+        self.invalidate_caches()
+        super().add_edges_from(ebunch_to_add, **attr)
+
+    def remove_edge(self, u, v):
+        self.invalidate_caches()
+        super().remove_edge(u, v)
+
+    def remove_edges_from(self, ebunch):
+        self.invalidate_caches()
+        super().remove_edges_from(ebunch)
+
+    def clear(self):
+        self.invalidate_caches()
+        super().clear()
+
+    def clear_edges(self):
+        self.invalidate_caches()
+        super().clear_edges()
+
+    def _calculate_node_hash(self, node_id: int, affected: set[int]) -> tuple[int, int]:
+        """Recalculate the cached hash of the node and the affected nodes below it."""
+        n_paths = 0
+        children_hashes = []
+        first_path = None
+        for index, child in enumerate(self.successors(node_id)):
+            if child in affected:
+                child_paths, child_hash = self._calculate_node_hash(child, affected)
+            else:
+                child_paths, child_hash = self._subtree_hash[child]
+            n_paths += child_paths
+            children_hashes.append(child_hash)
+            n_nodes, labels, indices = self._path_order[child]
+            child_path = (n_nodes, labels, (index,) + indices)
+            if first_path is None or child_path < first_path:
+                first_path = child_path
+        label = self.get_node_by_id(node_id).label
+        # the paths through the node share the prefix, so the first path of the node goes
+        # through the first path of its children
+        self._path_order[node_id] = ((1, label, ()) if first_path is None else
+                                     (first_path[0] + 1, label + first_path[1], first_path[2]))
+        digest = hashlib.blake2b(_label_hash(label), digest_size=16)
+        # the order of the children is not defined, the sorted hashes make it canonical
+        for child_hash in sorted(children_hashes):
+            digest.update(child_hash.to_bytes(16, "little"))
+        node_hash = (max(n_paths, 1), int.from_bytes(digest.digest(), "little"))
+        self._subtree_hash[node_id] = node_hash
+        affected.discard(node_id)
+        return node_hash
+
+    def _update_subtree_hash(self, changed_nodes: set[int]):
+        """Recalculate the cached hashes of the changed nodes and all their ancestors."""
+        affected = set()
+        stack = list(changed_nodes)
+        while stack:
+            node_id = stack.pop()
+            if node_id in affected or not self.has_node(node_id):
+                continue
+            affected.add(node_id)
+            stack.extend(self.predecessors(node_id))
+        while affected:
+            self._calculate_node_hash(next(iter(affected)), affected)
+        # the signature of the graph is stored with the None key
+        if getattr(self, "_root_id", None) is None:
+            self._root_id = self.get_root_id()
+        self._subtree_hash[None] = self._subtree_hash[self._root_id]
+
+    def get_canonical_signature(self) -> tuple[int, int]:
+        """Return the signature of the graph, the hash of the tree of labels below the root.
+
+        The equal graphs have the same signature, the different graphs have the same signature
+        only on the collision of the hash. The signature is cached until the graph is changed.
+
+        Returns:
+            tuple[int, int]: number of paths to the leaves and the hash of the root
+        """
+        if self._take_caches()[0] is None:
+            self._subtree_hash = {}
+            self._path_order = {}
+            self._update_subtree_hash(set(self.nodes))
+        return self._subtree_hash[None]
+
     def get_uniq_id(self):
         self.__uniq_id_counter += 1
         return self.__uniq_id_counter
 
+    def copy_structure(self) -> "GraphGrammar":
+        """Return a copy of the graph that shares the Node objects with this graph.
+
+        The nodes are not copied in contrast to deepcopy, therefore the copy is cheap. The Node
+        objects must not be changed in place, the adjacency, the attributes dicts and caches
+        are independent.
+
+        Returns:
+            GraphGrammar: copy of the graph
+        """
+        graph = self.__class__.__new__(self.__class__)
+        nx.DiGraph.__init__(graph)
+        graph.graph.update(self.graph)
+        for node_id, raw_node in self._node.items():
+            graph._node[node_id] = raw_node.copy()
+            graph._succ[node_id] = {
+                child: data.copy() for child, data in self._succ[node_id].items()
+            }
+            graph._pred[node_id] = {
+                parent: data.copy() for parent, data in self._pred[node_id].items()
+            }
+        graph.__uniq_id_counter = self.__uniq_id_counter
+        subtree_hash, label_index, depth, root_id, path_order = self._take_caches()
+        graph._subtree_hash = None if subtree_hash is None else subtree_hash.copy()
+        graph._path_order = None if path_order is None else path_order.copy()
+        graph._canonical_key = getattr(self, "_canonical_key", None)
+        graph._label_index = None if label_index is None else {
+            label: ids.copy() for label, ids in label_index.items()
+        }
+        graph._depth = None if depth is None else depth.copy()
+        graph._root_id = root_id
+        return graph
+
     def find_nodes(self, match: Node) -> list[int]:
         """
 
@@ -99,14 +312,15 @@ class GraphGrammar(nx.DiGraph):
             list[int]: Id of matched nodes
         """
 
-        match_nodes = []
-        for raw_node in self.nodes.items():
-            # Extract node info
-            node: Node = raw_node[1]["Node"]
-            node_id = raw_node[0]
-            if node.label == match.label:
-                match_nodes.append(node_id)
-        return match_nodes
+        if self._take_caches()[1] is None:
+            self._build_index()
+        return list(self._label_index.get(match.label, ()))
+
+    def get_labels(self) -> set[str]:
+        """Return the labels of the nodes, they are taken from the cached index of the labels."""
+        if self._take_caches()[1] is None:
+            self._build_index()
+        return {label for label, ids in self._label_index.items() if ids}
 
     def _replace_node(self, node_id: int, rule: Rule):
         """Applies rules to node_id
@@ -119,6 +333,9 @@ class GraphGrammar(nx.DiGraph):
         # Convert to list for mutable
         in_edges = [list(edge) for edge in self.in_edges(node_id)]
         out_edges = [list(edge) for edge in self.out_edges(node_id)]
+        parents = {edge[0] for edge in in_edges}
+        replaced_label = self.get_node_by_id(node_id).label
+        subtree_hash, label_index, depth, root_id, path_order = self._take_caches()
 
         id_node_connect_child_graph = self.get_uniq_id()
 
@@ -141,16 +358,35 @@ class GraphGrammar(nx.DiGraph):
         for edge in out_edges:
             edge[0] = id_node_connect_child_graph
 
-        # Convert ids in rule to graph ids system
-        rule_graph_relabeled = nx.relabel_nodes(rule.graph_insert, relabel_in_rule)
-
-        # Push changes into graph
+        # Push changes into graph, ids in rule are converted to graph ids system
         self.remove_node(node_id)
-        self.add_nodes_from(rule_graph_relabeled.nodes.items())
-        self.add_edges_from(rule_graph_relabeled.edges)
+        self.add_nodes_from((relabel_in_rule[raw_node_id], raw_node)
+                            for raw_node_id, raw_node in rule.graph_insert.nodes.items())
+        self.add_edges_from((relabel_in_rule[edge[0]], relabel_in_rule[edge[1]])
+                            for edge in rule.graph_insert.edges)
         self.add_edges_from(in_edges)
         self.add_edges_from(out_edges)
 
+        # Update the caches only for the inserted nodes and their neighborhood
+        inserted_nodes = {relabel_in_rule[raw_node_id] for raw_node_id in rule.graph_insert.nodes}
+        if label_index is not None:
+            del label_index[replaced_label][node_id]
+            for inserted_id in inserted_nodes:
+                label = self.get_node_by_id(inserted_id).label
+                label_index.setdefault(label, {})[inserted_id] = None
+            self._label_index = label_index
+            self._root_id = id_node_connect_parent_graph if node_id == root_id else root_id
+            depth[id_node_connect_parent_graph] = depth.pop(node_id)
+            self._depth = depth
+            self._update_depth(id_node_connect_parent_graph)
+        if subtree_hash is not None:
+            del subtree_hash[node_id]
+            del path_order[node_id]
+            self._subtree_hash, self._path_order = subtree_hash, path_order
+            if self._root_id is None:
+                self._root_id = id_node_connect_parent_graph if node_id == root_id else root_id
+            self._update_subtree_hash(inserted_nodes | parents)
+
     def closest_node_to_root(self, list_ids: list[int]) -> int:
         """Find closest node to root from list_ids
 
@@ -161,23 +397,35 @@ class GraphGrammar(nx.DiGraph):
             int: id of closest Node
         """
 
-        root_id = self.get_root_id()
-
-        def sort_by_root_path(node_id):
-            paths = self.get_sorted_root_based_paths()
-            for path in paths:
-                if node_id in path:
-                    return paths.index(path)
-            return None
-
-        def sort_by_root_distance(node_id):
-            return len(nx.shortest_path(self, root_id, node_id))
-
-        # after two sorts the nodes are sorted by distance to root and nodes
-        # at the same distance are sorted by paths according to sorted root paths
-        sorta = sorted(list_ids, key=sort_by_root_path)
-        sorta = sorted(sorta, key=sort_by_root_distance)
-        return sorta[0]
+        if self._take_caches()[2] is None:
+            self._build_index()
+
+        # the nodes are sorted by distance to root and nodes at the same distance
+        # are sorted by paths according to sorted root paths
+        min_depth = min(self._depth[node_id] for node_id in list_ids)
+        closest_ids = [node_id for node_id in list_ids if self._depth[node_id] == min_depth]
+        if len(closest_ids) == 1:
+            return closest_ids[0]
+
+        if self._take_caches()[0] is None:
+            self.get_canonical_signature()
+        return min(closest_ids, key=self._get_path_order_key)
+
+    def _get_path_order_key(self, node_id: int) -> tuple[int, str, tuple]:
+        """Return the position of the first path through the node in the order of
+        get_sorted_root_based_paths: the number of the nodes and the joined labels of the path,
+        the equal paths are ordered by the indices of the children like get_root_based_paths."""
+        n_nodes, labels, indices = self._path_order[node_id]
+        prefix_labels = []
+        prefix_indices = []
+        parents = list(self.predecessors(node_id))
+        while parents:
+            prefix_indices.append(list(self.successors(parents[0])).index(node_id))
+            node_id = parents[0]
+            prefix_labels.append(self.get_node_by_id(node_id).label)
+            parents = list(self.predecessors(node_id))
+        return (n_nodes + len(prefix_labels), "".join(reversed(prefix_labels)) + labels,
+                tuple(reversed(prefix_indices)) + indices)
 
     def get_root_id(self) -> int:
         """
@@ -185,6 +433,8 @@ class GraphGrammar(nx.DiGraph):
         Returns:
             int: root id
         """
+        if getattr(self, "_root_id", None) is not None:
+            return self._root_id
 
         for raw_node in self.nodes.items():
             raw_node_id = raw_node[0]
@@ -194,14 +444,28 @@ class GraphGrammar(nx.DiGraph):
 
     def apply_rule(self, rule: Rule):
         ids = self.find_nodes(rule.replaced_node)
-        edge_list = list(self.edges)
         id_closest = self.closest_node_to_root(ids)
         if rule.graph_insert.order() == 0:
             # Stub removing leaf node if input rule is empty
-            out_edges_ids_node = list(filter(lambda x: x[0] == id_closest, edge_list))
-            if out_edges_ids_node:
+            if self.out_degree(id_closest) > 0:
                 raise Exception("Trying delete not leaf node")
+            parents = set(self.predecessors(id_closest))
+            removed_label = self.get_node_by_id(id_closest).label
+            subtree_hash, label_index, depth, root_id, path_order = self._take_caches()
             self.remove_node(id_closest)
+            if not parents:
+                # the root is removed
+                return
+            if label_index is not None:
+                del label_index[removed_label][id_closest]
+                del depth[id_closest]
+                self._label_index, self._depth, self._root_id = label_index, depth, root_id
+            if subtree_hash is not None:
+                del subtree_hash[id_closest]
+                del path_order[id_closest]
+                self._subtree_hash, self._path_order = subtree_hash, path_order
+                self._root_id = root_id
+                self._update_subtree_hash(parents)
         else:
             self._replace_node(id_closest, rule)
 
@@ -346,11 +610,27 @@ class GraphGrammar(nx.DiGraph):
 
     def __eq__(self, __rhs) -> bool:
         if isinstance(__rhs, GraphGrammar):
-            self_dfs_paths_lbl = self.get_uniq_representation()
-            rhs_dfs_paths_lbl = __rhs.get_uniq_representation()
-            return self_dfs_paths_lbl == rhs_dfs_paths_lbl
+            # the cached keys are compared, the signatures reject the most of the different graphs
+            return (self.get_canonical_signature() == __rhs.get_canonical_signature() and
+                    self.get_canonical_key() == __rhs.get_canonical_key())
         return False
 
+    def get_canonical_key(self) -> tuple:
+        """Return the exact key of the graph, the graphs are equal if their keys are equal.
+
+        The key is the signature and the sorted label paths from the root to the leaves, it is
+        hashable and picklable. The structure of the tree is compared by the signature, the
+        label paths only add the check of the labels in the case of the hash collision. The key
+        is cached until the graph is changed.
+
+        Returns:
+            tuple: key of the graph
+        """
+        if getattr(self, "_canonical_key", None) is None:
+            label_paths = tuple(sorted(tuple(path) for path in self.get_uniq_representation()))
+            self._canonical_key = (self.get_canonical_signature(), label_paths)
+        return self._canonical_key
+
     def get_sorted_root_based_paths(self):
         """Sort root based paths by length and same lengths lexicographically."""
         root_based_paths = self.get_root_based_paths()
@@ -383,5 +663,4 @@ class GraphGrammar(nx.DiGraph):
         return self_dfs_paths_lbl
 
     def __hash__(self) -> int:
-        self_dfs_paths_lbl = self.get_uniq_representation()
-        return hash(str(self_dfs_paths_lbl))
+        return hash(self.get_canonical_signature())
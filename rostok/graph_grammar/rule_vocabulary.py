@@ -1,3 +1,5 @@
+from typing import Optional
+
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
@@ -26,6 +28,11 @@ class RuleVocabulary:
             in the terminal rules. These are nodes that can appear in the final graph.
         terminal_dict (dict[str, list[str]]): the dictionary that contains the list of terminal
             states for all non-terminal nodes.
+
+    The rule ids are the indices of the rules in the sorted list of the rule names, the same
+    order is used for the actions of the design environments. The index of the rule ids by the
+    label of the replaced node is built at the first applicability query and dropped by
+    create_rule.
     """
 
     def __init__(self, node_vocab: NodeVocabulary = NodeVocabulary()):
@@ -43,6 +50,10 @@ class RuleVocabulary:
         self.rules_terminal_node_set: set[str] = set()
         self.terminal_dict: dict[str, list[str]] = {}
         self._completed = False
+        self._rule_names: Optional[list[str]] = None
+        self._label_rows: dict[str, int] = {}
+        self._label_rule_matrix: Optional[np.ndarray] = None
+        self._terminal_mask: Optional[np.ndarray] = None
 
     def create_rule(
         self,
@@ -132,6 +143,7 @@ class RuleVocabulary:
         new_rule.id_node_connect_parent = current_in_edges
         new_rule.id_node_connect_child = current_out_edges
         self.rule_dict[name] = new_rule
+        self._rule_names = None
         if new_rule.is_terminal:
             self.terminal_rule_dict[name] = new_rule
             self.rules_terminal_node_set.update(set(new_nodes))
@@ -198,6 +210,54 @@ class RuleVocabulary:
         """
         return self.rule_dict[name]
 
+    def _build_label_index(self):
+        self._rule_names = sorted(self.rule_dict)
+        labels = sorted({rule.replaced_node.label for rule in self.rule_dict.values()})
+        self._label_rows = {label: row for row, label in enumerate(labels)}
+        self._label_rule_matrix = np.zeros((len(labels), len(self._rule_names)), dtype=bool)
+        for rule_id, name in enumerate(self._rule_names):
+            rule = self.rule_dict[name]
+            self._label_rule_matrix[self._label_rows[rule.replaced_node.label], rule_id] = True
+        self._terminal_mask = np.array([self.rule_dict[name].is_terminal
+                                        for name in self._rule_names], dtype=bool)
+
+    def get_rule_names(self) -> list[str]:
+        """Return the sorted names of the rules, the position of the name is the rule id."""
+        if getattr(self, "_rule_names", None) is None:
+            self._build_label_index()
+        return self._rule_names
+
+    def get_label_index(self) -> dict[str, np.ndarray]:
+        """Return the ids of the rules that replace the node for each label of the rules."""
+        self.get_rule_names()
+        return {
+            label: np.flatnonzero(self._label_rule_matrix[row])
+            for label, row in self._label_rows.items()
+        }
+
+    def get_terminal_rules_mask(self) -> np.ndarray:
+        """Return the boolean mask of the terminal rules in the order of the rule ids."""
+        self.get_rule_names()
+        return self._terminal_mask
+
+    def get_applicable_rules_mask(self, grammar: GraphGrammar) -> np.ndarray:
+        """Return the boolean mask of the rules that replace a label present in the graph.
+
+        Args:
+            grammar (GraphGrammar): a :py:class:`rostok.graph_grammar.node.GraphGrammar` object analyze.
+
+        Returns:
+            np.ndarray: the mask in the order of the rule ids
+        """
+        self.get_rule_names()
+        rows = [
+            self._label_rows[label] for label in grammar.get_labels() if label in self._label_rows
+        ]
+        return self._label_rule_matrix[rows].any(axis=0)
+
+    def _mask_to_names(self, mask: np.ndarray) -> list[str]:
+        return [self._rule_names[rule_id] for rule_id in np.flatnonzero(mask)]
+
     def get_list_of_applicable_rules(self, grammar: GraphGrammar):
         """Return the total list of applicable rules for the current graph.
 
@@ -207,18 +267,7 @@ class RuleVocabulary:
         Returns:
             list of rule names for rules that can be applied for the graph.
         """
-
-        list_of_applicable_rules = []
-        for rule_tuple in self.rule_dict.items():
-            rule = rule_tuple[1]
-            rule_name = rule_tuple[0]
-            label_to_replace = rule.replaced_node.label
-            for node in grammar.nodes.items():
-                # find a node that can be replaced using the rule
-                if label_to_replace == node[1]["Node"].label:
-                    list_of_applicable_rules.append(rule_name)
-
-        return list(set(list_of_applicable_rules))
+        return self._mask_to_names(self.get_applicable_rules_mask(grammar))
 
     def get_list_of_applicable_nonterminal_rules(self, grammar: GraphGrammar):
         """
@@ -230,18 +279,8 @@ class RuleVocabulary:
         Returns:
             list of rule names for non-terminal rules that can be applied for the graph.
         """
-
-        list_of_applicable_rules = []
-        for rule_tuple in self.nonterminal_rule_dict.items():
-            rule = rule_tuple[1]
-            rule_name = rule_tuple[0]
-            label_to_replace = rule.replaced_node.label
-            for node in grammar.nodes.items():
-                # find a node that can be replaced using the rule
-                if label_to_replace == node[1]["Node"].label:
-                    list_of_applicable_rules.append(rule_name)
-
-        return list(set(list_of_applicable_rules))
+        mask = self.get_applicable_rules_mask(grammar)
+        return self._mask_to_names(mask & ~self._terminal_mask)
 
     def get_list_of_applicable_terminal_rules(self, grammar: GraphGrammar):
         """
@@ -253,18 +292,8 @@ class RuleVocabulary:
         Returns:
             list of rule names for terminal rules that can be applied for the graph.
         """
-
-        list_of_applicable_rules = []
-        for rule_tuple in self.terminal_rule_dict.items():
-            rule = rule_tuple[1]
-            rule_name = rule_tuple[0]
-            label_to_replace = rule.replaced_node.label
-            for node in grammar.nodes.items():
-                # find a node that can be replaced using the rule
-                if label_to_replace == node[1]["Node"].label:
-                    list_of_applicable_rules.append(rule_name)
-
-        return list(set(list_of_applicable_rules))
+        mask = self.get_applicable_rules_mask(grammar)
+        return self._mask_to_names(mask & self._terminal_mask)
 
     def terminal_rules_for_node(self, node_name: str):
         """
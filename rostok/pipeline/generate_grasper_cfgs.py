@@ -10,7 +10,8 @@ from rostok.criterion.simulation_flags import EventContactBuilder, EventContactT
 EventGraspBuilder, EventStopExternalForceBuilder
 from rostok.simulation_chrono.simulation_scenario import GraspScenario, ParametrizedSimulation
 import rostok.control_chrono.external_force as f_ext
-from rostok.trajectory_optimizer.control_optimizer import BasePrepareOptiVar, BruteForceOptimisation1D, ConstTorqueOptiVar, GlobalOptimisationEachSim
+from rostok.trajectory_optimizer.batch_optimizers import BatchOptimizer, CrossEntropyOptimizer
+from rostok.trajectory_optimizer.control_optimizer import BasePrepareOptiVar, BruteForceOptimisation1D, ConstTorqueOptiVar, GlobalOptimisationEachSim, ParallelGlobalOptimisation, SuccessiveHalvingOptimisation1D
 from scipy.optimize import direct
 
 
@@ -50,6 +51,14 @@ class BruteForceRewardCfg():
     chunksize = 'auto'
 
 
+@dataclass
+class SuccessiveHalvingRewardCfg(BruteForceRewardCfg):
+    min_length_fraction: float = 0.25
+    eta: int = 3
+    budget: float | None = None
+    seed: int = 0
+
+
 @dataclass
 class GlobalOptimisationRewardCfg():
     optimisation_tool: Any = direct
@@ -57,6 +66,17 @@ class GlobalOptimisationRewardCfg():
     bound: tuple[float, float] = (0, 1)
 
 
+@dataclass
+class ParallelGlobalOptimisationRewardCfg():
+    optimizer_class: Type[BatchOptimizer] = CrossEntropyOptimizer
+    args_for_optimiser: dict = field(default_factory=dict)
+    bound: tuple[float, float] = (0, 1)
+    seed: int = 0
+    num_cpu_workers = 1
+    timeout_parallel: float = 20
+    chunksize = 1
+
+
 @dataclass
 class MCTSCfg():
     C: int = 5
@@ -206,6 +226,27 @@ def create_global_optimisation(sim_list: list[GraspScenario], preapare_reward: B
     return rew
 
 
+def create_parallel_global_optimisation(sim_list: list[GraspScenario],
+                                        preapare_reward: BasePrepareOptiVar,
+                                        pglop_cfg: ParallelGlobalOptimisationRewardCfg):
+    """For create ParallelGlobalOptimisation
+
+    Args:
+        sim_list (list[GraspScenario]): _description_
+        preapare_reward (BasePrepareOptiVar): _description_
+        pglop_cfg (ParallelGlobalOptimisationRewardCfg): _description_
+
+    Returns:
+        ParallelGlobalOptimisation: _description_
+    """
+    rew = ParallelGlobalOptimisation(sim_list, preapare_reward, pglop_cfg.bound,
+                                     pglop_cfg.optimizer_class, pglop_cfg.args_for_optimiser,
+                                     pglop_cfg.seed, pglop_cfg.num_cpu_workers,
+                                     pglop_cfg.chunksize, pglop_cfg.timeout_parallel)
+
+    return rew
+
+
 def create_bruteforce_optimisation(sim_list: list[GraspScenario],
                                    preapare_reward: BasePrepareOptiVar,
                                    grasp_objective: GraspObjective, brute_cfg: BruteForceRewardCfg):
@@ -227,10 +268,34 @@ def create_bruteforce_optimisation(sim_list: list[GraspScenario],
     return rew
 
 
+def create_successive_halving_optimisation(sim_list: list[GraspScenario],
+                                           preapare_reward: BasePrepareOptiVar,
+                                           grasp_objective: GraspObjective,
+                                           halving_cfg: SuccessiveHalvingRewardCfg):
+    """For create SuccessiveHalvingOptimisation1D
+
+    Args:
+        sim_list (list[GraspScenario]): _description_
+        preapare_reward (BasePrepareOptiVar): _description_
+        grasp_objective (GraspObjective): _description_
+        halving_cfg (SuccessiveHalvingRewardCfg): _description_
+
+    Returns:
+        SuccessiveHalvingOptimisation1D: _description_
+    """
+    rew = SuccessiveHalvingOptimisation1D(halving_cfg.variants, sim_list, preapare_reward,
+                                          grasp_objective.weight_list, halving_cfg.num_cpu_workers,
+                                          halving_cfg.chunksize, halving_cfg.timeout_parallel,
+                                          halving_cfg.min_length_fraction, halving_cfg.eta,
+                                          halving_cfg.budget, halving_cfg.seed)
+
+    return rew
+
+
 def create_reward_calulator(sim_config: SimulationConfig, grasp_objective: GraspObjective,
                             prepare_reward: BasePrepareOptiVar,
                             optimisation_control_cgf: GlobalOptimisationRewardCfg |
-                            BruteForceRewardCfg):
+                            BruteForceRewardCfg | ParallelGlobalOptimisationRewardCfg):
 
     simlist = prepare_simulation_scenario_list(prepare_reward.control_class, sim_config,
                                                grasp_objective)
@@ -248,6 +313,12 @@ def create_reward_calulator(sim_config: SimulationConfig, grasp_objective: Grasp
 
     if isinstance(optimisation_control_cgf, GlobalOptimisationRewardCfg):
         return create_global_optimisation(simlist, prepare_reward, optimisation_control_cgf)
+    elif isinstance(optimisation_control_cgf, ParallelGlobalOptimisationRewardCfg):
+        return create_parallel_global_optimisation(simlist, prepare_reward,
+                                                   optimisation_control_cgf)
+    elif isinstance(optimisation_control_cgf, SuccessiveHalvingRewardCfg):
+        return create_successive_halving_optimisation(simlist, prepare_reward, grasp_objective,
+                                                      optimisation_control_cgf)
     elif isinstance(optimisation_control_cgf, BruteForceRewardCfg):
         return create_bruteforce_optimisation(simlist, prepare_reward, grasp_objective,
                                               optimisation_control_cgf)
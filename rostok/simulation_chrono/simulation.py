@@ -1,8 +1,9 @@
 import time
-from typing import Dict, List, Optional, Tuple
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pychrono as chrono
-import pychrono.irrlicht as chronoirr
 
 from rostok.block_builder_api.block_parameters import (DefaultFrame, FrameTransform)
 from rostok.block_builder_chrono.block_classes import ChronoEasyShapeObject
@@ -13,7 +14,8 @@ from rostok.criterion.simulation_flags import (EventCommands)
 from rostok.graph_grammar.node import GraphGrammar
 from rostok.simulation_chrono.simulation_utils import SimulationResult
 from rostok.virtual_experiment.robot_new import BuiltGraphChrono, RobotChrono
-from rostok.virtual_experiment.sensors import DataStorage, Sensor
+from rostok.virtual_experiment.sensors import (DataStorage, SamplingPolicy, Sensor,
+                                               SharedContactReporter)
 
 
 class ChronoSystems():
@@ -43,14 +45,26 @@ class ChronoSystems():
 
 
 class ChronoVisManager():
+    """Irrlicht visualization of the simulation.
+
+    The visual system is created at the first access to vis, so the manager of a simulation
+    without visualization doesn't load irrlicht.
+    """
 
     def __init__(self, fps=100, delay: bool = False, is_follow_camera = False):
-        self.vis = chronoirr.ChVisualSystemIrrlicht()
+        self._vis = None
         self.delay_flag = delay
         self.fps = fps
         self.step_counter = 0
         self.is_follow_camera = is_follow_camera
 
+    @property
+    def vis(self):
+        if self._vis is None:
+            import pychrono.irrlicht as chronoirr
+            self._vis = chronoirr.ChVisualSystemIrrlicht()
+        return self._vis
+
     def initialize_vis(self, chrono_system, observed_body: chrono.ChBody = None):
         self.vis.AttachSystem(chrono_system)
         self.vis.SetWindowSize(1024, 768)
@@ -119,12 +133,22 @@ class EnvCreator():
         self.active_objects_ordered: Dict[int, ChronoEasyShapeObject] = {}
         self.force_torque_container = ForceTorqueContainer()
         self.env_data_dict = {}
+        self.env_sampling_dict: Dict[str, SamplingPolicy] = {}
         # add all predefined objects to the system.
         for obj, read_data in object_list:
             self.add_object(obj=obj, read_data=read_data)
 
-    def add_env_data_type_dict(self, data_dict):
+    def add_env_data_type_dict(self,
+                               data_dict,
+                               sampling_dict: Optional[Dict[str, SamplingPolicy]] = None):
+        """Set the data recorded for the environment
+
+            Args:
+                data_dict: maps the data key to the sensor callback and the object map
+                sampling_dict (Optional[Dict[str, SamplingPolicy]]): sampling policies of the
+                    data keys, the keys without a policy are recorded every step"""
         self.env_data_dict = data_dict
+        self.env_sampling_dict = sampling_dict if sampling_dict else {}
 
     def add_object(self,
                    obj: ChronoEasyShapeObject,
@@ -158,7 +182,8 @@ class EnvCreator():
         env_sensor.contact_reporter.reset_contact_dict()
         self.data_storage: DataStorage = DataStorage(env_sensor)
         for key, value in self.env_data_dict.items():
-            self.data_storage.add_data_type(key, value[0], value[1], max_number_of_steps)
+            self.data_storage.add_data_type(key, value[0], value[1], max_number_of_steps,
+                                            self.env_sampling_dict.get(key))
 
     def load_into_system(self, system: chrono.ChSystem):
         for obj in self.objects:
@@ -199,6 +224,71 @@ class SingleRobotPreview():
         vis.GetDevice().closeDevice()
 
 
+def _copy_coordsys(coord: chrono.ChCoordsysD) -> chrono.ChCoordsysD:
+    return chrono.ChCoordsysD(chrono.ChVectorD(coord.pos), chrono.ChQuaternionD(coord.rot))
+
+
+def _get_link_state(link: chrono.ChLinkBase) -> Optional[tuple]:
+    """Return the internal state of the link. Only the speed motors have it: the angle and the
+    speed integrated from the speed function, they are equal to the relative rotation of the
+    joint while the constraint is satisfied. The other links are defined by their bodies."""
+    if not isinstance(link, chrono.ChLinkMotorRotationSpeed):
+        return None
+    return link.GetMotorRot(), link.GetMotorRot_dt()
+
+
+def _set_link_state(link: chrono.ChLinkBase, state: Optional[tuple], time: float):
+    if state is None:
+        return
+    angle, speed = state
+    x = chrono.ChState(1, None)
+    v = chrono.ChStateDelta(1, None)
+    x[0], v[0] = angle, speed
+    link.IntStateScatter(0, x, 0, v, time, False)
+
+
+@dataclass
+class SimulationSnapshot:
+    """State of the simulation after a step.
+
+        The bodies are restored by their coordinates and the first and second time derivatives,
+        the links by their internal states (the angle integrated by the speed motor) and the
+        controller by the copy of its state. The contact warm start is not saved.
+
+        Attributes:
+            step_n (int): the step after which the snapshot is taken
+            current_time (float): the time at the start of the step, used by the controllers
+            system_time (float): the time of the system after the step
+            body_states (list): coordinates and derivatives of the bodies of the system
+            link_states (list): internal states of the links of the system
+            controller_state: copy of the state of the robot controller
+            env_storage_state: data of the environment data storage
+            robot_storage_state: data of the robot data storage
+            env_sensor_state: contacts and gravity of the environment sensor
+            robot_sensor_state: contacts and gravity of the robot sensor
+            event_container (list): copy of the events
+            forces (list): copies of the external force calculators
+            force_values (list): current values of the external forces and torques
+            time_vector (list): times of the simulated steps
+            accumulators (list): copies of the accumulators of the criteria
+    """
+    step_n: int
+    current_time: float
+    system_time: float
+    body_states: list = field(default_factory=list)
+    link_states: list = field(default_factory=list)
+    controller_state: Any = None
+    env_storage_state: Any = None
+    robot_storage_state: Any = None
+    env_sensor_state: Any = None
+    robot_sensor_state: Any = None
+    event_container: list = field(default_factory=list)
+    forces: list = field(default_factory=list)
+    force_values: list = field(default_factory=list)
+    time_vector: list = field(default_factory=list)
+    accumulators: list = field(default_factory=list)
+
+
 class SingleRobotSimulation():
 
     def __init__(self, system: chrono.ChSystem, env_creator: EnvCreator,
@@ -208,16 +298,44 @@ class SingleRobotSimulation():
         self.vis_manager = vis_manager
         self.result = SimulationResult()
         self.robot_data_dict = {}
+        self.robot_sampling_dict: Dict[str, SamplingPolicy] = {}
+        self.contact_reporter: Optional[SharedContactReporter] = None
+        self.activation_time: Optional[float] = None
+        self.snapshot: Optional[SimulationSnapshot] = None
+        self.accumulators: list = []
+
+    def add_robot_data_type_dict(self,
+                                 data_dict,
+                                 sampling_dict: Optional[Dict[str, SamplingPolicy]] = None):
+        """Set the data recorded for the robot
 
-    def add_robot_data_type_dict(self, data_dict):
+            Args:
+                data_dict: maps the data key to the sensor callback and the object map
+                sampling_dict (Optional[Dict[str, SamplingPolicy]]): sampling policies of the
+                    data keys, the keys without a policy are recorded every step"""
         self.robot_data_dict = data_dict
+        self.robot_sampling_dict = sampling_dict if sampling_dict else {}
+
+    def add_accumulators(self, accumulators: list):
+        """Set the accumulators of the criteria that are updated at each step, the None items
+        are skipped. The accumulators are returned in the simulation result.
+
+            Args:
+                accumulators (list): accumulators from SimulationReward.create_accumulators"""
+        self.accumulators = accumulators
 
     def initialize(self, max_number_of_steps: int):
         self.env_creator.build_data_storage(max_number_of_steps)
         self.env_creator.load_into_system(self.chrono_system)
 
         for key, value in self.robot_data_dict.items():
-            self.robot.data_storage.add_data_type(key, value[0], value[1], max_number_of_steps)
+            self.robot.data_storage.add_data_type(key, value[0], value[1], max_number_of_steps,
+                                                  self.robot_sampling_dict.get(key))
+        # the contacts of the robot and environment are obtained by one scan of the contacts
+        self.contact_reporter = SharedContactReporter([
+            self.robot.sensor.contact_reporter,
+            self.env_creator.data_storage.sensor.contact_reporter
+        ])
 
     def add_design(self,
                    graph: GraphGrammar,
@@ -240,12 +358,18 @@ class SingleRobotSimulation():
                                  starting_positions, is_fixed)
 
     def update_data(self, step_n):
-        """Update the env_sensor and env_data.
+        """Update the sensors and data stores of the robot and environment.
+
+            The contacts of the current step must be already reported to the sensors.
+
             Args:
                 step_n (int): number of the current step"""
-        self.env_creator.data_storage.sensor.contact_reporter.reset_contact_dict()
-        self.env_creator.data_storage.sensor.update_current_contact_info(self.chrono_system)
+        self.env_creator.data_storage.sensor.reset_step_cache()
+        self.robot.sensor.reset_step_cache()
+        self.env_creator.data_storage.sensor.update_gravity(self.chrono_system)
+        self.robot.sensor.update_gravity(self.chrono_system)
         self.env_creator.data_storage.update_storage(step_n)
+        self.robot.data_storage.update_storage(step_n)
 
     def simulate_step(self, step_length: float, current_time: float, step_n: int):
         """Simulate one step and update sensors and data stores
@@ -257,14 +381,22 @@ class SingleRobotSimulation():
 
         self.chrono_system.Update()
         self.chrono_system.DoStepDynamics(step_length)
+        self.contact_reporter.report_all(self.chrono_system)
+        self.update_after_dynamics(current_time, step_n)
+
+    def update_after_dynamics(self, current_time: float, step_n: int):
+        """Update data stores and controllers after the dynamics step of the system.
+
+            Args:
+                current_time (float): current time of the simulation
+                step_n: number of the current step"""
         self.update_data(step_n)
+        for accumulator in self.accumulators:
+            if accumulator is not None:
+                accumulator.update(step_n, self.robot.sensor,
+                                   self.env_creator.data_storage.sensor)
 
         robot: RobotChrono = self.robot
-        ds = robot.data_storage
-        robot.sensor.contact_reporter.reset_contact_dict()
-        robot.sensor.update_current_contact_info(self.chrono_system)
-        robot.data_storage.update_storage(step_n)
-
         #controller gets current states of the robot and environment and updates control functions
         robot.controller.update_functions(current_time, robot.sensor,
                                           self.env_creator.data_storage.sensor)
@@ -272,6 +404,7 @@ class SingleRobotSimulation():
                                                            self.env_creator.data_storage.sensor)
 
     def activate(self, current_time):
+        self.activation_time = current_time
         if self.env_creator.force_torque_container.controller_list:
             self.env_creator.force_torque_container.controller_list[0].start_time = current_time
 
@@ -283,6 +416,13 @@ class SingleRobotSimulation():
             if not event.state:
                 event_command = event.event_check(current_time, step_n, self.robot.sensor,
                                                   self.env_creator.data_storage.sensor)
+                if event.state:
+                    self.env_creator.data_storage.update_storage_on_event(step_n)
+                    self.robot.data_storage.update_storage_on_event(step_n)
+                    for accumulator in self.accumulators:
+                        if accumulator is not None:
+                            accumulator.on_event(step_n, event, self.robot.sensor,
+                                                 self.env_creator.data_storage.sensor)
                 if event_command == EventCommands.STOP:
                     return True
                 elif event_command == EventCommands.ACTIVATE:
@@ -297,6 +437,7 @@ class SingleRobotSimulation():
         fps: int = 100,
         event_container=None,
         visualize=False,
+        snapshot_on_activate=False,
     ):
         """Execute a simulation.
 
@@ -305,33 +446,287 @@ class SingleRobotSimulation():
                 step_length (float): the time length of a step
                 frame_update (int): rate of visualization update
                 flag_container: container of flags that controls simulation
-                visualize (bool): determine if run the visualization """
+                visualize (bool): determine if run the visualization
+                snapshot_on_activate (bool): stop the simulation at the step of the ACTIVATE
+                    command and save the state to the snapshot attribute, the rest of the
+                    simulation is run by simulate_fork"""
         self.initialize(number_of_steps)
         # Select observed body for camera
         observed_body  = self.chrono_system.Get_bodylist()[0]
         if visualize:
             self.vis_manager.initialize_vis(self.chrono_system, observed_body)
 
-        self.vis_manager.fps = fps
-        stop_flag = False
+        if self.vis_manager:
+            self.vis_manager.fps = fps
         self.result.time_vector = [0]
-        for i in range(number_of_steps):
+        last_step = self.run_steps(0, number_of_steps, step_length, event_container, visualize,
+                                   snapshot_on_activate)
+
+        if visualize:
+            self.vis_manager.vis.GetDevice().closeDevice()
+        self.n_steps = number_of_steps
+        return self.finalize_result(event_container, last_step, self.chrono_system.GetChTime())
+
+    def run_steps(self,
+                  first_step: int,
+                  number_of_steps: int,
+                  step_length: float,
+                  event_container=None,
+                  visualize=False,
+                  snapshot_on_activate=False) -> int:
+        """Simulate the steps from first_step until the STOP command or the last step.
+
+            Args:
+                first_step (int): number of the first simulated step
+                number_of_steps (int): total number of steps in the simulation
+                step_length (float): the time length of a step
+                event_container: container of events of the simulation
+                visualize (bool): determine if run the visualization
+                snapshot_on_activate (bool): take the snapshot and stop at the ACTIVATE command
+
+            Returns:
+                int: the last simulated step
+        """
+        last_step = first_step - 1
+        for i in range(first_step, number_of_steps):
             current_time = self.chrono_system.GetChTime()
             self.simulate_step(step_length, current_time, i)
             self.result.time_vector.append(self.chrono_system.GetChTime())
+            last_step = i
             if visualize:
                 self.vis_manager.visualization_step(step_length)
 
             stop_flag = self.handle_single_events(event_container, current_time, i)
             if stop_flag:
                 break
+            if snapshot_on_activate and self.activation_time is not None:
+                self.snapshot = self.take_snapshot(event_container, current_time, i)
+                break
 
-        if visualize:
-            self.vis_manager.vis.GetDevice().closeDevice()
+        return last_step
+
+    def take_snapshot(self, event_container, current_time: float,
+                      step_n: int) -> SimulationSnapshot:
+        """Save the state of the simulation after the step.
+
+            Args:
+                event_container: container of events of the simulation
+                current_time (float): the time at the start of the step
+                step_n (int): number of the step
+
+            Returns:
+                SimulationSnapshot: the state of the simulation
+        """
+        body_states = []
+        for body in self.chrono_system.Get_bodylist():
+            body_states.append((_copy_coordsys(body.GetCoord()),
+                                _copy_coordsys(body.GetCoord_dt()),
+                                _copy_coordsys(body.GetCoord_dtdt())))
+        force_list = self.env_creator.force_torque_container.controller_list
+        return SimulationSnapshot(
+            step_n=step_n,
+            current_time=current_time,
+            system_time=self.chrono_system.GetChTime(),
+            body_states=body_states,
+            link_states=[_get_link_state(link) for link in self.chrono_system.Get_linklist()],
+            controller_state=self.robot.controller.get_state(),
+            env_storage_state=self.env_creator.data_storage.get_state(),
+            robot_storage_state=self.robot.data_storage.get_state(),
+            env_sensor_state=self.env_creator.data_storage.sensor.get_state(),
+            robot_sensor_state=self.robot.sensor.get_state(),
+            event_container=deepcopy(event_container),
+            forces=[deepcopy(wrapper.force) for wrapper in force_list],
+            force_values=[[functor.Get_yconst() for functor in
+                           wrapper.force_vector_chrono + wrapper.torque_vector_chrono]
+                          for wrapper in force_list],
+            time_vector=list(self.result.time_vector),
+            accumulators=deepcopy(self.accumulators))
+
+    def restore_snapshot(self,
+                         snapshot: SimulationSnapshot,
+                         external_force: Optional[ABCForceCalculator] = None):
+        """Return the simulation to the state of the snapshot. The data stores and the result
+        are replaced by the new objects, so the results of the previous runs are kept.
+
+            Args:
+                snapshot (SimulationSnapshot): the saved state
+                external_force (Optional[ABCForceCalculator]): the force that replaces the first
+                    external force of the environment, e.g. the force of the grasp test
+
+            Returns:
+                list: the restored events
+        """
+        for body, (coord, coord_dt, coord_dtdt) in zip(self.chrono_system.Get_bodylist(),
+                                                       snapshot.body_states):
+            body.SetCoord(_copy_coordsys(coord))
+            body.SetCoord_dt(_copy_coordsys(coord_dt))
+            body.SetCoord_dtdt(_copy_coordsys(coord_dtdt))
+        for link, link_state in zip(self.chrono_system.Get_linklist(), snapshot.link_states):
+            _set_link_state(link, link_state, snapshot.system_time)
+        self.chrono_system.SetChTime(snapshot.system_time)
+        self.robot.controller.set_state(snapshot.controller_state)
+
+        env_storage = self.env_creator.data_storage
+        self.env_creator.data_storage = env_storage.fork(snapshot.env_storage_state)
+        self.robot.data_storage = self.robot.data_storage.fork(snapshot.robot_storage_state)
+        self.env_creator.data_storage.sensor.set_state(snapshot.env_sensor_state)
+        self.robot.sensor.set_state(snapshot.robot_sensor_state)
+
+        event_container = deepcopy(snapshot.event_container)
+        force_list = self.env_creator.force_torque_container.controller_list
+        if external_force is not None and not force_list:
+            raise Exception("The environment has no external force to replace")
+        for i, (wrapper, force, values) in enumerate(
+                zip(force_list, snapshot.forces, snapshot.force_values)):
+            wrapper.force = deepcopy(external_force if i == 0 and external_force else force)
+            wrapper.events = event_container
+            for functor, value in zip(wrapper.force_vector_chrono + wrapper.torque_vector_chrono,
+                                      values):
+                functor.Set_yconst(value)
+
+        self.chrono_system.Update()
+        self.robot.controller.update_functions(snapshot.current_time, self.robot.sensor,
+                                               self.env_creator.data_storage.sensor)
+        self.accumulators = deepcopy(snapshot.accumulators)
+        self.result = SimulationResult()
+        self.result.time_vector = list(snapshot.time_vector)
+        return event_container
+
+    def simulate_fork(self,
+                      snapshot: SimulationSnapshot,
+                      number_of_steps: int,
+                      step_length: float,
+                      external_force: Optional[ABCForceCalculator] = None,
+                      setup: Optional[Callable[["SingleRobotSimulation"], None]] = None):
+        """Continue the simulation from the snapshot till the end. The method can be called
+        several times with the same snapshot to evaluate the variants of the rest of simulation.
+
+            Args:
+                snapshot (SimulationSnapshot): the state to start from
+                number_of_steps (int): total number of steps in the simulation
+                step_length (float): the time length of a step
+                external_force (Optional[ABCForceCalculator]): the force that replaces the first
+                    external force of the environment
+                setup (Optional[Callable]): function that changes the simulation after the
+                    restoring, e.g. sets the mass of the object
+
+            Returns:
+                SimulationResult: result of the whole simulation
+        """
+        event_container = self.restore_snapshot(snapshot, external_force)
+        if setup:
+            setup(self)
+        last_step = self.run_steps(snapshot.step_n + 1, number_of_steps, step_length,
+                                   event_container)
+        self.n_steps = number_of_steps
+        return self.finalize_result(event_container, last_step, self.chrono_system.GetChTime())
+
+    def finalize_result(self, event_container, step_n: int, final_time: float):
+        """Collect the data stores into the result and drop the steps after the last one. The
+        recorded data of the forces is saved.
+
+            Args:
+                event_container: container of the events of the simulation
+                step_n (int): the last simulated step
+                final_time (float): the time of the simulation at the end"""
+        self.env_creator.data_storage.update_storage_at_end(step_n)
+        self.robot.data_storage.update_storage_at_end(step_n)
+        self.env_creator.force_torque_container.flush_data_dump()
+        self.robot.controller.flush_data_dump()
+        for accumulator in self.accumulators:
+            if accumulator is not None:
+                accumulator.finalize(step_n, self.robot.sensor,
+                                     self.env_creator.data_storage.sensor)
+        self.result.accumulators = self.accumulators
         self.result.environment_final_ds = self.env_creator.data_storage
         self.result.robot_final_ds = self.robot.data_storage
-        self.result.time = self.chrono_system.GetChTime()
+        self.result.time = final_time
         self.result.event_container = event_container
-        self.n_steps = number_of_steps
-        self.result.reduce_ending(i)
+        self.result.reduce_ending(step_n)
         return self.result
+
+
+class MultiRobotSimulation():
+    """Simulate several independent robots with their environments in one chrono system.
+
+        The candidates are stepped together by one dynamics step and one scan of the contacts per
+        step. The candidates must be spatially separated to avoid interaction between them. A
+        candidate stops updating its data when one of its events returns the STOP command, the
+        simulation ends when all candidates are stopped.
+
+        Attributes:
+            chrono_system (chrono.ChSystem): the system shared by all candidates
+            simulations (List[SingleRobotSimulation]): simulations of the candidates
+            contact_reporter (SharedContactReporter): reporter for the sensors of all candidates
+    """
+
+    def __init__(self, system: chrono.ChSystem):
+        self.chrono_system = system
+        self.simulations: List[SingleRobotSimulation] = []
+        self.contact_reporter: Optional[SharedContactReporter] = None
+
+    def add_candidate(self, env_creator: EnvCreator) -> SingleRobotSimulation:
+        """Create the simulation of a new candidate in the shared system.
+
+            Args:
+                env_creator (EnvCreator): environment of the candidate
+
+            Returns:
+                SingleRobotSimulation: simulation to add the design and data types of the candidate
+        """
+        simulation = SingleRobotSimulation(self.chrono_system, env_creator, None)
+        self.simulations.append(simulation)
+        return simulation
+
+    def initialize(self, max_number_of_steps: int):
+        reporters = []
+        for simulation in self.simulations:
+            simulation.initialize(max_number_of_steps)
+            reporters.append(simulation.robot.sensor.contact_reporter)
+            reporters.append(simulation.env_creator.data_storage.sensor.contact_reporter)
+        self.contact_reporter = SharedContactReporter(reporters)
+
+    def simulate(self, number_of_steps: int, step_length: float,
+                 event_containers: List) -> List[SimulationResult]:
+        """Execute the simulation of all candidates.
+
+            Args:
+                number_of_steps(int): total number of steps in the simulation
+                step_length (float): the time length of a step
+                event_containers (List): containers of events for each candidate
+
+            Returns:
+                List[SimulationResult]: results in the order of the candidates
+        """
+        self.initialize(number_of_steps)
+        active = list(range(len(self.simulations)))
+        last_steps = [0] * len(self.simulations)
+        final_times = [0.] * len(self.simulations)
+        for simulation in self.simulations:
+            simulation.result.time_vector = [0]
+        for i in range(number_of_steps):
+            current_time = self.chrono_system.GetChTime()
+            self.chrono_system.Update()
+            self.chrono_system.DoStepDynamics(step_length)
+            self.contact_reporter.report_all(self.chrono_system)
+            still_active = []
+            for candidate in active:
+                simulation = self.simulations[candidate]
+                simulation.update_after_dynamics(current_time, i)
+                simulation.result.time_vector.append(self.chrono_system.GetChTime())
+                last_steps[candidate] = i
+                final_times[candidate] = self.chrono_system.GetChTime()
+                if not simulation.handle_single_events(event_containers[candidate], current_time,
+                                                       i):
+                    still_active.append(candidate)
+            active = still_active
+            if not active:
+                break
+
+        results = []
+        for candidate, simulation in enumerate(self.simulations):
+            simulation.n_steps = number_of_steps
+            results.append(
+                simulation.finalize_result(event_containers[candidate], last_steps[candidate],
+                                           final_times[candidate]))
+        return results
@@ -1,29 +1,59 @@
 from copy import deepcopy
 import json
-from typing import List, Optional
+import multiprocessing
+from typing import Callable, Dict, List, Optional
 
+import numpy as np
 import pychrono as chrono
 
 from rostok.control_chrono.controller import (ConstController, SinControllerChrono)
 from rostok.control_chrono.external_force import ForceChronoWrapper, ABCForceCalculator
 from rostok.criterion.simulation_flags import EventBuilder
 from rostok.graph_grammar.node import GraphGrammar
-from rostok.simulation_chrono.simulation import (ChronoSystems, EnvCreator, SingleRobotSimulation,
-                                                 ChronoVisManager)
-from rostok.simulation_chrono.simulation_utils import \
-    set_covering_ellipsoid_based_position
+from rostok.trajectory_optimizer.prescreening import get_finger_reach, get_object_box
+from rostok.simulation_chrono.simulation import (ChronoSystems, EnvCreator, MultiRobotSimulation,
+                                                 SingleRobotSimulation, ChronoVisManager)
+from rostok.simulation_chrono.simulation_utils import (SimulationResult,
+                                                       set_covering_ellipsoid_based_position)
 from rostok.utils.json_encoder import RostokJSONEncoder
-from rostok.virtual_experiment.sensors import (SensorCalls, SensorObjectClassification)
+from rostok.virtual_experiment.sensors import (SamplingPolicy, SensorCalls,
+                                               SensorObjectClassification)
 from rostok.block_builder_chrono.block_builder_chrono_api import \
     ChronoBlockCreatorInterface as creator
+from rostok.block_builder_chrono.block_classes import visual_assets
 from rostok.control_chrono.tendon_controller import TendonController_2p
 from abc import abstractmethod
 
 class ParametrizedSimulation:
+    """Base class of the simulation scenarios.
+
+    Attributes:
+        step_length (float): the time length of a step
+        simulation_length (float): the time length of the simulation
+        headless (Optional[bool]): run the simulations without visualization without the visual
+            system and the visual assets of the bodies. None makes headless the simulations in
+            the worker processes
+    """
 
     def __init__(self, step_length, simulation_length):
         self.step_length = step_length
         self.simulation_length = simulation_length
+        self.headless: Optional[bool] = None
+
+    def is_headless(self, vis: bool = False) -> bool:
+        """Return True if the simulation is run without the visual system and the visual assets.
+        The visualized simulations are never headless."""
+        if vis:
+            return False
+        if self.headless is None:
+            return multiprocessing.parent_process() is not None
+        return self.headless
+
+    def create_vis_manager(self, vis: bool = False, **kwargs) -> Optional[ChronoVisManager]:
+        """Return the visualization manager, the headless simulations don't have it."""
+        if self.is_headless(vis):
+            return None
+        return ChronoVisManager(**kwargs)
 
     def run_simulation(self,
                        graph: GraphGrammar,
@@ -59,39 +89,63 @@ class GraspScenario(ParametrizedSimulation):
         self.controller_cls = controller_cls
         self.smc = smc
         self.obj_external_forces = obj_external_forces
+        self.env_sampling_dict: Dict[str, SamplingPolicy] = {}
+        self.robot_sampling_dict: Dict[str, SamplingPolicy] = {}
+        self.record_data = True
+        # the bottom center of the covering ellipsoid of the object relative to the design base
+        self.object_reference_point = (0, 0.1, 0)
 
     def add_event_builder(self, event_builder):
         self.event_builder_container.append(event_builder)
 
+    def set_data_sampling(self,
+                          env_sampling_dict: Optional[Dict[str, SamplingPolicy]] = None,
+                          robot_sampling_dict: Optional[Dict[str, SamplingPolicy]] = None):
+        """Set the sampling policies for the data keys of the environment and robot.
+
+            The keys without a policy are recorded every step.
+
+            Args:
+                env_sampling_dict (Optional[Dict[str, SamplingPolicy]]): policies of env data
+                robot_sampling_dict (Optional[Dict[str, SamplingPolicy]]): policies of robot data
+        """
+        self.env_sampling_dict = env_sampling_dict if env_sampling_dict else {}
+        self.robot_sampling_dict = robot_sampling_dict if robot_sampling_dict else {}
+
     def build_events(self):
         event_list=[]
         for event_builder in self.event_builder_container:
             event_builder.build_event(event_list)
         return event_list
 
-    def run_simulation(self,
-                       graph: GraphGrammar,
-                       controller_data,
-                       starting_positions=None,
-                       vis=False,
-                       delay=False):
-        # events should be reset before every simulation
-        event_list = self.build_events()
-        # build simulation from the subclasses
-
+    def build_system(self):
         if self.smc:
-            system = ChronoSystems.chrono_SMC_system(gravity_list=[0, 0, 0])
-        else:
-            system = ChronoSystems.chrono_NSC_system(gravity_list=[0, -10, 0])
-        # setup the auxiliary
-        env_creator = EnvCreator([])
-        vis_manager = ChronoVisManager(delay)
-        simulation = SingleRobotSimulation(system, env_creator, vis_manager)
-
+            return ChronoSystems.chrono_SMC_system(gravity_list=[0, 0, 0])
+        return ChronoSystems.chrono_NSC_system(gravity_list=[0, -10, 0])
+
+    def setup_simulation(self,
+                         simulation: SingleRobotSimulation,
+                         graph: GraphGrammar,
+                         controller_data,
+                         event_list,
+                         starting_positions=None,
+                         shift: float = 0):
+        """Add the grasp object, the design and the data types to the simulation. If record_data
+        is False, the data stores are empty and the rewards are calculated by the accumulators.
+
+            Args:
+                simulation (SingleRobotSimulation): simulation with an empty environment
+                graph (GraphGrammar): graph of the design
+                controller_data: parameters of the controller
+                event_list: events of the simulation
+                starting_positions: starting positions of the joints
+                shift (float): shift of the design and the object along the x axis
+        """
         grasp_object = creator.create_environment_body(self.grasp_object_callback)
         grasp_object.body.SetNameString("Grasp_object")
+        x, y, z = self.object_reference_point
         set_covering_ellipsoid_based_position(grasp_object,
-                                              reference_point=chrono.ChVectorD(0, 0.1, 0))
+                                              reference_point=chrono.ChVectorD(x + shift, y, z))
         if self.obj_external_forces:
             chrono_forces = ForceChronoWrapper(deepcopy(self.obj_external_forces), event_list)
         else:
@@ -103,13 +157,13 @@ class GraspScenario(ParametrizedSimulation):
         # add design and determine the outer force
 
         simulation.add_design(graph,
-                                controller_data,
-                                self.controller_cls,
-                                starting_positions=starting_positions)
-         
+                              controller_data,
+                              self.controller_cls,
+                              Frame=FrameTransform([shift, 0, 0], [1, 0, 0, 0]),
+                              starting_positions=starting_positions)
+
         # setup parameters for the data store
 
-        n_steps = int(self.simulation_length / self.step_length)
         env_data_dict = {
             "n_contacts": (SensorCalls.AMOUNT_FORCE, SensorObjectClassification.BODY),
             "forces": (SensorCalls.FORCE, SensorObjectClassification.BODY),
@@ -117,7 +171,6 @@ class GraspScenario(ParametrizedSimulation):
                     SensorCalls.BODY_TRAJECTORY),
             "force_center": (SensorCalls.FORCE_CENTER, SensorObjectClassification.BODY)
         }
-        simulation.env_creator.add_env_data_type_dict(env_data_dict)
         robot_data_dict = {
             "body_velocity": (SensorCalls.BODY_VELOCITY, SensorObjectClassification.BODY,
                               SensorCalls.BODY_VELOCITY),
@@ -125,13 +178,188 @@ class GraspScenario(ParametrizedSimulation):
                     SensorCalls.BODY_TRAJECTORY),
             "n_contacts": (SensorCalls.AMOUNT_FORCE, SensorObjectClassification.BODY)
         }
-        simulation.add_robot_data_type_dict(robot_data_dict)
-        return simulation.simulate(n_steps, self.step_length, 10000, event_list, vis)
-    
+        if not self.record_data:
+            env_data_dict = {}
+            robot_data_dict = {}
+        simulation.env_creator.add_env_data_type_dict(env_data_dict, self.env_sampling_dict)
+        simulation.add_robot_data_type_dict(robot_data_dict, self.robot_sampling_dict)
+
+    def run_simulation(self,
+                       graph: GraphGrammar,
+                       controller_data,
+                       starting_positions=None,
+                       vis=False,
+                       delay=False,
+                       accumulators: Optional[List] = None):
+        # events should be reset before every simulation
+        event_list = self.build_events()
+        with visual_assets(not self.is_headless(vis)):
+            # build simulation from the subclasses
+            system = self.build_system()
+            # setup the auxiliary
+            env_creator = EnvCreator([])
+            vis_manager = self.create_vis_manager(vis, delay=delay)
+            simulation = SingleRobotSimulation(system, env_creator, vis_manager)
+            self.setup_simulation(simulation, graph, controller_data, event_list,
+                                  starting_positions)
+            if accumulators:
+                simulation.add_accumulators(accumulators)
+
+            n_steps = int(self.simulation_length / self.step_length)
+            return simulation.simulate(n_steps, self.step_length, 10000, event_list, vis)
+
+    def run_simulation_forks(self,
+                             graph: GraphGrammar,
+                             controller_data,
+                             external_forces: List[Optional[ABCForceCalculator]],
+                             starting_positions=None,
+                             setups: Optional[List[Callable]] = None,
+                             accumulators: Optional[List] = None) -> List[SimulationResult]:
+        """Simulate the approach phase once and the phase after the ACTIVATE command for each
+        external force. The state of the simulation is saved at the ACTIVATE command and each
+        variant is continued from it.
+
+            Args:
+                graph (GraphGrammar): graph of the design
+                controller_data: parameters of the controller
+                external_forces (List[Optional[ABCForceCalculator]]): forces applied to the
+                    object after the activation, None keeps obj_external_forces
+                starting_positions: starting positions of the joints
+                setups (Optional[List[Callable]]): functions that change the simulation of each
+                    variant after the restoring, e.g. set the mass of the object
+                accumulators (Optional[List]): accumulators of the criteria, each variant gets
+                    their copies from the snapshot
+
+            Returns:
+                List[SimulationResult]: results in the order of the forces. If the ACTIVATE
+                    command doesn't occur, the copies of the result of the single simulation are
+                    returned.
+        """
+        if external_forces and not self.obj_external_forces:
+            raise Exception("The scenario should have obj_external_forces to replace them")
+        setups = setups if setups else [None] * len(external_forces)
+        if len(setups) != len(external_forces):
+            raise Exception("The setups and external_forces should be same size")
+
+        event_list = self.build_events()
+        with visual_assets(not self.is_headless()):
+            simulation = SingleRobotSimulation(self.build_system(), EnvCreator([]), None)
+            self.setup_simulation(simulation, graph, controller_data, event_list,
+                                  starting_positions)
+            if accumulators:
+                simulation.add_accumulators(accumulators)
+            n_steps = int(self.simulation_length / self.step_length)
+            approach_result = simulation.simulate(n_steps,
+                                                  self.step_length,
+                                                  event_container=event_list,
+                                                  snapshot_on_activate=True)
+            if simulation.snapshot is None:
+                return [approach_result.copy() for _ in external_forces]
+
+            return [
+                simulation.simulate_fork(simulation.snapshot, n_steps, self.step_length, force,
+                                         setup) for force, setup in zip(external_forces, setups)
+            ]
+
     def get_scenario_name(self):
         return str(self.grasp_object_callback)
 
 
+class BatchGraspScenario(GraspScenario):
+    """Grasp scenario that simulates several candidates in one chrono system.
+
+        The copies of the design and the grasp object are placed along the x axis with the
+        spacing between them. The copies share the collision families of the fingers, therefore
+        they are separated only by the distance: the spacing must exceed the diameter of the
+        sphere around the base that bounds the reach of the fingers and the bounding box of the
+        object, see get_min_spacing. The positions in the results are shifted back to the origin,
+        therefore the results match the results of the GraspScenario.
+
+        Attributes:
+            spacing (Optional[float]): the distance between the neighboring candidates, None
+                takes the minimal spacing of each design
+            batch_size (int): the maximum number of candidates in one system
+    """
+
+    def __init__(self,
+                 step_length,
+                 simulation_length,
+                 controller_cls=ConstController,
+                 smc=False,
+                 obj_external_forces: Optional[ABCForceCalculator] = None,
+                 spacing: Optional[float] = None,
+                 batch_size: int = 16) -> None:
+        super().__init__(step_length, simulation_length, controller_cls, smc, obj_external_forces)
+        self.spacing = spacing
+        self.batch_size = batch_size
+
+    def get_min_spacing(self, graph: GraphGrammar) -> float:
+        """Return the distance between the candidates that keeps the copies of the design and
+        the object apart.
+
+            Args:
+                graph (GraphGrammar): graph of the design
+
+            Returns:
+                float: the diameter of the sphere around the base with the fingers and the object
+        """
+        radius = get_finger_reach(graph)
+        if self.grasp_object_callback is not None:
+            center, half_sizes = get_object_box(self)
+            radius = max(radius, float(np.linalg.norm(np.abs(center) + half_sizes)))
+        return 2 * radius
+
+    def run_batch_simulation(self,
+                             graph: GraphGrammar,
+                             controller_data_list: List,
+                             starting_positions=None,
+                             accumulators_list: Optional[List[List]] = None
+                             ) -> List[SimulationResult]:
+        """Simulate the design with each of the controller parameters.
+
+            Args:
+                graph (GraphGrammar): graph of the design
+                controller_data_list (List): parameters of the controller for each candidate
+                starting_positions: starting positions of the joints, the same for all candidates
+                accumulators_list (Optional[List[List]]): accumulators of the criteria for each
+                    candidate, the positions in them are not shifted back
+
+            Returns:
+                List[SimulationResult]: results in the order of the controller parameters
+        """
+        min_spacing = self.get_min_spacing(graph)
+        spacing = min_spacing if self.spacing is None else self.spacing
+        if spacing < min_spacing and len(controller_data_list) > 1:
+            raise Exception(
+                f"The spacing {spacing} is less than the size of the design {min_spacing}")
+        results: List[SimulationResult] = []
+        n_steps = int(self.simulation_length / self.step_length)
+        for start in range(0, len(controller_data_list), self.batch_size):
+            batch = controller_data_list[start:start + self.batch_size]
+            simulation = MultiRobotSimulation(self.build_system())
+            event_lists = []
+            with visual_assets(not self.is_headless()):
+                for candidate, controller_data in enumerate(batch):
+                    event_list = self.build_events()
+                    event_lists.append(event_list)
+                    candidate_simulation = simulation.add_candidate(EnvCreator([]))
+                    self.setup_simulation(candidate_simulation, graph, controller_data,
+                                          event_list, starting_positions,
+                                          candidate * spacing)
+                    if accumulators_list:
+                        candidate_simulation.add_accumulators(accumulators_list[start +
+                                                                                candidate])
+
+            batch_results = simulation.simulate(n_steps, self.step_length, event_lists)
+            for candidate, result in enumerate(batch_results):
+                shift = [-candidate * spacing, 0, 0]
+                result.robot_final_ds.shift_positions(shift)
+                result.environment_final_ds.shift_positions(shift)
+            results.extend(batch_results)
+
+        return results
+
+
 from rostok.block_builder_api.block_blueprints import EnvironmentBodyBlueprint
 from rostok.block_builder_api.easy_body_shapes import Box
 from rostok.utils.dataset_materials.material_dataclass_manipulating import (
@@ -179,7 +407,7 @@ class WalkingScenario(ParametrizedSimulation):
             system = ChronoSystems.chrono_NSC_system(solver_iterations = 500, gravity_list=[0, -9, 0])
         # setup the auxiliary
         env_creator = EnvCreator([])
-        vis_manager = ChronoVisManager(delay, is_follow_camera=is_follow_camera)
+        vis_manager = self.create_vis_manager(vis, delay=delay, is_follow_camera=is_follow_camera)
         simulation = SingleRobotSimulation(system, env_creator, vis_manager)
 
         if self.smc:
@@ -189,7 +417,8 @@ class WalkingScenario(ParametrizedSimulation):
         if self.floor:
             simulation.env_creator.add_object(self.floor,read_data=True,is_fixed=True)
         else:
-            floor = creator.create_environment_body(EnvironmentBodyBlueprint(Box(5, 0.05, 5), material=def_mat, color=[215, 255, 0]))
+            with visual_assets(not self.is_headless(vis)):
+                floor = creator.create_environment_body(EnvironmentBodyBlueprint(Box(5, 0.05, 5), material=def_mat, color=[215, 255, 0]))
             simulation.env_creator.add_object(floor,
                                             read_data=True,
                                             is_fixed=True)
@@ -201,11 +430,12 @@ class WalkingScenario(ParametrizedSimulation):
         #                         self.controller_cls,
         #                         Frame=FrameTransform([0, 0.25, 0], [3**0.5/2, 0, 0, 1/2]),
         #                         starting_positions=starting_positions, is_fixed=False)
-        simulation.add_design(graph,
-                                controller_data,
-                                self.controller_cls,
-                                Frame=FrameTransform([0, 0.25, 0], [0,0,0,1]),
-                                starting_positions=starting_positions, is_fixed=False)
+        with visual_assets(not self.is_headless(vis)):
+            simulation.add_design(graph,
+                                    controller_data,
+                                    self.controller_cls,
+                                    Frame=FrameTransform([0, 0.25, 0], [0,0,0,1]),
+                                    starting_positions=starting_positions, is_fixed=False)
          
         # setup parameters for the data store
 
@@ -264,14 +494,15 @@ class SuspensionCarScenario(ParametrizedSimulation):
             system = ChronoSystems.chrono_NSC_system(solver_iterations=500, gravity_list=[0, -10, 0])
         # setup the auxiliary
         env_creator = EnvCreator([])
-        vis_manager = ChronoVisManager(delay)
+        vis_manager = self.create_vis_manager(vis, delay=delay)
         simulation = SingleRobotSimulation(system, env_creator, vis_manager)
 
         if self.smc:
             def_mat = DefaultChronoMaterialSMC()
         else:
             def_mat = DefaultChronoMaterialNSC()
-        floor = creator.create_environment_body(EnvironmentBodyBlueprint(Box(1, 0.1, 1), material=def_mat, color=[215, 255, 0]))
+        with visual_assets(not self.is_headless(vis)):
+            floor = creator.create_environment_body(EnvironmentBodyBlueprint(Box(1, 0.1, 1), material=def_mat, color=[215, 255, 0]))
         floor.body.SetNameString("Floor")
         floor.body.SetPos(chrono.ChVectorD(0,-0.05,0))
         #floor.body.GetVisualShape(0).SetTexture("/home/yefim-work/Packages/miniconda3/envs/rostok/share/chrono/data/textures/bluewhite.png", 10, 10)
@@ -282,11 +513,12 @@ class SuspensionCarScenario(ParametrizedSimulation):
                                           read_data=True,
                                           is_fixed=True)
 
-        simulation.add_design(graph,
-                                controller_data,
-                                self.controller_cls,
-                                Frame=FrameTransform([0, self.initial_vertical_pos, 0], [0,0,0,1]),
-                                starting_positions=starting_positions, is_fixed=self.is_fixed)
+        with visual_assets(not self.is_headless(vis)):
+            simulation.add_design(graph,
+                                    controller_data,
+                                    self.controller_cls,
+                                    Frame=FrameTransform([0, self.initial_vertical_pos, 0], [0,0,0,1]),
+                                    starting_positions=starting_positions, is_fixed=self.is_fixed)
          
         # setup parameters for the data store
 
@@ -1,10 +1,12 @@
+from copy import deepcopy
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Any, List, Optional
 
 import numpy as np
 import pychrono as chrono
 
-from rostok.block_builder_chrono.block_classes import ChronoEasyShapeObject
+from rostok.block_builder_chrono.block_classes import (ChronoEasyShapeObject,
+                                                      is_visual_assets_enabled)
 from rostok.virtual_experiment.sensors import DataStorage
 from rostok.criterion.simulation_flags import SimulationSingleEvent
 
@@ -15,9 +17,10 @@ def calculate_covering_sphere(obj: ChronoEasyShapeObject):
     obj.body.GetTotalAABB(bbmin=v_1, bbmax=v_2)
     local_center = (v_1 + v_2) * 0.5
     radius = ((v_2 - v_1).Length()) * 0.5
-    visual = chrono.ChSphereShape(radius)
-    visual.SetOpacity(0.3)
-    obj.body.AddVisualShape(visual, chrono.ChFrameD(local_center))
+    if is_visual_assets_enabled():
+        visual = chrono.ChSphereShape(radius)
+        visual.SetOpacity(0.3)
+        obj.body.AddVisualShape(visual, chrono.ChFrameD(local_center))
     if isinstance(obj.body, chrono.ChBodyAuxRef):
         cog_center = obj.body.GetFrame_REF_to_COG().TransformPointLocalToParent(local_center)
     else:
@@ -34,9 +37,10 @@ def calculate_covering_ellipsoid(obj: ChronoEasyShapeObject):
     axis_x = v_2.x - v_1.x
     axis_y = v_2.y - v_1.y
     axis_z = v_2.z - v_1.z
-    visual = chrono.ChEllipsoidShape(axis_x, axis_y, axis_z)
-    visual.SetOpacity(0.3)
-    obj.body.AddVisualShape(visual, chrono.ChFrameD(local_center))
+    if is_visual_assets_enabled():
+        visual = chrono.ChEllipsoidShape(axis_x, axis_y, axis_z)
+        visual.SetOpacity(0.3)
+        obj.body.AddVisualShape(visual, chrono.ChFrameD(local_center))
     if isinstance(obj.body, chrono.ChBodyAuxRef):
         cog_center = obj.body.GetFrame_REF_to_COG().TransformPointLocalToParent(local_center)
     else:
@@ -78,32 +82,35 @@ class SimulationResult:
             time_vector (List[float]): the vector of time steps
             n_steps (int): the maximum possible number of steps
             robot_final_ds (Optional[DataStorage]): final data store of the robot
-            environment_final_ds (Optional[DataStorage]): final data store of the environment"""
+            environment_final_ds (Optional[DataStorage]): final data store of the environment
+            event_container (List[SimulationSingleEvent]): events of the simulation
+            accumulators (List[Any]): accumulators of the criteria filled during the simulation"""
     time: float = 0
     time_vector: List[float] = field(default_factory=list)
     n_steps = 0
     robot_final_ds: Optional[DataStorage] = None
     environment_final_ds: Optional[DataStorage] = None
     event_container: List[SimulationSingleEvent] = field(default_factory=list)
+    accumulators: List[Any] = field(default_factory=list)
+
+    def copy(self) -> "SimulationResult":
+        """Return the independent copy of the result, the data stores share the sensors."""
+        result = SimulationResult(time=self.time,
+                                  time_vector=list(self.time_vector),
+                                  event_container=deepcopy(self.event_container),
+                                  accumulators=deepcopy(self.accumulators))
+        for name in ("robot_final_ds", "environment_final_ds"):
+            storage = getattr(self, name)
+            if storage is not None:
+                setattr(result, name, storage.fork(storage.get_state()))
+        return result
 
     def reduce_ending(self, step_n):
         if self.robot_final_ds:
-            storage = self.robot_final_ds.main_storage
-            for key in storage:
-                key_storage = storage[key]
-                for key_2 in key_storage:
-                    value = key_storage[key_2]
-                    new_value = value[:step_n + 2]
-                    key_storage[key_2] = new_value
+            self.robot_final_ds.reduce_ending(step_n)
 
         if self.environment_final_ds:
-            storage = self.environment_final_ds.main_storage
-            for key in storage:
-                key_storage = storage[key]
-                for key_2 in key_storage:
-                    value = key_storage[key_2]
-                    new_value = value[:step_n + 2:]
-                    key_storage[key_2] = new_value
+            self.environment_final_ds.reduce_ending(step_n)
 
     def reduce_nan(self):
         if self.robot_final_ds:
@@ -0,0 +1,158 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+import numpy as np
+
+
+class BatchOptimizer(ABC):
+    """Base class of the ask-tell optimizers that propose several vectors at once.
+
+    The optimizer maximizes the reward. The vectors of one batch are independent, so they can be
+    evaluated in parallel. All random numbers are taken from the generator of the optimizer, the
+    results are deterministic for the fixed seed and the fixed rewards.
+
+    Attributes:
+        bounds (np.ndarray): array of shape (dimension, 2) with the lower and the upper bounds
+        rng (np.random.Generator): random generator of the optimizer
+        n_iterations (int): number of the batches
+        batch_size (int): number of the vectors in the batch
+        x0 (Optional[np.ndarray]): the starting vector, it is evaluated in the first batch
+        best_x (np.ndarray): the best vector found
+        best_reward (float): reward of the best vector
+        n_evaluations (int): number of the told rewards
+    """
+
+    def __init__(self,
+                 bounds: list[tuple[float, float]],
+                 rng: np.random.Generator,
+                 n_iterations: int = 10,
+                 batch_size: int = 8):
+        self.bounds = np.array(bounds, dtype=float).reshape(-1, 2)
+        self.rng = rng
+        self.n_iterations = n_iterations
+        self.batch_size = batch_size
+        self.iteration = 0
+        self.x0: Optional[np.ndarray] = None
+        self.best_x = self.bounds.mean(axis=1)
+        self.best_reward = -np.inf
+        self.n_evaluations = 0
+
+    @property
+    def dimension(self) -> int:
+        return len(self.bounds)
+
+    @property
+    def budget(self) -> int:
+        """Maximum number of the evaluations."""
+        return self.n_iterations * self.batch_size
+
+    def is_done(self) -> bool:
+        return self.iteration >= self.n_iterations
+
+    def warm_start(self, x0, budget_fraction: float = 1.0):
+        """Start the search from the known good vector with the reduced number of iterations.
+
+        Args:
+            x0: the starting vector
+            budget_fraction (float, optional): fraction of the iterations. Defaults to 1.0.
+        """
+        self.x0 = np.clip(np.array(x0, dtype=float), self.bounds[:, 0], self.bounds[:, 1])
+        self.n_iterations = max(1, int(round(self.n_iterations * budget_fraction)))
+
+    @abstractmethod
+    def ask(self) -> np.ndarray:
+        """Return the batch of the vectors to evaluate.
+
+        Returns:
+            np.ndarray: array of shape (batch size, dimension)
+        """
+
+    def tell(self, points: np.ndarray, rewards: np.ndarray):
+        """Update the optimizer by the rewards of the asked vectors. The failed evaluations have
+        the reward -inf.
+
+        Args:
+            points (np.ndarray): the asked vectors
+            rewards (np.ndarray): rewards of the vectors
+        """
+        self.n_evaluations += len(rewards)
+        if len(rewards) > 0 and np.max(rewards) > self.best_reward:
+            best_idx = int(np.argmax(rewards))
+            self.best_reward = float(rewards[best_idx])
+            self.best_x = np.array(points[best_idx])
+
+    def sample_uniform(self, n_points: int) -> np.ndarray:
+        return self.rng.uniform(self.bounds[:, 0], self.bounds[:, 1],
+                                (n_points, self.dimension))
+
+
+class RandomSearchOptimizer(BatchOptimizer):
+    """Uniform sampling of the vectors in the bounds."""
+
+    def ask(self) -> np.ndarray:
+        points = self.sample_uniform(self.batch_size)
+        if self.iteration == 0 and self.x0 is not None:
+            points[0] = self.x0
+        self.iteration += 1
+        return points
+
+
+class CrossEntropyOptimizer(BatchOptimizer):
+    """Cross-entropy method with the diagonal gaussian distribution.
+
+    The first batch is sampled uniformly in the bounds, the next batches are sampled from the
+    gaussian fitted to the elite vectors of the previous batch and clipped by the bounds.
+
+    With the warm start the first batch is sampled from the gaussian around the starting vector
+    with the half of the initial std.
+
+    Attributes:
+        elite_fraction (float): fraction of the batch used to fit the distribution
+        smoothing (float): weight of the new distribution in the update of the mean and the std
+        min_std (float): lower limit of the std relative to the size of the bounds
+    """
+
+    def __init__(self,
+                 bounds: list[tuple[float, float]],
+                 rng: np.random.Generator,
+                 n_iterations: int = 10,
+                 batch_size: int = 8,
+                 elite_fraction: float = 0.25,
+                 smoothing: float = 0.7,
+                 min_std: float = 0.01):
+        super().__init__(bounds, rng, n_iterations, batch_size)
+        self.elite_fraction = elite_fraction
+        self.smoothing = smoothing
+        self.min_std = min_std
+        self.mean = self.bounds.mean(axis=1)
+        self.std = (self.bounds[:, 1] - self.bounds[:, 0]) / 2
+
+    def warm_start(self, x0, budget_fraction: float = 1.0):
+        super().warm_start(x0, budget_fraction)
+        self.mean = self.x0.copy()
+        self.std = self.std / 2
+
+    def ask(self) -> np.ndarray:
+        if self.n_evaluations == 0 and self.x0 is None:
+            points = self.sample_uniform(self.batch_size)
+        else:
+            points = self.rng.normal(self.mean, self.std, (self.batch_size, self.dimension))
+            points = np.clip(points, self.bounds[:, 0], self.bounds[:, 1])
+        if self.iteration == 0 and self.x0 is not None:
+            points[0] = self.x0
+        self.iteration += 1
+        return points
+
+    def tell(self, points: np.ndarray, rewards: np.ndarray):
+        super().tell(points, rewards)
+        finite = np.isfinite(rewards)
+        if not np.any(finite):
+            return
+        points = np.asarray(points)[finite]
+        rewards = np.asarray(rewards)[finite]
+        n_elite = max(1, int(round(self.elite_fraction * len(rewards))))
+        # stable sort keeps the order of the equal rewards independent of the platform
+        elite = points[np.argsort(-rewards, kind="stable")[:n_elite]]
+        self.mean = self.smoothing * elite.mean(axis=0) + (1 - self.smoothing) * self.mean
+        self.std = self.smoothing * elite.std(axis=0) + (1 - self.smoothing) * self.std
+        self.std = np.maximum(self.std, self.min_std * (self.bounds[:, 1] - self.bounds[:, 0]))
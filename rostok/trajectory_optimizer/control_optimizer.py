@@ -1,12 +1,13 @@
+import atexit
 from functools import partial
 import json
 from abc import abstractmethod
 from copy import deepcopy
 from itertools import product
 import multiprocessing
-from typing import Any, Type
+import signal
+from typing import Any, Callable, Optional, Type
 from collections.abc import Iterable
-from joblib import Parallel, delayed
 import numpy as np
 from scipy.optimize import direct
 from rostok.control_chrono.control_utils import build_control_graph_from_joint
@@ -17,26 +18,74 @@ from rostok.criterion.criterion_calculation import SimulationReward
 from rostok.graph_grammar.graph_comprehension import is_valid_graph
 from rostok.graph_grammar.node import GraphGrammar
 from rostok.graph_grammar.node_block_typing import (get_joint_vector_from_graph)
-from rostok.simulation_chrono.simulation_scenario import ParametrizedSimulation
+from rostok.simulation_chrono.simulation_scenario import (BatchGraspScenario,
+                                                          ParametrizedSimulation)
+from rostok.trajectory_optimizer.batch_optimizers import BatchOptimizer, CrossEntropyOptimizer
+from rostok.trajectory_optimizer.prescreening import GraspPrescreener
 from rostok.trajectory_optimizer.trajectory_generator import (joint_root_paths)
+from rostok.trajectory_optimizer.warm_start import WarmStartStore
 from rostok.utils.json_encoder import RostokJSONEncoder
+from rostok.utils.reward_cache import (RewardCache, cached_reward, cached_rewards,
+                                       get_fingerprint)
 from rostok.virtual_experiment.built_graph_chrono import build_equal_starting_positions
 
 
 class GraphRewardCalculator:
     """Base class for calculate reward from graph
+
+    The implementations of calculate_reward decorated by cached_reward use the reward_cache
+    if it is set.
     """
+    reward_cache: Optional[RewardCache] = None
+    warm_start: Optional[WarmStartStore] = None
 
     def __init__(self):
         pass
 
+    def set_reward_cache(self, reward_cache: Optional[RewardCache]):
+        """Set the persistent cache of the rewards, None disables the cache. The fingerprint of
+        the calculator for the cache is taken from its current configuration."""
+        self.reward_cache = reward_cache
+        self._reward_fingerprint = get_fingerprint(self)
+
+    def set_warm_start(self, warm_start: Optional[WarmStartStore]):
+        """Set the store of the best controls of the similar graphs, None disables the warm
+        start. The calculators that support the warm start search around the stored control."""
+        self.warm_start = warm_start
+
     @abstractmethod
     def calculate_reward(self, graph: GraphGrammar):
         pass
 
+    def calculate_rewards(self, graphs: list[GraphGrammar]) -> list:
+        """Calculate the rewards of the batch of graphs.
+
+        The equal graphs of the batch are calculated once, the unique graphs are passed to
+        calculate_unique_rewards.
+
+        Args:
+            graphs (list[GraphGrammar]): graphs of the batch
+
+        Returns:
+            list: results of calculate_reward in the order of the graphs
+        """
+        unique_idx: dict[GraphGrammar, int] = {}
+        graph_idx = [unique_idx.setdefault(graph, len(unique_idx)) for graph in graphs]
+        results = self.calculate_unique_rewards(list(unique_idx)) if unique_idx else []
+        return [results[idx] for idx in graph_idx]
+
+    def calculate_unique_rewards(self, graphs: list[GraphGrammar]) -> list:
+        """Calculate the rewards of the different graphs. The graphs are calculated one by one,
+        the child classes join the simulations of the graphs."""
+        return [self.calculate_reward(graph) for graph in graphs]
+
     def print_log(self):
         pass
 
+    def shutdown(self):
+        """Release the resources of the calculator, e.g. the worker processes."""
+        pass
+
     def __repr__(self) -> str:
         json_data = json.dumps(self, cls=RostokJSONEncoder)
         return json_data
@@ -61,6 +110,7 @@ class BasePrepareOptiVar():
         self.rewarder = rewarder
         self.is_vis = False
         self.params_start_pos = params_start_pos
+        self.prescreener: Optional[GraspPrescreener] = None
 
     @abstractmethod
     def x_to_control_params(self, graph: GraphGrammar, x: list):
@@ -123,12 +173,44 @@ class BasePrepareOptiVar():
         Returns:
             _type_: reward, vector, simulator
         """
+        if self.prescreener is not None and not self.prescreener.check(graph, sim):
+            return self.prescreener.penalty_reward, x, sim
         control_data = self.x_to_control_params(graph, x)
         start_pos = self.build_starting_positions(graph)  # pylint: disable=assignment-from-none
         is_vis = self.is_vis_decision(graph) and self.is_vis
-        simout = sim.run_simulation(graph, control_data, start_pos, is_vis)
+        if getattr(self.rewarder, "online", False):
+            simout = sim.run_simulation(graph,
+                                        control_data,
+                                        start_pos,
+                                        is_vis,
+                                        accumulators=self.rewarder.create_accumulators())
+        else:
+            simout = sim.run_simulation(graph, control_data, start_pos, is_vis)
         rew = self.rewarder.calculate_reward(simout) 
         return rew, x, sim
+
+    def reward_batch_sim_scenario(self, x_list: list, graph: GraphGrammar,
+                                  sim: BatchGraspScenario):
+        """Calculate rewards for several vectors by simulating them together in one system.
+
+        Args:
+            x_list (list): optimise vectors
+            graph (GraphGrammar): _description_
+            sim (BatchGraspScenario): scenario that simulates candidates in one system
+
+        Returns:
+            list: (reward, vector, simulator) for each vector in the input order
+        """
+        if self.prescreener is not None and not self.prescreener.check(graph, sim, len(x_list)):
+            return [(self.prescreener.penalty_reward, x, sim) for x in x_list]
+        control_data_list = [self.x_to_control_params(graph, x) for x in x_list]
+        start_pos = self.build_starting_positions(graph)  # pylint: disable=assignment-from-none
+        accumulators_list = None
+        if getattr(self.rewarder, "online", False):
+            accumulators_list = [self.rewarder.create_accumulators() for _ in x_list]
+        simouts = sim.run_batch_simulation(graph, control_data_list, start_pos, accumulators_list)
+        return [(self.rewarder.calculate_reward(simout), x, sim)
+                for x, simout in zip(x_list, simouts)]
     
     def set_reward_fun(self, rewarder: SimulationReward):
         """Set reward function.
@@ -138,6 +220,14 @@ class BasePrepareOptiVar():
         """
         self.rewarder = rewarder
 
+    def set_prescreener(self, prescreener: Optional[GraspPrescreener]):
+        """Set the geometric check that skips the simulations of the infeasible designs.
+
+        Args:
+            prescreener (Optional[GraspPrescreener]): the check, None disables it
+        """
+        self.prescreener = prescreener
+
 
 class TendonForceOptiVar(BasePrepareOptiVar):
 
@@ -150,8 +240,8 @@ class TendonForceOptiVar(BasePrepareOptiVar):
     def x_to_control_params(self, graph: GraphGrammar, x: list):
         np_array_x = np.array(x)
         parameters = np_array_x.round(3)
-        self.each_control_params.forces = list(parameters)
         data = deepcopy(self.each_control_params)
+        data.forces = list(parameters)
         return data
 
     def build_starting_positions(self, graph: GraphGrammar):
@@ -178,9 +268,194 @@ class TendonForceOptiVar(BasePrepareOptiVar):
         return multi_bound
 
 
-class BruteForceOptimisation1D(GraphRewardCalculator):
+# State of the worker process of BruteForceOptimisation1D, set once by the pool initializer
+_worker_prepare_reward: Optional[BasePrepareOptiVar] = None
+_worker_scenarios: list[ParametrizedSimulation] = []
+_worker_task_timeout: Optional[float] = None
+
+
+class _TaskTimeout(Exception):
+    pass
+
+
+def _raise_task_timeout(signum, frame):
+    raise _TaskTimeout()
+
+
+def _init_reward_worker(prepare_reward: BasePrepareOptiVar,
+                        scenarios: list[ParametrizedSimulation], task_timeout: Optional[float]):
+    global _worker_prepare_reward, _worker_scenarios, _worker_task_timeout
+    _worker_prepare_reward = prepare_reward
+    _worker_scenarios = scenarios
+    _worker_task_timeout = task_timeout
+    if task_timeout and hasattr(signal, "SIGALRM"):
+        signal.signal(signal.SIGALRM, _raise_task_timeout)
+
+
+def _reward_worker_task(task: tuple[np.ndarray, GraphGrammar, int]):
+    """Calculate the reward of one task (vector, graph, scenario index) in the worker.
+
+    Returns:
+        tuple: reward, vector and scenario index, the reward is None if the task is timed out
+    """
+    x, graph, scenario_idx = task
+    use_alarm = _worker_task_timeout and hasattr(signal, "SIGALRM")
+    if use_alarm:
+        signal.setitimer(signal.ITIMER_REAL, _worker_task_timeout)
+    try:
+        rew, _, _ = _worker_prepare_reward.reward_one_sim_scenario(
+            x, graph, _worker_scenarios[scenario_idx])
+    except _TaskTimeout:
+        rew = None
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+    return rew, x, scenario_idx
+
+
+class PoolRewardCalculator(GraphRewardCalculator):
+    """Base class of the calculators that simulate the scenarios in a pool of processes.
+
+    The pool lives between the calls of calculate_reward. The reward preparation and the
+    scenarios are sent to each worker once at the start of the pool, a task contains only the
+    vector, the graph and the index of the scenario. Call shutdown to stop the workers.
+
+    The child classes set simulation_scenario, prepare_reward, num_cpu_workers, chunksize and
+    timeout_parallel. The child classes with the other worker tasks override
+    get_pool_initializer.
+    """
+    simulation_scenario: list[ParametrizedSimulation]
+    prepare_reward: BasePrepareOptiVar
+    num_cpu_workers: int | str = 1
+    chunksize: int | str = 1
+    timeout_parallel: Optional[float] = None
+    _pool = None
+    _pool_size = 0
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_pool_size"] = 0
+        return state
+
+    def is_parallel(self) -> bool:
+        return self.num_cpu_workers == "auto" or self.num_cpu_workers > 1
+
+    def get_pool_scenarios(self) -> list[ParametrizedSimulation]:
+        """Return the scenarios of the workers, the tasks refer to them by the index."""
+        return list(self.simulation_scenario)
+
+    def get_pool_initializer(self) -> tuple[Callable, tuple]:
+        """Return the initializer of the workers and its arguments."""
+        return _init_reward_worker, (self.prepare_reward, self.get_pool_scenarios(),
+                                     self.timeout_parallel)
+
+    def get_pool(self):
+        """Return the worker pool, the pool is started at the first call."""
+        if self._pool is None:
+            self._pool_size = (multiprocessing.cpu_count()
+                               if self.num_cpu_workers == "auto" else self.num_cpu_workers)
+            initializer, initargs = self.get_pool_initializer()
+            self._pool = multiprocessing.Pool(self._pool_size,
+                                              initializer=initializer,
+                                              initargs=initargs)
+            atexit.register(self.shutdown)
+        return self._pool
+
+    def shutdown(self):
+        """Stop the worker pool. The next parallel call starts a new pool.
+
+        The pool must be restarted after the change of prepare_reward or the scenarios.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            atexit.unregister(self.shutdown)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    def map_tasks(self, tasks: list, chunksize=None, worker_task=None) -> Optional[list]:
+        """Calculate the rewards of the tasks (vector, graph, scenario index) in the pool.
+
+        Args:
+            tasks (list): tasks of the workers
+            chunksize: number of the tasks sent to a worker at once
+            worker_task: function of the workers for the child classes with the other tasks,
+                timeout_parallel limits one task. None calculates the rewards of the vectors
+
+        Returns:
+            Optional[list]: (reward, vector, scenario index) in the order of the tasks, the reward
+                is None if the task is timed out. None if the pool is hung.
+        """
+        pool = self.get_pool()
+        # the timeouts are handled by the workers, the limit is a guard for hung workers
+        n_rounds = -(-len(tasks) // self._pool_size)
+        guard_timeout = self.timeout_parallel * (n_rounds + 1) if self.timeout_parallel else None
+        try:
+            return pool.map_async(worker_task if worker_task else _reward_worker_task, tasks,
+                                  chunksize).get(guard_timeout)
+        except multiprocessing.context.TimeoutError:
+            print("Faild evaluate graph, TimeoutError")
+            self.shutdown()
+            return None
+
+    def evaluate_tasks(self, tasks: list) -> np.ndarray:
+        """Return the rewards of the tasks (vector, graph, scenario index) in the order of the
+        tasks, the failed simulations have the reward -inf."""
+        if not tasks:
+            return np.zeros(0)
+        if self.is_parallel():
+            chunksize = None if self.chunksize == "auto" else self.chunksize
+            worker_results = self.map_tasks(tasks, chunksize)
+            if worker_results is None:
+                return np.full(len(tasks), -np.inf)
+            rewards = [rew for rew, _, _ in worker_results]
+        else:
+            pool_scenarios = self.get_pool_scenarios()
+            rewards = [
+                self.prepare_reward.reward_one_sim_scenario(x, graph, pool_scenarios[idx])[0]
+                for x, graph, idx in tasks
+            ]
+        return np.array([-np.inf if rew is None else rew for rew in rewards], dtype=float)
+
+    def prescreen_scenarios(self, graph: GraphGrammar, n_simulations: list[int]) -> list[bool]:
+        """Return the feasibility of each scenario by the prescreener of prepare_reward.
+
+        The simulations of the pool are counted here, the feasible simulations in this process
+        are counted by reward_one_sim_scenario.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+            n_simulations (list[int]): planned number of the simulations of each scenario
+
+        Returns:
+            list[bool]: False for the scenarios that can be skipped
+        """
+        prescreener = self.prepare_reward.prescreener
+        if prescreener is None:
+            return [True] * len(self.simulation_scenario)
+        is_feasible = []
+        for sim, n_sim in zip(self.simulation_scenario, n_simulations):
+            is_feasible.append(prescreener.is_feasible(graph, sim))
+            if self.is_parallel() or not is_feasible[-1]:
+                prescreener.count(n_sim, is_feasible[-1])
+        return is_feasible
+
+
+class BruteForceOptimisation1D(PoolRewardCalculator):
     """
-    Find best reward by brute force all combinations of control
+    Find best reward by brute force all combinations of control.
+
+    With several workers the rewards are calculated in a pool of processes that lives between
+    the calls of calculate_reward, see PoolRewardCalculator.
+
+    With the warm_start store only the combinations around the control of the similar graph are
+    searched, the rest of the combinations are searched if the result is worse than expected.
     """
 
     def __init__(self,
@@ -199,7 +474,7 @@ class BruteForceOptimisation1D(GraphRewardCalculator):
             weights: None | list[float] Weight of rewards. Same orded with simulation_scenario.
             num_cpu_workers (int, optional): Number of parallel process. When set to "auto", the algorithm selects the number of workers by itself. Defaults to 1.
             chunksize (int, optional): Number of batch for one cpu worker. When set to "auto", the algorithm selects the number of workers by itself. Defaults to 1.
-            timeout_parallel (_type_, optional): _description_. Defaults to 60*5.
+            timeout_parallel (_type_, optional): Time limit for a single simulation in the pool, the timed out simulations are excluded from the results. Defaults to 60*5.
         """
         self.variants = variants
         self.simulation_scenario = simulation_scenario
@@ -209,6 +484,161 @@ class BruteForceOptimisation1D(GraphRewardCalculator):
         self.chunksize = chunksize
         self.timeout_parallel = timeout_parallel
         self.weight_dict = self.prepare_weight_dict()
+        self._pool = None
+        self._pool_size = 0
+
+    def map_inputs(self, input_dates: list) -> list:
+        """Calculate the rewards of the inputs in the worker pool.
+
+        Args:
+            input_dates (list): (vector, graph, scenario) for each simulation
+
+        Returns:
+            list: rewards in the order of the inputs, None for the timed out inputs
+        """
+        if not input_dates:
+            return []
+        scenario_idx = {id(sim): idx for idx, sim in enumerate(self.simulation_scenario)}
+        tasks = [(x, graph, scenario_idx[id(sim)]) for x, graph, sim in input_dates]
+        chunksize = None if self.chunksize == "auto" else self.chunksize
+        self.get_pool()
+        print(f"Use CPUs processor: {self._pool_size}, input dates: {len(input_dates)}")
+        worker_results = self.map_tasks(tasks, chunksize)
+        if worker_results is None:
+            return [None] * len(input_dates)
+
+        n_timeouts = sum(res[0] is None for res in worker_results)
+        if n_timeouts > 0:
+            print(f"Timed out simulations: {n_timeouts}")
+        return [rew for rew, _, _ in worker_results]
+
+    def calculate_parallel(self, input_dates: list):
+        """Calculate the rewards of the inputs in the worker pool.
+
+        Args:
+            input_dates (list): (vector, graph, scenario) for each simulation
+
+        Returns:
+            list: (reward, vector, scenario) of the simulations that are not timed out
+        """
+        rewards = self.map_inputs(input_dates)
+        return [(rew, x, sim) for rew, (x, _, sim) in zip(rewards, input_dates) if rew is not None]
+
+    def prescreen_inputs(self, graph: GraphGrammar, input_dates: list) -> tuple[list, list]:
+        """Split the inputs by the prescreener of prepare_reward before they are sent to the
+        workers, so the skipped simulations are counted in this process.
+
+        Args:
+            graph (GraphGrammar): graph of the inputs
+            input_dates (list): (vector, graph, scenario) for each simulation
+
+        Returns:
+            tuple[list, list]: inputs to simulate and (penalty, vector, scenario) of the skipped
+        """
+        prescreener = self.prepare_reward.prescreener
+        if prescreener is None:
+            return input_dates, []
+        is_feasible = {}
+        for sim in self.simulation_scenario:
+            n_simulations = sum(1 for input_data in input_dates if input_data[2] is sim)
+            is_feasible[id(sim)] = prescreener.check(graph, sim, n_simulations)
+        kept = [input_data for input_data in input_dates if is_feasible[id(input_data[2])]]
+        skipped = [(prescreener.penalty_reward, x, sim)
+                   for x, _, sim in input_dates
+                   if not is_feasible[id(sim)]]
+        return kept, skipped
+
+    def get_scenario_variants(self, graph: GraphGrammar, all_variants_control: list,
+                              is_screened_out: dict[str, bool]) -> dict[str, tuple]:
+        """Return the combinations to search for each scenario.
+
+        With the warm start the grid is pruned around the stored control of the similar graph,
+        otherwise all combinations are searched.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+            all_variants_control (list): all combinations of the variants
+            is_screened_out (dict[str, bool]): the scenarios rejected by the prescreener
+
+        Returns:
+            dict[str, tuple]: scenario name -> (stored reward or None, combinations)
+        """
+        scenario_variants = {}
+        for sim in self.simulation_scenario:
+            scen_name = sim.get_scenario_name()
+            stored = None
+            if self.warm_start is not None and not is_screened_out[scen_name]:
+                stored = self.warm_start.get(graph, scen_name, len(all_variants_control[0]))
+            if stored is None:
+                scenario_variants[scen_name] = (None, all_variants_control)
+            else:
+                scenario_variants[scen_name] = (stored[0],
+                                                self.warm_start.get_grid_neighbours(
+                                                    self.variants, stored[1]))
+        return scenario_variants
+
+    def run_inputs(self, graph: GraphGrammar, input_dates: list) -> list:
+        """Calculate the rewards of the inputs in the pool or in this process.
+
+        Args:
+            graph (GraphGrammar): graph of the inputs
+            input_dates (list): (vector, graph, scenario) for each simulation
+
+        Returns:
+            list: (reward, vector, scenario) of the calculated inputs
+        """
+        input_dates = list(input_dates)
+        np.random.shuffle(input_dates)
+        parallel_results = []
+        if not input_dates:
+            return parallel_results
+        if self.is_parallel():
+            input_dates, parallel_results = self.prescreen_inputs(graph, input_dates)
+            parallel_results.extend(self.calculate_parallel(input_dates))
+        else:
+            # the batch scenarios simulate all their vectors in one system
+            batch_inputs = {}
+            for i in input_dates:
+                if isinstance(i[2], BatchGraspScenario):
+                    batch_inputs.setdefault(id(i[2]), (i[2], []))[1].append(i[0])
+                else:
+                    res = self.prepare_reward.reward_one_sim_scenario(i[0], i[1], i[2])
+                    parallel_results.append(res)
+            for sim, x_list in batch_inputs.values():
+                parallel_results.extend(
+                    self.prepare_reward.reward_batch_sim_scenario(x_list, graph, sim))
+        return parallel_results
+
+    def run_batch_inputs(self, graph_inputs: list[tuple[GraphGrammar, list]]) -> list[list]:
+        """Calculate the rewards of the inputs of several graphs.
+
+        In the pool the inputs of all graphs are shuffled together, so the simulations of the
+        large and the small graphs are mixed in the chunks of the workers.
+
+        Args:
+            graph_inputs (list[tuple[GraphGrammar, list]]): graph and its inputs (vector, graph,
+                scenario)
+
+        Returns:
+            list[list]: (reward, vector, scenario) of the calculated inputs of each graph
+        """
+        if not self.is_parallel():
+            return [self.run_inputs(graph, input_dates) for graph, input_dates in graph_inputs]
+        graph_results = [[] for _ in graph_inputs]
+        owners = []
+        batch_inputs = []
+        for owner, (graph, input_dates) in enumerate(graph_inputs):
+            kept, skipped = self.prescreen_inputs(graph, list(input_dates))
+            graph_results[owner].extend(skipped)
+            owners.extend([owner] * len(kept))
+            batch_inputs.extend(kept)
+        order = np.random.permutation(len(batch_inputs))
+        rewards = self.map_inputs([batch_inputs[i] for i in order])
+        for i, rew in zip(order, rewards):
+            if rew is not None:
+                x, _, sim = batch_inputs[i]
+                graph_results[owners[i]].append((rew, x, sim))
+        return graph_results
 
     def generate_all_combine(self, graph: GraphGrammar):
         number_control_varibales = len(self.prepare_reward.bound_parameters(graph, (0, 1)))
@@ -230,6 +660,101 @@ class BruteForceOptimisation1D(GraphRewardCalculator):
         return final_dict
 
 
+    def get_search_inputs(self, graph: GraphGrammar) -> tuple[list, dict, dict, list]:
+        """Return the plan of the search of the control of the graph.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+
+        Returns:
+            tuple[list, dict, dict, list]: all combinations of the variants, the scenarios
+                rejected by the prescreener, the combinations of each scenario (see
+                get_scenario_variants) and the inputs (vector, graph, scenario) to simulate
+        """
+        all_variants_control = self.generate_all_combine(graph)
+        prescreener = self.prepare_reward.prescreener
+        is_screened_out = {
+            sim.get_scenario_name(): prescreener is not None and
+            not prescreener.is_feasible(graph, sim) for sim in self.simulation_scenario
+        }
+        scenario_variants = self.get_scenario_variants(graph, all_variants_control,
+                                                       is_screened_out)
+        input_dates = [(np.array(x), graph, sim)
+                       for sim in self.simulation_scenario
+                       for x in scenario_variants[sim.get_scenario_name()][1]]
+        return all_variants_control, is_screened_out, scenario_variants, input_dates
+
+    def get_fallback_inputs(self, graph: GraphGrammar, all_variants_control: list,
+                            scenario_variants: dict[str, tuple],
+                            result_group_object: dict[str, list]) -> list:
+        """Return the rest of the combinations for the scenarios where the warm start is worse
+        than expected."""
+        fallback_inputs = []
+        for sim in self.simulation_scenario:
+            scen_name = sim.get_scenario_name()
+            warm_reward, variants = scenario_variants[scen_name]
+            if warm_reward is None:
+                continue
+            best_reward = max((res[1] for res in result_group_object[scen_name]), default=0)
+            if self.warm_start.is_fallback_needed(best_reward, warm_reward):
+                searched = set(variants)
+                fallback_inputs.extend((np.array(x), graph, sim)
+                                       for x in all_variants_control
+                                       if x not in searched)
+        return fallback_inputs
+
+    def optimise_graphs(self, graphs: list[GraphGrammar]) -> list[tuple]:
+        """Search the controls of the graphs, the simulations of all graphs are calculated
+        together by run_batch_inputs.
+
+        Args:
+            graphs (list[GraphGrammar]): graphs of the mechanisms
+
+        Returns:
+            list[tuple]: reward and control of each graph
+        """
+        results = [(0.01, []) for _ in graphs]
+        searches = {
+            idx: self.get_search_inputs(graph)
+            for idx, graph in enumerate(graphs)
+            if is_valid_graph(graph)
+        }
+        result_groups = {
+            idx: {sim_scen.get_scenario_name(): [] for sim_scen in self.simulation_scenario}
+            for idx in searches
+        }
+
+        def run_and_group(graph_inputs: dict[int, list]):
+            batch_results = self.run_batch_inputs([(graphs[idx], input_dates)
+                                                   for idx, input_dates in graph_inputs.items()])
+            for idx, parallel_results in zip(graph_inputs, batch_results):
+                for res in parallel_results:
+                    result_groups[idx][res[2].get_scenario_name()].append((res[1], res[0]))
+
+        run_and_group({idx: search[3] for idx, search in searches.items()})
+        # the full grid is searched for the scenarios where the warm start is worse than expected
+        fallback_inputs = {
+            idx: self.get_fallback_inputs(graphs[idx], search[0], search[2], result_groups[idx])
+            for idx, search in searches.items()
+        }
+        run_and_group({idx: inputs for idx, inputs in fallback_inputs.items() if inputs})
+
+        for idx, result_group_object in result_groups.items():
+            if not all(result_group_object.values()):
+                continue
+            is_screened_out = searches[idx][1]
+            reward = 0
+            control = []
+            for key_i, value in result_group_object.items():
+                best_res = max(value, key=lambda i: i[1])
+                reward += best_res[1] * self.weight_dict[key_i]
+                control.append(best_res[0])
+                if self.warm_start is not None and not is_screened_out[key_i]:
+                    self.warm_start.update(graphs[idx], key_i, best_res[0], best_res[1])
+            results[idx] = (reward, control)
+        return results
+
+    @cached_reward
     def calculate_reward(self, graph: GraphGrammar):
         """Calc reward by sum from best reword from each simulation scenario.
         For each simulation scenario try all combination from self.variants. Combination calculates by 
@@ -241,62 +766,227 @@ class BruteForceOptimisation1D(GraphRewardCalculator):
         Returns:
             _type_: _description_
         """
+        return self.optimise_graphs([graph])[0]
+
+    @cached_rewards
+    def calculate_unique_rewards(self, graphs: list[GraphGrammar]) -> list:
+        """Search the controls of the graphs at once, the simulations of all graphs are
+        scheduled in one pool."""
+        return self.optimise_graphs(graphs)
+
+
+class SuccessiveHalvingOptimisation1D(BruteForceOptimisation1D):
+    """Anytime version of BruteForceOptimisation1D by the successive halving.
+
+    The combinations of the variants are raced for each scenario. At the first rung all
+    candidates are simulated with the simulation length reduced by min_length_fraction, then
+    the best 1/eta of the candidates are promoted to the eta times longer simulations up to the
+    full length. The best candidate of the full length rung gives the control of the scenario.
+
+    The budget limits the cost of the race of one scenario in the full length simulations, if
+    all combinations don't fit in the budget the candidates are sampled from them. The warm
+    start is not used.
+    """
+
+    def __init__(self,
+                 variants: list,
+                 simulation_scenario: list[ParametrizedSimulation],
+                 prepare_reward: BasePrepareOptiVar,
+                 weights: None | list[float] = None,
+                 num_cpu_workers=1,
+                 chunksize=1,
+                 timeout_parallel=60 * 5,
+                 min_length_fraction: float = 0.25,
+                 eta: int = 3,
+                 budget: Optional[float] = None,
+                 seed: int = 0):
+        """
+        Args:
+            variants (list): variants of each control parameter
+            simulation_scenario (list[ParametrizedSimulation]): scenarios of the simulation
+            prepare_reward (BasePrepareOptiVar): object for create reward function
+            weights (None | list[float], optional): weights of the scenarios. Defaults to None.
+            num_cpu_workers (int, optional): number of the worker processes. Defaults to 1.
+            chunksize (int, optional): number of the tasks sent to the worker at once. Defaults
+                to 1.
+            timeout_parallel (float, optional): time limit for a single simulation in the pool.
+                Defaults to 60*5.
+            min_length_fraction (float, optional): fraction of the simulation length at the first
+                rung. Defaults to 0.25.
+            eta (int, optional): reduction factor of the candidates between the rungs. Defaults
+                to 3.
+            budget (Optional[float], optional): maximum cost of the scenario in the full length
+                simulations, None races all combinations. Defaults to None.
+            seed (int, optional): seed of the sampling of the candidates. Defaults to 0.
+        """
+        super().__init__(variants, simulation_scenario, prepare_reward, weights, num_cpu_workers,
+                         chunksize, timeout_parallel)
+        if not 0 < min_length_fraction <= 1:
+            raise Exception("min_length_fraction should be in (0, 1]")
+        if eta < 2:
+            raise Exception("eta should be at least 2")
+        self.min_length_fraction = min_length_fraction
+        self.eta = eta
+        self.budget = budget
+        self.seed = seed
+        self._rung_scenarios: Optional[list[ParametrizedSimulation]] = None
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state["_rung_scenarios"] = None
+        return state
+
+    def get_length_fractions(self) -> list[float]:
+        """Return the fractions of the simulation length of the rungs, the last one is 1."""
+        fractions = [self.min_length_fraction]
+        while fractions[-1] < 1:
+            fractions.append(min(1.0, fractions[-1] * self.eta))
+        return fractions
+
+    def get_pool_scenarios(self) -> list[ParametrizedSimulation]:
+        """Return the scenarios of all rungs, the scenario of the rung r is at the index
+        r * len(simulation_scenario) + scenario index."""
+        if self._rung_scenarios is None:
+            self._rung_scenarios = []
+            for fraction in self.get_length_fractions():
+                for sim in self.simulation_scenario:
+                    rung_sim = sim
+                    if fraction < 1:
+                        rung_sim = deepcopy(sim)
+                        rung_sim.simulation_length = sim.simulation_length * fraction
+                    self._rung_scenarios.append(rung_sim)
+        return self._rung_scenarios
+
+    def shutdown(self):
+        """Stop the worker pool and drop the scenarios of the rungs."""
+        super().shutdown()
+        self._rung_scenarios = None
+
+    def get_race_cost(self, n_candidates: int) -> float:
+        """Return the cost of the race of the candidates in the full length simulations."""
+        cost = 0.0
+        for fraction in self.get_length_fractions():
+            cost += n_candidates * fraction
+            n_candidates = -(-n_candidates // self.eta)
+        return cost
+
+    def sample_candidates(self, dimension: int) -> list[tuple]:
+        """Return the combinations of the variants that fit in the budget.
+
+        Args:
+            dimension (int): number of the control parameters
+
+        Returns:
+            list[tuple]: all combinations or the sample of them in the order of generation
+        """
+        n_variants = len(self.variants)
+        n_combinations = n_variants**dimension
+        n_candidates = n_combinations
+        if self.budget is not None and self.get_race_cost(n_combinations) > self.budget:
+            low, high = 1, n_combinations
+            while low < high:
+                middle = (low + high + 1) // 2
+                if self.get_race_cost(middle) <= self.budget:
+                    low = middle
+                else:
+                    high = middle - 1
+            n_candidates = low
+        if n_candidates == n_combinations:
+            return list(product(self.variants, repeat=dimension))
+
+        rng = np.random.default_rng(self.seed)
+        candidates = []
+        for number in sorted(rng.choice(n_combinations, n_candidates, replace=False)):
+            digits = []
+            for _ in range(dimension):
+                number, digit = divmod(int(number), n_variants)
+                digits.append(self.variants[digit])
+            candidates.append(tuple(reversed(digits)))
+        return candidates
+
+    def calculate_unique_rewards(self, graphs: list[GraphGrammar]) -> list:
+        """Race the combinations of the graphs one by one."""
+        return [self.calculate_reward(graph) for graph in graphs]
+
+    @cached_reward
+    def calculate_reward(self, graph: GraphGrammar):
+        """Race the combinations of the variants for each scenario and sum the weighted best
+        rewards of the full length simulations.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+
+        Returns:
+            tuple: reward and the best control of each scenario
+        """
         if not is_valid_graph(graph):
             return (0.01, [])
 
-        all_variants_control = self.generate_all_combine(graph)
-        if isinstance(self.simulation_scenario, list):
-            all_simulations = list(product(all_variants_control, self.simulation_scenario))
-            input_dates = [(np.array(put[0]), graph, put[1]) for put in all_simulations]
-        else:
-            all_simulations = list(product(all_variants_control, [self.simulation_scenario]))
-            input_dates = [(np.array(put[0]), graph, put[1]) for put in all_simulations]
-        np.random.shuffle(input_dates)
-        parallel_results = []
-        if self.num_cpu_workers > 1:
-            cpus = len(input_dates) + 1 if len(
-                input_dates) < self.num_cpu_workers else self.num_cpu_workers
-            print(f"Use CPUs processor: {cpus}, input dates: {len(input_dates)}")
-
-            try:
-                parallel_results = Parallel(
-                    cpus,
-                    backend="multiprocessing",
-                    verbose=100,
-                    timeout=self.timeout_parallel,
-                    batch_size=self.chunksize)(
-                        delayed(self.prepare_reward.reward_one_sim_scenario)(i[0], i[1], i[2])
-                        for i in input_dates)
-            except multiprocessing.context.TimeoutError:
-                print("Faild evaluate graph, TimeoutError")
+        dimension = len(self.prepare_reward.bound_parameters(graph, (0, 1)))
+        candidates = self.sample_candidates(dimension)
+        n_scenarios = len(self.simulation_scenario)
+        n_rungs = len(self.get_length_fractions())
+        n_simulations = sum(-(-len(candidates) // self.eta**rung) for rung in range(n_rungs))
+        is_feasible = self.prescreen_scenarios(graph, [n_simulations] * n_scenarios)
+        racing = {idx: list(candidates) for idx in range(n_scenarios) if is_feasible[idx]}
+        best_results = {}
+        for rung in range(n_rungs):
+            tasks = [(np.array(x), graph, rung * n_scenarios + idx)
+                     for idx, scenario_candidates in racing.items()
+                     for x in scenario_candidates]
+            rewards = self.evaluate_tasks(tasks)
+            start = 0
+            for idx, scenario_candidates in racing.items():
+                scenario_rewards = rewards[start:start + len(scenario_candidates)]
+                start += len(scenario_candidates)
+                # the stable order keeps the candidates with the equal rewards deterministic
+                order = np.argsort(-scenario_rewards, kind="stable")
+                if rung == n_rungs - 1:
+                    best_results[idx] = (float(scenario_rewards[order[0]]),
+                                         np.array(scenario_candidates[order[0]]))
+                else:
+                    n_promoted = -(-len(scenario_candidates) // self.eta)
+                    racing[idx] = [scenario_candidates[i] for i in order[:n_promoted]]
+
+        reward = 0
+        control = []
+        for idx, sim in enumerate(self.simulation_scenario):
+            if is_feasible[idx]:
+                best_reward, best_x = best_results[idx]
+            else:
+                best_reward = self.prepare_reward.prescreener.penalty_reward
+                best_x = np.array(candidates[0])
+            if not np.isfinite(best_reward):
                 return (0.01, [])
+            reward += best_reward * self.weight_dict[sim.get_scenario_name()]
+            control.append(best_x)
+        return (reward, control)
 
-        else:
-            for i in input_dates:
-                res = self.prepare_reward.reward_one_sim_scenario(i[0], i[1], i[2])
-                parallel_results.append(res)
 
-        result_group_object = {
-            sim_scen.get_scenario_name(): [] for sim_scen in self.simulation_scenario
-        }
-        for results in parallel_results:
-            scen_name = results[2].get_scenario_name()
-            result_group_object[scen_name].append((results[1], results[0]))
+# Calculator of the worker process of GlobalOptimisationEachSim, set once by the pool initializer
+_worker_global_optimiser: Optional["GlobalOptimisationEachSim"] = None
 
-        reward = 0
-        control = []
-        for key_i, value in result_group_object.items():
-            best_res = max(value, key=lambda i: i[1])
-            reward += best_res[1] * self.weight_dict[key_i]
-            control.append(best_res[0])
 
-        return (reward, control)
+def _init_global_optimisation_worker(optimiser: "GlobalOptimisationEachSim"):
+    global _worker_global_optimiser
+    _worker_global_optimiser = optimiser
+
 
+def _global_optimisation_worker_task(task: tuple[GraphGrammar, int]):
+    graph, scenario_idx = task
+    return _worker_global_optimiser.optimise_scenario(
+        graph, _worker_global_optimiser.simulation_scenario[scenario_idx])
 
-class GlobalOptimisationEachSim(GraphRewardCalculator):
+
+class GlobalOptimisationEachSim(PoolRewardCalculator):
     """Class helps use global optimisation for find best control.
     Use BasePrepareOptiVar.
 
+    With several workers the batch of graphs is calculated in the persistent pool of
+    PoolRewardCalculator, each task is the optimisation of one scenario of one graph. The
+    timeout_parallel limits the time of one optimisation, the pool is restarted if the batch
+    isn't finished in time and the graphs of the batch get the reward 0.01.
+
     Args:
         GraphRewardCalculator (_type_): _description_
     """
@@ -306,26 +996,32 @@ class GlobalOptimisationEachSim(GraphRewardCalculator):
                  prepare_reward: BasePrepareOptiVar,
                  bound: tuple[float, float],
                  args_for_optimiser=None,
-                 optimisation_tool=direct):
+                 optimisation_tool=direct,
+                 num_cpu_workers=1,
+                 timeout_parallel=None):
         self.optimisation_tool = optimisation_tool
         self.simulation_scenario = simulation_scenario
         self.prepare_reward = prepare_reward
-        self.args_for_optimiser = args_for_optimiser
+        self.args_for_optimiser = {} if args_for_optimiser is None else args_for_optimiser
         self.bound = bound
+        self.num_cpu_workers = num_cpu_workers
+        self.timeout_parallel = timeout_parallel
 
-    def calculate_reward(self, graph: GraphGrammar):
-        self.prepare_reward.bound_parameters(graph, (0, 1))
-        resaults = []
-        for sim in self.simulation_scenario:
-            x_input_function = partial(self.prepare_reward.reward_one_sim_scenario,
-                                       graph=graph,
-                                       sim=sim)
-            x_input_function_first_arg = lambda x: -x_input_function(x)[0]
-            res = self.optimisation_tool(x_input_function_first_arg,
-                                         bounds=self.prepare_reward.bound_parameters(
-                                             graph, self.bound),
-                                         **self.args_for_optimiser)
-            resaults.append(res)
+    def get_pool_initializer(self) -> tuple[Callable, tuple]:
+        return _init_global_optimisation_worker, (self,)
+
+    def optimise_scenario(self, graph: GraphGrammar, sim: ParametrizedSimulation):
+        """Run the optimisation tool for the control of the graph in the scenario."""
+        x_input_function = partial(self.prepare_reward.reward_one_sim_scenario,
+                                   graph=graph,
+                                   sim=sim)
+        x_input_function_first_arg = lambda x: -x_input_function(x)[0]
+        return self.optimisation_tool(x_input_function_first_arg,
+                                      bounds=self.prepare_reward.bound_parameters(
+                                          graph, self.bound),
+                                      **self.args_for_optimiser)
+
+    def collect_results(self, resaults: list) -> tuple:
         controls = []
         rew = 0
         for res_i in resaults:
@@ -333,6 +1029,154 @@ class GlobalOptimisationEachSim(GraphRewardCalculator):
             controls.append(res_i.x)
         return (-rew, controls)
 
+    def optimise_graph(self, graph: GraphGrammar) -> tuple:
+        self.prepare_reward.bound_parameters(graph, (0, 1))
+        resaults = [self.optimise_scenario(graph, sim) for sim in self.simulation_scenario]
+        return self.collect_results(resaults)
+
+    @cached_reward
+    def calculate_reward(self, graph: GraphGrammar):
+        return self.optimise_graph(graph)
+
+    @cached_rewards
+    def calculate_unique_rewards(self, graphs: list[GraphGrammar]) -> list:
+        """Optimise the scenarios of all graphs in the pool of processes. The pool takes the
+        tasks one by one, the tasks of the larger dimension are started first."""
+        if not self.is_parallel():
+            return [self.optimise_graph(graph) for graph in graphs]
+        dimensions = [len(self.prepare_reward.bound_parameters(graph, (0, 1))) for graph in graphs]
+        tasks = sorted(product(range(len(graphs)), range(len(self.simulation_scenario))),
+                       key=lambda task: -dimensions[task[0]])
+        task_results = self.map_tasks([(graphs[graph_idx], scenario_idx)
+                                       for graph_idx, scenario_idx in tasks],
+                                      chunksize=1,
+                                      worker_task=_global_optimisation_worker_task)
+        if task_results is None:
+            return [(0.01, []) for _ in graphs]
+        resaults = [[None] * len(self.simulation_scenario) for _ in graphs]
+        for (graph_idx, scenario_idx), res in zip(tasks, task_results):
+            resaults[graph_idx][scenario_idx] = res
+        return [self.collect_results(graph_resaults) for graph_resaults in resaults]
+
+
+class ParallelGlobalOptimisation(PoolRewardCalculator):
+    """Global optimisation of the control for each scenario with the batch optimizers.
+
+    All scenarios are optimised at the same time. At each round the batches of all running
+    optimizers are joined and simulated in the worker pool, so the pool is loaded by the
+    vectors of several objects and several vectors of one object. The random generator of the
+    optimizer of the scenario is seeded by the seed and the index of the scenario, the results
+    are deterministic for the fixed seed.
+
+    With the warm_start store the optimizers start from the control of the similar graph with
+    the reduced budget, the full search is repeated if the result is worse than expected.
+    """
+
+    def __init__(self,
+                 simulation_scenario: list[ParametrizedSimulation],
+                 prepare_reward: BasePrepareOptiVar,
+                 bound: tuple[float, float],
+                 optimizer_class: Type[BatchOptimizer] = CrossEntropyOptimizer,
+                 args_for_optimiser: Optional[dict] = None,
+                 seed: int = 0,
+                 num_cpu_workers=1,
+                 chunksize=1,
+                 timeout_parallel=60 * 5):
+        """
+        Args:
+            simulation_scenario (list[ParametrizedSimulation]): scenarios of the simulation
+            prepare_reward (BasePrepareOptiVar): object for create reward function
+            bound (tuple[float, float]): bounds of each control parameter
+            optimizer_class (Type[BatchOptimizer], optional): optimizer of the scenario. Defaults
+                to CrossEntropyOptimizer.
+            args_for_optimiser (Optional[dict], optional): keyword arguments of the optimizer,
+                e.g. n_iterations and batch_size. Defaults to None.
+            seed (int, optional): seed of the optimizers. Defaults to 0.
+            num_cpu_workers (int, optional): number of the worker processes, "auto" uses all
+                processors, 1 simulates in this process. Defaults to 1.
+            chunksize (int, optional): number of the tasks sent to the worker at once. Defaults
+                to 1.
+            timeout_parallel (float, optional): time limit for a single simulation in the pool,
+                the timed out vectors get the reward -inf. Defaults to 60*5.
+        """
+        self.simulation_scenario = simulation_scenario
+        self.prepare_reward = prepare_reward
+        self.bound = bound
+        self.optimizer_class = optimizer_class
+        self.args_for_optimiser = args_for_optimiser
+        self.seed = seed
+        self.num_cpu_workers = num_cpu_workers
+        self.chunksize = chunksize
+        self.timeout_parallel = timeout_parallel
+        self._pool = None
+        self._pool_size = 0
+
+    def create_optimizers(self, graph: GraphGrammar) -> list[BatchOptimizer]:
+        bounds = self.prepare_reward.bound_parameters(graph, self.bound)
+        args = self.args_for_optimiser if self.args_for_optimiser else {}
+        return [
+            self.optimizer_class(bounds, np.random.default_rng([self.seed, idx]), **args)
+            for idx in range(len(self.simulation_scenario))
+        ]
+
+    def run_optimizers(self, graph: GraphGrammar, optimizers: dict[int, BatchOptimizer]):
+        """Run the optimizers of the scenarios by the index of the scenario until they are done.
+        The batches of all optimizers are joined at each round."""
+        running = list(optimizers)
+        while running:
+            batches = [(idx, optimizers[idx].ask()) for idx in running]
+            tasks = [(x, graph, idx) for idx, points in batches for x in points]
+            rewards = self.evaluate_tasks(tasks)
+            start = 0
+            for idx, points in batches:
+                optimizers[idx].tell(points, rewards[start:start + len(points)])
+                start += len(points)
+            running = [idx for idx in running if not optimizers[idx].is_done()]
+
+    @cached_reward
+    def calculate_reward(self, graph: GraphGrammar):
+        if not is_valid_graph(graph):
+            return (0.01, [])
+
+        optimizers = self.create_optimizers(graph)
+        is_feasible = self.prescreen_scenarios(graph,
+                                               [optimizer.budget for optimizer in optimizers])
+        running = {}
+        warm_rewards = {}
+        for idx, (sim, optimizer) in enumerate(zip(self.simulation_scenario, optimizers)):
+            if not is_feasible[idx]:
+                optimizer.best_reward = self.prepare_reward.prescreener.penalty_reward
+                continue
+            if self.warm_start is not None:
+                stored = self.warm_start.get(graph, sim.get_scenario_name(), optimizer.dimension)
+                if stored is not None:
+                    warm_rewards[idx] = stored[0]
+                    optimizer.warm_start(stored[1], self.warm_start.budget_fraction)
+            running[idx] = optimizer
+        self.run_optimizers(graph, running)
+
+        # the full search for the scenarios where the warm start is worse than expected
+        fresh_optimizers = self.create_optimizers(graph) if warm_rewards else []
+        fallback = {
+            idx: fresh_optimizers[idx]
+            for idx, warm_reward in warm_rewards.items()
+            if self.warm_start.is_fallback_needed(optimizers[idx].best_reward, warm_reward)
+        }
+        self.run_optimizers(graph, fallback)
+        for idx, optimizer in fallback.items():
+            if optimizer.best_reward > optimizers[idx].best_reward:
+                optimizers[idx] = optimizer
+
+        if not all(np.isfinite(optimizer.best_reward) for optimizer in optimizers):
+            return (0.01, [])
+        if self.warm_start is not None:
+            for idx in running:
+                self.warm_start.update(graph, self.simulation_scenario[idx].get_scenario_name(),
+                                       optimizers[idx].best_x, optimizers[idx].best_reward)
+        reward = sum(optimizer.best_reward for optimizer in optimizers)
+        controls = [optimizer.best_x for optimizer in optimizers]
+        return (reward, controls)
+
 
 class ConstTorqueOptiVar(BasePrepareOptiVar):
 
@@ -360,32 +1204,73 @@ class ConstTorqueOptiVar(BasePrepareOptiVar):
         return multi_bound
 
 
-class FromGraphOptimizer(GraphRewardCalculator):
+class FromGraphOptimizer(PoolRewardCalculator):
+    """Reward of the control built from the graph by params_dict.
 
-    def __init__(
-        self,
-        params_dict: dict,
-        simulation_scenario: list[ParametrizedSimulation],
-        prepare_reward: BasePrepareOptiVar,
-    ):
+    With several workers the simulations of the batch of graphs are calculated in the pool of
+    processes, see PoolRewardCalculator.
+    """
+
+    def __init__(self,
+                 params_dict: dict,
+                 simulation_scenario: list[ParametrizedSimulation] | ParametrizedSimulation,
+                 prepare_reward: BasePrepareOptiVar,
+                 num_cpu_workers=1,
+                 chunksize=1,
+                 timeout_parallel=None):
         self.params_dict = params_dict
+        if not isinstance(simulation_scenario, Iterable):
+            simulation_scenario = [simulation_scenario]
         self.simulation_scenario = simulation_scenario
         self.prepare_reward = prepare_reward
+        self.num_cpu_workers = num_cpu_workers
+        self.chunksize = chunksize
+        self.timeout_parallel = timeout_parallel
+        self._pool = None
+        self._pool_size = 0
 
     def create_vector_from_graph(self, graph: GraphGrammar):
         control_vec = build_control_graph_from_joint(graph, self.params_dict)
         return control_vec
 
+    def simulate_graphs(self, graphs: list[GraphGrammar]) -> list[tuple]:
+        """Simulate the controls of the graphs in all scenarios, the simulations of all graphs
+        are joined in one call of evaluate_tasks.
+
+        Args:
+            graphs (list[GraphGrammar]): graphs of the mechanisms
+
+        Returns:
+            list[tuple]: reward and control of each graph
+        """
+        n_scenarios = len(self.simulation_scenario)
+        control_vecs = [self.create_vector_from_graph(graph) for graph in graphs]
+        rewards = np.zeros((len(graphs), n_scenarios))
+        tasks = []
+        task_idx = []
+        for graph_idx, (graph, control_vec) in enumerate(zip(graphs, control_vecs)):
+            is_feasible = self.prescreen_scenarios(graph, [1] * n_scenarios)
+            for scenario_idx in range(n_scenarios):
+                if is_feasible[scenario_idx]:
+                    tasks.append((control_vec, graph, scenario_idx))
+                    task_idx.append((graph_idx, scenario_idx))
+                else:
+                    rewards[graph_idx,
+                            scenario_idx] = self.prepare_reward.prescreener.penalty_reward
+        for (graph_idx, scenario_idx), rew in zip(task_idx, self.evaluate_tasks(tasks)):
+            rewards[graph_idx, scenario_idx] = rew
+        results = []
+        for graph_rewards, control_vec in zip(rewards, control_vecs):
+            if not np.all(np.isfinite(graph_rewards)):
+                results.append((0.01, []))
+            else:
+                results.append((float(graph_rewards.sum()), control_vec))
+        return results
+
+    @cached_reward
     def calculate_reward(self, graph: GraphGrammar):
-        control_vec = self.create_vector_from_graph(graph)
-        if isinstance(self.simulation_scenario, Iterable):
-            all_reward = 0
-            for simulation in self.simulation_scenario:
-                single_reward = self.prepare_reward.reward_one_sim_scenario(
-                    control_vec, graph, simulation)
-                all_reward += single_reward
-            return (all_reward, control_vec)
-        else:
-            rew = self.prepare_reward.reward_one_sim_scenario(control_vec, graph,
-                                                              self.simulation_scenario)
-            return (rew, control_vec)
\ No newline at end of file
+        return self.simulate_graphs([graph])[0]
+
+    @cached_rewards
+    def calculate_unique_rewards(self, graphs: list[GraphGrammar]) -> list:
+        return self.simulate_graphs(graphs)
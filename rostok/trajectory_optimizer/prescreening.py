@@ -0,0 +1,227 @@
+import numpy as np
+
+import rostok.block_builder_api.easy_body_shapes as easy_body_shapes
+from rostok.block_builder_api.block_blueprints import (JointBlueprintType,
+                                                       PrimitiveBodyBlueprint,
+                                                       RevolveJointBlueprintWithBody,
+                                                       TransformBlueprint)
+from rostok.block_builder_chrono.mesh import load_triangle_coordinates
+from rostok.graph_grammar.node import GraphGrammar
+
+
+def shape_extents(shape: easy_body_shapes.ShapeTypes) -> np.ndarray:
+    """Return the sizes of the axis aligned bounding box of the shape in its local frame.
+
+    Args:
+        shape (ShapeTypes): shape of the body
+
+    Returns:
+        np.ndarray: sizes along x, y and z
+    """
+    if isinstance(shape, easy_body_shapes.Box):
+        return np.array([shape.width_x, shape.length_y, shape.height_z])
+    if isinstance(shape, easy_body_shapes.Cylinder):
+        return np.array([2 * shape.radius, shape.height_y, 2 * shape.radius])
+    if isinstance(shape, easy_body_shapes.Sphere):
+        return np.full(3, 2 * shape.radius)
+    if isinstance(shape, easy_body_shapes.Ellipsoid):
+        return 2 * np.array([shape.radius_x, shape.radius_y, shape.radius_z])
+    if isinstance(shape, easy_body_shapes.ConvexHull):
+        return np.ptp(np.array(shape.points), axis=0)
+    if isinstance(shape, easy_body_shapes.FromMesh):
+        return np.ptp(load_triangle_coordinates(shape.path).reshape(-1, 3), axis=0)
+    raise Exception(f"Unknown shape {type(shape)}")
+
+
+def get_finger_reach(graph: GraphGrammar) -> float:
+    """Return the upper bound of the distance from the base center to the points of the fingers.
+
+    The distance of each root based path is the sum of the transform translations, the
+    diagonals of the bodies and the lengths of the joint bodies. The base contributes the half of
+    its diagonal. The offset of the joint shifts the frames before and after the joint, each
+    joint adds the doubled module of its offset.
+
+    Args:
+        graph (GraphGrammar): graph of the mechanism
+
+    Returns:
+        float: the maximum reach of the paths
+    """
+    root_id = graph.get_root_id()
+    reach = 0.0
+    for path in graph.get_sorted_root_based_paths():
+        path_reach = 0.0
+        for idx in path:
+            blueprint = graph.get_node_by_id(idx).block_blueprint
+            if isinstance(blueprint, TransformBlueprint):
+                path_reach += np.linalg.norm(blueprint.transform.position)
+            elif isinstance(blueprint, PrimitiveBodyBlueprint):
+                diagonal = np.linalg.norm(shape_extents(blueprint.shape))
+                path_reach += diagonal / 2 if idx == root_id else diagonal
+            elif isinstance(blueprint, RevolveJointBlueprintWithBody):
+                path_reach += blueprint.length + 2 * blueprint.radius
+            if isinstance(blueprint, JointBlueprintType):
+                path_reach += 2 * np.linalg.norm(getattr(blueprint, "offset", 0.0))
+        reach = max(reach, path_reach)
+    return reach
+
+
+def quaternion_to_matrix(rotation) -> np.ndarray:
+    """Return the rotation matrix of the quaternion (w, x, y, z)."""
+    w, x, y, z = np.array(rotation, dtype=float) / np.linalg.norm(rotation)
+    return np.array([[1 - 2 * (y**2 + z**2), 2 * (x * y - w * z), 2 * (x * z + w * y)],
+                     [2 * (x * y + w * z), 1 - 2 * (x**2 + z**2), 2 * (y * z - w * x)],
+                     [2 * (x * z - w * y), 2 * (y * z + w * x), 1 - 2 * (x**2 + y**2)]])
+
+
+def get_object_box(sim) -> tuple[np.ndarray, np.ndarray]:
+    """Return the center and the half sizes of the bounding box of the grasp object in the frame
+    of the base.
+
+    GraspScenario moves the object by set_covering_ellipsoid_based_position: the center of the
+    bounding box of the object in its local frame is lifted by the half of its height above the
+    object_reference_point of the scenario. The box of the object rotated by the pos of its
+    blueprint is bounded by the axis aligned box.
+
+    Args:
+        sim (GraspScenario): scenario with the grasp object
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: the center and the half sizes along x, y and z
+    """
+    blueprint = sim.grasp_object_callback
+    extents = shape_extents(blueprint.shape)
+    half_sizes = np.abs(quaternion_to_matrix(blueprint.pos.rotation)) @ extents / 2
+    center = np.array(sim.object_reference_point, dtype=float)
+    center[1] += extents[1] / 2
+    return center, half_sizes
+
+
+def get_mount_frames(graph: GraphGrammar) -> dict[int, tuple]:
+    """Return the sequence of the transforms between the base and the first link of each finger.
+
+    Args:
+        graph (GraphGrammar): graph of the mechanism
+
+    Returns:
+        dict[int, tuple]: maps the first node of the finger after the base to the positions and
+            the rotations of its transforms, the fingers without links are skipped
+    """
+    mount_frames = {}
+    for path in graph.get_sorted_root_based_paths():
+        blueprints = [graph.get_node_by_id(idx).block_blueprint for idx in path]
+        base_idx = next(
+            (i for i, blueprint in enumerate(blueprints)
+             if isinstance(blueprint, PrimitiveBodyBlueprint)), len(path))
+        frames = []
+        for blueprint in blueprints[base_idx + 1:]:
+            if not isinstance(blueprint, TransformBlueprint):
+                mount_frames[path[base_idx + 1]] = tuple(frames)
+                break
+            frames.append((tuple(blueprint.transform.position),
+                           tuple(blueprint.transform.rotation)))
+    return mount_frames
+
+
+class GraspPrescreener:
+    """Geometric check of the design before the simulation of the grasp.
+
+    The base of the mechanism is placed at the origin and the object bounding box is placed like
+    in GraspScenario, see get_object_box. The design is rejected if the fingers can't reach the
+    bounding box of the object, if the box of the base intersects it or if two fingers are
+    mounted by the same transforms, so their links overlap in the initial position. The rejected
+    simulations get the penalty reward.
+
+    The positions of the links are not known without the chrono kinematics, therefore the check
+    of the links is narrower than EventContactInInitialPosition: the fingers mounted at the
+    different frames are not checked against each other and against the object.
+
+    Attributes:
+        penalty_reward (float): reward of the rejected simulations
+        margin (float): the distance added to the reach of the fingers
+        check_reach (bool): reject the designs with short fingers
+        check_intersection (bool): reject the designs with the base inside the object
+        check_overlap (bool): reject the designs with the fingers at the same mount frame
+        n_checked (int): number of the checked simulations
+        n_skipped (int): number of the rejected simulations
+    """
+
+    def __init__(self,
+                 penalty_reward: float = 0.01,
+                 margin: float = 0.0,
+                 check_reach: bool = True,
+                 check_intersection: bool = True,
+                 check_overlap: bool = True):
+        self.penalty_reward = penalty_reward
+        self.margin = margin
+        self.check_reach = check_reach
+        self.check_intersection = check_intersection
+        self.check_overlap = check_overlap
+        self._n_checked = 0
+        self._n_skipped = 0
+
+    @property
+    def n_checked(self) -> int:
+        return self._n_checked
+
+    @property
+    def n_skipped(self) -> int:
+        return self._n_skipped
+
+    def is_feasible(self, graph: GraphGrammar, sim) -> bool:
+        """Check the design against the object of the scenario. The scenarios without the grasp
+        object are always feasible.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+            sim (ParametrizedSimulation): scenario of the simulation
+
+        Returns:
+            bool: False if the simulation can be skipped
+        """
+        if getattr(sim, "grasp_object_callback", None) is None:
+            return True
+        center, half_sizes = get_object_box(sim)
+        if self.check_reach:
+            distance = np.linalg.norm(np.maximum(np.abs(center) - half_sizes, 0))
+            if get_finger_reach(graph) + self.margin < distance:
+                return False
+        if self.check_intersection:
+            base_blueprint = graph.get_node_by_id(graph.get_root_id()).block_blueprint
+            shape = getattr(base_blueprint, "shape", None)
+            if isinstance(shape, easy_body_shapes.Box):
+                base_half_sizes = shape_extents(shape) / 2
+                if np.all(np.abs(center) < half_sizes + base_half_sizes):
+                    return False
+        if self.check_overlap:
+            mount_frames = list(get_mount_frames(graph).values())
+            if len(set(mount_frames)) < len(mount_frames):
+                return False
+        return True
+
+    def check(self, graph: GraphGrammar, sim, n_simulations: int = 1) -> bool:
+        """Check the design and count the simulations of the scenario.
+
+        Args:
+            graph (GraphGrammar): graph of the mechanism
+            sim (ParametrizedSimulation): scenario of the simulation
+            n_simulations (int, optional): number of the simulations of the check. Defaults to 1.
+
+        Returns:
+            bool: False if the simulations can be skipped
+        """
+        is_feasible = self.is_feasible(graph, sim)
+        self.count(n_simulations, is_feasible)
+        return is_feasible
+
+    def count(self, n_simulations: int, is_feasible: bool):
+        self._n_checked += n_simulations
+        if not is_feasible:
+            self._n_skipped += n_simulations
+
+    def reset(self):
+        self._n_checked = 0
+        self._n_skipped = 0
+
+    def report(self) -> str:
+        return f"Prescreening skipped {self.n_skipped} of {self.n_checked} simulations"
@@ -0,0 +1,110 @@
+from itertools import product
+from typing import Optional
+
+import numpy as np
+
+from rostok.graph_grammar.node import GraphGrammar
+from rostok.trajectory_optimizer.trajectory_generator import joint_root_paths
+
+
+def get_structure_key(graph: GraphGrammar) -> tuple[int, ...]:
+    """Return the numbers of the joints of the fingers in the order of joint_root_paths."""
+    return tuple(len(path) for path in joint_root_paths(graph))
+
+
+def get_structure_distance(key_1: tuple[int, ...], key_2: tuple[int, ...]) -> Optional[int]:
+    """Return the total difference of the joint numbers, None for the different finger numbers."""
+    if len(key_1) != len(key_2):
+        return None
+    return int(sum(abs(n_1 - n_2) for n_1, n_2 in zip(key_1, key_2)))
+
+
+class WarmStartStore:
+    """Best controls of the optimised graphs for the warm start of the similar graphs.
+
+    The controls are stored for each scenario by the structure key of the graph, the numbers of
+    the joints of the fingers. A graph gets the control of the graph with the nearest key that
+    has the same number of fingers and the same dimension of the control. The neighbours in the
+    search tree usually differ by one joint and have close optimal controls.
+
+    Attributes:
+        max_distance (int): maximum structure distance of the used controls
+        radius (int): number of the neighbour variants of the brute force grid around the control
+        budget_fraction (float): fraction of the optimizer iterations for the warm start
+        fallback_ratio (float): the full search is run if the warm reward is lower than the
+            fraction of the stored reward
+        hits (int): number of the found controls
+        misses (int): number of the graphs without the control
+    """
+
+    def __init__(self,
+                 max_distance: int = 1,
+                 radius: int = 1,
+                 budget_fraction: float = 0.5,
+                 fallback_ratio: float = 0.9):
+        self.max_distance = max_distance
+        self.radius = radius
+        self.budget_fraction = budget_fraction
+        self.fallback_ratio = fallback_ratio
+        self.hits = 0
+        self.misses = 0
+        self._controls: dict[tuple[int, ...], dict[str, tuple[float, np.ndarray]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._controls)
+
+    def update(self, graph: GraphGrammar, scenario_name: str, x, reward: float):
+        """Store the control if it is better than the stored control of the same structure."""
+        controls = self._controls.setdefault(get_structure_key(graph), {})
+        stored = controls.get(scenario_name)
+        if stored is None or reward > stored[0]:
+            controls[scenario_name] = (float(reward), np.array(x, dtype=float))
+
+    def get(self, graph: GraphGrammar, scenario_name: str,
+            dimension: int) -> Optional[tuple[float, np.ndarray]]:
+        """Return the reward and the control of the nearest structure.
+
+        Args:
+            graph (GraphGrammar): graph to optimise
+            scenario_name (str): name of the scenario
+            dimension (int): dimension of the control of the graph
+
+        Returns:
+            Optional[tuple[float, np.ndarray]]: reward and control, None if there is no control
+        """
+        key = get_structure_key(graph)
+        candidates = []
+        for other_key, controls in self._controls.items():
+            distance = get_structure_distance(key, other_key)
+            stored = controls.get(scenario_name)
+            if (distance is None or distance > self.max_distance or stored is None or
+                    len(stored[1]) != dimension):
+                continue
+            candidates.append((distance, -stored[0], other_key, stored))
+        if not candidates:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return min(candidates, key=lambda candidate: candidate[:3])[3]
+
+    def is_fallback_needed(self, reward: float, warm_reward: float) -> bool:
+        return reward < self.fallback_ratio * warm_reward
+
+    def get_grid_neighbours(self, variants: list, x) -> list[tuple]:
+        """Return the combinations of the variants around the control for the brute force.
+
+        Args:
+            variants (list): variants of each control parameter
+            x: the control
+
+        Returns:
+            list[tuple]: combinations of the variants, each coordinate is one of the radius
+                neighbours of the nearest variant
+        """
+        sorted_variants = sorted(variants)
+        axes = []
+        for value in x:
+            nearest = int(np.argmin([abs(variant - value) for variant in sorted_variants]))
+            start = max(0, nearest - self.radius)
+            axes.append(sorted_variants[start:nearest + self.radius + 1])
+        return list(product(*axes))
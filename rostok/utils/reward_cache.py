@@ -0,0 +1,185 @@
+import hashlib
+import json
+import pickle
+import sqlite3
+from functools import wraps
+from pathlib import Path
+from typing import Any, Optional
+
+from rostok.graph_grammar.node import GraphGrammar
+from rostok.utils.json_encoder import RostokJSONEncoder
+
+
+class FingerprintJSONEncoder(RostokJSONEncoder):
+    """RostokJSONEncoder without the private attributes of the nested objects."""
+
+    def default(self, o: Any) -> Any:
+        encoded = super().default(o)
+        if isinstance(encoded, list) and len(encoded) == 2 and isinstance(encoded[1], dict):
+            attributes = {
+                key: value for key, value in encoded[1].items() if not key.startswith("_")
+            }
+            return [encoded[0], attributes]
+        return encoded
+
+
+def get_fingerprint(obj) -> str:
+    """Return the hash of the JSON representation of the object.
+
+    The private attributes, the reward cache and the warm start store of the object are not
+    used, the nested objects are represented by RostokJSONEncoder like in their __repr__ without
+    the private attributes.
+
+    Args:
+        obj: object to fingerprint, e.g. the reward calculator or the simulation scenario
+
+    Returns:
+        str: hex digest of the representation
+    """
+    attributes = {
+        key: value
+        for key, value in obj.__dict__.items()
+        if not key.startswith("_") and key not in ("reward_cache", "warm_start")
+    }
+    json_data = json.dumps([type(obj).__name__, attributes],
+                           cls=FingerprintJSONEncoder,
+                           sort_keys=True)
+    return hashlib.blake2b(json_data.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def get_reward_fingerprint(calculator) -> str:
+    """Return the fingerprint of the reward calculator, it is calculated at the first call and
+    kept in the calculator, so the state changed by the calculation doesn't change it."""
+    fingerprint = getattr(calculator, "_reward_fingerprint", None)
+    if fingerprint is None:
+        fingerprint = get_fingerprint(calculator)
+        calculator._reward_fingerprint = fingerprint
+    return fingerprint
+
+
+def get_graph_key(graph: GraphGrammar) -> str:
+    """Return the exact key of the graph, see :py:meth:`GraphGrammar.get_canonical_key`."""
+    (n_paths, graph_hash), label_paths = graph.get_canonical_key()
+    return f"{n_paths}:{graph_hash:x}:{json.dumps(label_paths)}"
+
+
+class RewardCache:
+    """Persistent cache of the rewards of the designs.
+
+    The rewards are stored in the SQLite database by the exact key of the graph and the fingerprint of the reward calculator. The records are only added, the first reward of
+    the key is kept. The cache can be shared by several processes, each process opens its own
+    connection.
+
+    Attributes:
+        path (Path): path to the database file
+        hits (int): number of the rewards found in the cache by this process
+        misses (int): number of the rewards not found in the cache by this process
+    """
+
+    def __init__(self, path="./reward_cache.sqlite"):
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+    def get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=60)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS rewards ("
+                                     "graph TEXT NOT NULL, fingerprint TEXT NOT NULL, "
+                                     "reward REAL NOT NULL, data BLOB, "
+                                     "PRIMARY KEY (graph, fingerprint))")
+            self._connection.commit()
+        return self._connection
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def get(self, graph: GraphGrammar, fingerprint: str) -> Optional[tuple[float, Any]]:
+        """Return the reward and the data of the graph or None if the graph is not in the cache.
+
+        Args:
+            graph (GraphGrammar): graph of the design
+            fingerprint (str): fingerprint of the reward calculator
+
+        Returns:
+            Optional[tuple[float, Any]]: reward and data
+        """
+        row = self.get_connection().execute(
+            "SELECT reward, data FROM rewards WHERE graph = ? AND fingerprint = ?",
+            (get_graph_key(graph), fingerprint)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0], pickle.loads(row[1])
+
+    def put(self, graph: GraphGrammar, fingerprint: str, reward: float, data: Any = None):
+        """Add the reward and the data of the graph, the existing record is not changed.
+
+        Args:
+            graph (GraphGrammar): graph of the design
+            fingerprint (str): fingerprint of the reward calculator
+            reward (float): reward of the design
+            data (Any, optional): data of the design, e.g. the control. Defaults to None.
+        """
+        connection = self.get_connection()
+        connection.execute("INSERT OR IGNORE INTO rewards VALUES (?, ?, ?, ?)",
+                           (get_graph_key(graph), fingerprint, float(reward),
+                            pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)))
+        connection.commit()
+
+    def __len__(self) -> int:
+        return self.get_connection().execute("SELECT COUNT(*) FROM rewards").fetchone()[0]
+
+
+def cached_reward(calculate_reward):
+    """Decorator of calculate_reward of the reward calculator. If the calculator has the
+    reward_cache, the reward is looked up in the cache before the calculation and the new
+    reward is added to the cache."""
+
+    @wraps(calculate_reward)
+    def wrapper(self, graph: GraphGrammar):
+        reward_cache: Optional[RewardCache] = getattr(self, "reward_cache", None)
+        if reward_cache is None:
+            return calculate_reward(self, graph)
+        fingerprint = get_reward_fingerprint(self)
+        cached = reward_cache.get(graph, fingerprint)
+        if cached is not None:
+            return cached
+        result = calculate_reward(self, graph)
+        reward_cache.put(graph, fingerprint, result[0], result[1])
+        return result
+
+    return wrapper
+
+
+def cached_rewards(calculate_rewards):
+    """Decorator of the batch calculation of the rewards of the graphs, see cached_reward. Only
+    the graphs that are not in the reward_cache are passed to the calculation."""
+
+    @wraps(calculate_rewards)
+    def wrapper(self, graphs: list[GraphGrammar]):
+        reward_cache: Optional[RewardCache] = getattr(self, "reward_cache", None)
+        if reward_cache is None:
+            return calculate_rewards(self, graphs)
+        fingerprint = get_reward_fingerprint(self)
+        results = [reward_cache.get(graph, fingerprint) for graph in graphs]
+        missed = [idx for idx, result in enumerate(results) if result is None]
+        if missed:
+            for idx, result in zip(missed, calculate_rewards(self,
+                                                             [graphs[idx] for idx in missed])):
+                reward_cache.put(graphs[idx], fingerprint, result[0], result[1])
+                results[idx] = result
+        return results
+
+    return wrapper
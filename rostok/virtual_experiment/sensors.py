@@ -1,3 +1,4 @@
+from copy import deepcopy
 from enum import Enum
 from typing import Any, Dict, List, Optional, Tuple, TypeAlias
 
@@ -8,31 +9,80 @@ CoordinatesContact: TypeAlias = chrono.ChVectorD
 ForceVector: TypeAlias = chrono.ChVectorD
 
 
+class ContactAccumulator:
+    """Preallocated storage of the contacts of the current step.
+
+    The contact points and forces of each body are written into the rows of the arrays,
+    the capacity is doubled if a body gets more contacts than the arrays can hold.
+
+    Attributes:
+        points (np.ndarray): contact points with shape (bodies, capacity, 3)
+        forces (np.ndarray): contact forces with shape (bodies, capacity, 3)
+        counts (np.ndarray): amount of contacts of each body in the current step
+    """
+
+    def __init__(self, n_bodies: int, capacity: int = 16) -> None:
+        self.points = np.zeros((n_bodies, capacity, 3))
+        self.forces = np.zeros((n_bodies, capacity, 3))
+        self.counts = np.zeros(n_bodies, dtype=int)
+
+    def reset(self):
+        self.counts[:] = 0
+
+    def add(self, row: int, point: Tuple[float, float, float], force: Tuple[float, float,
+                                                                            float]):
+        count = self.counts[row]
+        if count == self.points.shape[1]:
+            self.points = np.concatenate((self.points, np.zeros_like(self.points)), axis=1)
+            self.forces = np.concatenate((self.forces, np.zeros_like(self.forces)), axis=1)
+        self.points[row, count] = point
+        self.forces[row, count] = force
+        self.counts[row] = count + 1
+
+    def get_points(self, row: int) -> np.ndarray:
+        return self.points[row, :self.counts[row]]
+
+    def get_forces(self, row: int) -> np.ndarray:
+        return self.forces[row, :self.counts[row]]
+
+    def to_list(self, row: int) -> List[Tuple[List[float], List[float]]]:
+        return list(zip(self.get_points(row).tolist(), self.get_forces(row).tolist()))
+
+
 class ContactReporter(chrono.ReportContactCallback):
 
     def __init__(self) -> None:
         """Create a sensor of contact normal forces for the body.
 
         Args:
-            _body_list (List[Tuple[int, chrono.ChBody]]): list of tuples of type (index, body), 
-                the index will be converted into the key in the contact dictionary
-            __contact_dict_this_step (Dict[int, List[Tuple[chrono.ChVectorD, chrono.ChVectorD]]]): 
-                dict of contacts obtained for the bodies from the body list in the current step. 
-                Each value is a list of contacts of form (position, force)
+            _body_map (Dict[int, Any]): map of blocks, the index will be converted into the key
+                in the contact dictionary
+            _body_rows (Dict[int, int]): maps the chrono identifier of a body to its row in the
+                contact accumulators
+            _row_to_idx (List[int]): the index of the block for each row of the accumulators
+            _contacts (ContactAccumulator): all contacts of the bodies in the current step
+            _outer_contacts (ContactAccumulator): contacts with the bodies out of the body map
         """
         super().__init__()
-        self._body_map: Optional[Dict[int, chrono.ChBody]] = {}
-        self.__contact_dict_this_step: Dict[int, List[Tuple[CoordinatesContact, ForceVector]]] = {}
-        self.__outer_contact_dict_this_step: Dict[int, List[Tuple[CoordinatesContact,
-                                                                  ForceVector]]] = {}
+        self._body_map: Optional[Dict[int, Any]] = {}
+        self._body_rows: Dict[int, int] = {}
+        self._row_to_idx: List[int] = []
+        self._contacts = ContactAccumulator(0)
+        self._outer_contacts = ContactAccumulator(0)
 
     def set_body_map(self, body_map_ordered: Dict[int, Any]):
         self._body_map = body_map_ordered
+        self._row_to_idx = list(body_map_ordered)
+        self._body_rows = {
+            block.body.GetIdentifier(): row
+            for row, block in enumerate(body_map_ordered.values())
+        }
+        self._contacts = ContactAccumulator(len(self._row_to_idx))
+        self._outer_contacts = ContactAccumulator(len(self._row_to_idx))
 
     def reset_contact_dict(self):
-        for idx in self._body_map:
-            self.__contact_dict_this_step[idx] = []
-            self.__outer_contact_dict_this_step[idx] = []
+        self._contacts.reset()
+        self._outer_contacts.reset()
 
     def OnReportContact(self, pA: CoordinatesContact, pB: CoordinatesContact,
                         plane_coord: chrono.ChMatrix33D, distance: float, eff_radius: float,
@@ -56,41 +106,115 @@ class ContactReporter(chrono.ReportContactCallback):
         # The threshold for the force sensitivity
         if react_forces.Length() < 0.001:
             return True
-        body_a = chrono.CastToChBody(contactobjA)
-        body_b = chrono.CastToChBody(contactobjB)
-        idx_a = None
-        idx_b = None
-        for idx, body in self._body_map.items():
-            if body_a == body.body:
-                idx_a = idx
-            elif body_b == body.body:
-                idx_b = idx
-        if not idx_a is None:
-            temp_vec = -(plane_coord * react_forces)
-            self.__contact_dict_this_step[idx_a].append(
-                ([pA.x, pA.y, pA.z], [temp_vec.x, temp_vec.y, temp_vec.z]))
-            if idx_b is None:
-                self.__outer_contact_dict_this_step[idx_a].append(
-                    ([pA.x, pA.y, pA.z], [temp_vec.x, temp_vec.y, temp_vec.z]))
-        if not idx_b is None:
-            temp_vec = -(plane_coord * react_forces)
-            self.__contact_dict_this_step[idx_b].append(
-                ([pB.x, pB.y, pB.z], [temp_vec.x, temp_vec.y, temp_vec.z]))
-            if idx_a is None:
-                self.__outer_contact_dict_this_step[idx_b].append(
-                    ([pB.x, pB.y, pB.z], [temp_vec.x, temp_vec.y, temp_vec.z]))
+        row_a = self._body_rows.get(chrono.CastToChBody(contactobjA).GetIdentifier())
+        row_b = self._body_rows.get(chrono.CastToChBody(contactobjB).GetIdentifier())
+        if row_a is None and row_b is None:
+            return True
+
+        temp_vec = -(plane_coord * react_forces)
+        force = (temp_vec.x, temp_vec.y, temp_vec.z)
+        if not row_a is None:
+            self.add_contact(row_a, (pA.x, pA.y, pA.z), force, row_b is None)
+        if not row_b is None:
+            self.add_contact(row_b, (pB.x, pB.y, pB.z), force, row_a is None)
 
         return True
 
+    def add_contact(self, row: int, point: Tuple[float, float, float],
+                    force: Tuple[float, float, float], is_outer: bool):
+        """Add the contact of the body to the accumulators.
+
+        Args:
+            row (int): the row of the body in the accumulators
+            point (Tuple[float, float, float]): coordinates of the contact point
+            force (Tuple[float, float, float]): contact force
+            is_outer (bool): define if the other body is out of the body map
+        """
+        self._contacts.add(row, point, force)
+        if is_outer:
+            self._outer_contacts.add(row, point, force)
+
     def get_contacts(self):
-        return self.__contact_dict_this_step
+        return {idx: self._contacts.to_list(row) for row, idx in enumerate(self._row_to_idx)}
 
     def get_outer_contacts(self):
-        return self.__outer_contact_dict_this_step
+        return {
+            idx: self._outer_contacts.to_list(row) for row, idx in enumerate(self._row_to_idx)
+        }
+
+    def get_contact_accumulator(self) -> ContactAccumulator:
+        return self._contacts
+
+    def get_outer_contact_accumulator(self) -> ContactAccumulator:
+        return self._outer_contacts
+
+    def get_body_indices(self) -> List[int]:
+        """Return the indices of the blocks in the order of the accumulator rows."""
+        return self._row_to_idx
+
+
+class SharedContactReporter(chrono.ReportContactCallback):
+    """Fill several contact reporters with a single scan of the contact container.
+
+    The body maps of the reporters must not intersect. A contact is outer for a reporter if the
+    other body doesn't belong to its body map.
+
+    Attributes:
+        reporters (List[ContactReporter]): reporters that get the contacts of their bodies
+        _body_lookup (Dict[int, Tuple[int, int]]): maps the chrono identifier of a body to the
+            index of its reporter and the row in the reporter accumulators
+    """
+
+    def __init__(self, reporters: List[ContactReporter]) -> None:
+        super().__init__()
+        self.reporters = reporters
+        self._body_lookup: Dict[int, Tuple[int, int]] = {}
+        for reporter_idx, reporter in enumerate(reporters):
+            for identifier, row in reporter._body_rows.items():
+                if identifier in self._body_lookup:
+                    raise Exception("The body maps of the contact reporters intersect")
+                self._body_lookup[identifier] = (reporter_idx, row)
+
+    def reset_contact_dict(self):
+        for reporter in self.reporters:
+            reporter.reset_contact_dict()
+
+    def report_all(self, system: chrono.ChSystem):
+        """Reset the reporters and fill them with the contacts of the current step."""
+        self.reset_contact_dict()
+        system.GetContactContainer().ReportAllContacts(self)
+
+    def OnReportContact(self, pA: CoordinatesContact, pB: CoordinatesContact,
+                        plane_coord: chrono.ChMatrix33D, distance: float, eff_radius: float,
+                        react_forces: ForceVector, react_torques: chrono.ChVectorD,
+                        contactobjA: chrono.ChContactable, contactobjB: chrono.ChContactable):
+        # The threshold for the force sensitivity
+        if react_forces.Length() < 0.001:
+            return True
+        body_a = self._body_lookup.get(chrono.CastToChBody(contactobjA).GetIdentifier())
+        body_b = self._body_lookup.get(chrono.CastToChBody(contactobjB).GetIdentifier())
+        if body_a is None and body_b is None:
+            return True
+
+        temp_vec = -(plane_coord * react_forces)
+        force = (temp_vec.x, temp_vec.y, temp_vec.z)
+        if not body_a is None:
+            is_outer = body_b is None or body_b[0] != body_a[0]
+            self.reporters[body_a[0]].add_contact(body_a[1], (pA.x, pA.y, pA.z), force, is_outer)
+        if not body_b is None:
+            is_outer = body_a is None or body_a[0] != body_b[0]
+            self.reporters[body_b[0]].add_contact(body_b[1], (pB.x, pB.y, pB.z), force, is_outer)
+
+        return True
 
 
 class Sensor:
-    """Control data obtained in the current step of the simulation"""
+    """Control data obtained in the current step of the simulation
+
+    The numeric arrays of the bodies are computed at the first request in the step and shared
+    by all events, criteria and controllers. The simulation resets them after each dynamics step
+    by reset_step_cache.
+    """
 
     def __init__(self, body_map_ordered, joint_map_ordered) -> None:
         self.contact_reporter: ContactReporter = ContactReporter()
@@ -98,31 +222,72 @@ class Sensor:
         self.body_map_ordered: Dict[int, Any] = body_map_ordered
         self.joint_map_ordered: Dict[int, Any] = joint_map_ordered
         self.grav_acc: np.ndarray = np.array([0, -9.8, 0])
+        self._step_cache: Dict[str, np.ndarray] = {}
+
+    def reset_step_cache(self):
+        """Drop the arrays of the previous step."""
+        self._step_cache.clear()
 
     def update_current_contact_info(self, system: chrono.ChSystem):
         system.GetContactContainer().ReportAllContacts(self.contact_reporter)
+        self.update_gravity(system)
+        self.reset_step_cache()
+
+    def update_gravity(self, system: chrono.ChSystem):
         self.grav_acc = np.array([getattr(system.Get_G_acc(), axis) for axis in ['x', 'y', 'z']])
 
+    def get_state(self) -> Tuple[ContactAccumulator, ContactAccumulator, np.ndarray]:
+        """Return the copy of the contacts of the current step and the gravity."""
+        return (deepcopy(self.contact_reporter.get_contact_accumulator()),
+                deepcopy(self.contact_reporter.get_outer_contact_accumulator()),
+                self.grav_acc.copy())
+
+    def set_state(self, state: Tuple[ContactAccumulator, ContactAccumulator, np.ndarray]):
+        """Restore the contacts and the gravity returned by get_state."""
+        contacts, outer_contacts, grav_acc = deepcopy(state)
+        self.contact_reporter._contacts = contacts
+        self.contact_reporter._outer_contacts = outer_contacts
+        self.grav_acc = grav_acc
+        self.reset_step_cache()
+
+    def _get_body_vectors(self, key: str, getter_name: str) -> np.ndarray:
+        vectors = self._step_cache.get(key)
+        if vectors is None:
+            vectors = np.empty((len(self.body_map_ordered), 3))
+            for row, block in enumerate(self.body_map_ordered.values()):
+                vector = getattr(block.body, getter_name)()
+                vectors[row] = (vector.x, vector.y, vector.z)
+            vectors.setflags(write=False)
+            self._step_cache[key] = vectors
+        return vectors
+
+    def get_body_positions(self) -> np.ndarray:
+        """Return the read-only array of the positions of the bodies in the order of the body map
+        with shape (bodies, 3). The values are not rounded and may be nan."""
+        return self._get_body_vectors("positions", "GetPos")
+
+    def get_body_velocities(self) -> np.ndarray:
+        """Return the read-only array of the velocities of the bodies in the order of the body
+        map with shape (bodies, 3). The values are not rounded and may be nan."""
+        return self._get_body_vectors("velocities", "GetPos_dt")
+
+    def get_contact_counts(self) -> np.ndarray:
+        """Return the amounts of the outer contacts of the bodies in the order of the body map.
+        The array is the storage of the contact reporter, it is rewritten at the next step."""
+        return self.contact_reporter.get_outer_contact_accumulator().counts
+
     def get_body_trajectory_point(self):
         output = {}
-        for idx, body in self.body_map_ordered.items():
-            output[idx] = [
-                round(body.body.GetPos().x, 4),
-                round(body.body.GetPos().y, 4),
-                round(body.body.GetPos().z, 4)
-            ]
-            output[idx] = np.nan_to_num(output[idx], nan=9999).tolist()
+        for idx, position in zip(self.body_map_ordered, self.get_body_positions().tolist()):
+            output[idx] = np.nan_to_num([round(value, 4) for value in position],
+                                        nan=9999).tolist()
         return output
 
     def get_velocity(self):
         output = {}
-        for idx, body in self.body_map_ordered.items():
-            output[idx] = [
-                round(body.body.GetPos_dt().x, 4),
-                round(body.body.GetPos_dt().y, 4),
-                round(body.body.GetPos_dt().z, 4)
-            ]
-            output[idx] = np.nan_to_num(output[idx], nan=9999).tolist()
+        for idx, velocity in zip(self.body_map_ordered, self.get_body_velocities().tolist()):
+            output[idx] = np.nan_to_num([round(value, 4) for value in velocity],
+                                        nan=9999).tolist()
         return output
 
     def get_rotation_velocity(self):
@@ -149,40 +314,27 @@ class Sensor:
 
     def get_forces(self):
         output = {}
-        contacts = self.contact_reporter.get_contacts()
-        for idx in self.body_map_ordered:
-            contacts_idx = contacts[idx]
-            if len(contacts_idx) > 0:
-                output[idx] = contacts_idx
-                output[idx] = np.nan_to_num(output[idx], nan=0).tolist()
+        contacts = self.contact_reporter.get_contact_accumulator()
+        for row, idx in enumerate(self.contact_reporter.get_body_indices()):
+            if contacts.counts[row] > 0:
+                output[idx] = np.nan_to_num(np.stack(
+                    (contacts.get_points(row), contacts.get_forces(row)), axis=1),
+                                            nan=0).tolist()
             else:
                 output[idx] = []
         return output
 
     def get_amount_contacts(self):
-        output = {}
-        contacts = self.contact_reporter.get_outer_contacts()
-        for idx in self.body_map_ordered:
-            contacts_idx = contacts[idx]
-            output[idx] = len(contacts_idx)
-            output[idx] = np.nan_to_num(output[idx], nan=0).tolist()
-        return output
+        contacts = self.contact_reporter.get_outer_contact_accumulator()
+        return dict(zip(self.contact_reporter.get_body_indices(), contacts.counts.tolist()))
 
     def get_outer_force_center(self):
         output = {}
-        contacts = self.contact_reporter.get_outer_contacts()
-        for idx in self.body_map_ordered:
-            contacts_idx = contacts[idx]
-            if len(contacts_idx) > 0:
-                body_contact_coordinates = [x[0] for x in contacts_idx]
-                body_contact_coordinates_sum = np.zeros(3)
-                for contact in body_contact_coordinates:
-                    body_contact_coordinates_sum += np.array(contact)
-
-                body_contact_coordinates_sum = body_contact_coordinates_sum * (1 /
-                                                                               len(contacts_idx))
-                output[idx] = list(body_contact_coordinates_sum)
-                output[idx] = np.nan_to_num(output[idx], nan=9999).tolist()
+        contacts = self.contact_reporter.get_outer_contact_accumulator()
+        for row, idx in enumerate(self.contact_reporter.get_body_indices()):
+            if contacts.counts[row] > 0:
+                body_contact_coordinates_mean = contacts.get_points(row).mean(axis=0)
+                output[idx] = np.nan_to_num(body_contact_coordinates_mean, nan=9999).tolist()
             else:
                 output[idx] = None
 
@@ -223,29 +375,135 @@ class SensorObjectClassification(str, Enum):
     JOINT = Sensor.get_joint_map
 
 
+# Shape of a single sample of the sensor data for one object. The data of the callbacks with
+# fixed shape is stored in the preallocated arrays, None marks data with variable length
+SENSOR_DATA_SHAPE: Dict[Any, Optional[Tuple[int, ...]]] = {
+    SensorCalls.BODY_TRAJECTORY: (3,),
+    SensorCalls.BODY_VELOCITY: (3,),
+    SensorCalls.JOINT_TRAJECTORY: (),
+    SensorCalls.AMOUNT_FORCE: (),
+    SensorCalls.FORCE_CENTER: (3,),
+    SensorCalls.FORCE: None
+}
+
+
+class SamplingPolicy():
+    """Define the steps of the simulation when the data of a key is recorded.
+
+    The steps without the record keep nan values in the storage. By default the last step is
+    recorded too, so the decimated data always contains the final state. Only only_on_event
+    skips the last step unless it is asked for.
+
+    Attributes:
+        period (int): the data is recorded every period steps, 0 disables the periodic records
+        on_event (bool): record the data at the steps when an event occurs
+        at_end (bool): record the data at the last step of the simulation
+    """
+
+    def __init__(self, period: int = 1, on_event: bool = False, at_end: bool = True):
+        if period < 0:
+            raise Exception("The sampling period must be non-negative")
+        self.period = period
+        self.on_event = on_event
+        self.at_end = at_end
+
+    @classmethod
+    def every(cls, period: int, on_event: bool = False, at_end: bool = True):
+        return cls(period, on_event, at_end)
+
+    @classmethod
+    def only_on_event(cls, at_end: bool = False):
+        return cls(0, True, at_end)
+
+    @classmethod
+    def only_at_end(cls):
+        return cls(0, False, True)
+
+    def is_periodic_step(self, step_n: int) -> bool:
+        return self.period > 0 and step_n % self.period == 0
+
+
 class DataStorage():
-    """Class aggregates data from all steps of the simulation."""
+    """Class aggregates data from all steps of the simulation.
+
+    The data with fixed shape is written in place into one contiguous float64 array per key with
+    shape (steps, objects, *dims). The main_storage keeps for each object a view of its column,
+    therefore the access by object index doesn't copy the data. The data with variable length
+    (e.g. contact forces) is stored in lists.
+
+    Attributes:
+        sensor (Sensor): sensor used to obtain the data
+        callback_dict (Dict[str, SensorCalls]): sensor callbacks for the data keys
+        sampling_dict (Dict[str, SamplingPolicy]): sampling policies of the data keys
+        main_storage (Dict[str, Dict[int, Any]]): data of each key for each object
+        array_storage (Dict[str, np.ndarray]): preallocated arrays for the fixed shape data
+        object_columns (Dict[str, Dict[int, int]]): maps the object index to the array column
+    """
 
     def __init__(self, sensor: Sensor):
         self.sensor = sensor
         self.callback_dict = {}
+        self.sampling_dict: Dict[str, SamplingPolicy] = {}
         self.main_storage = {}
-
-    def add_data_type(self, key: str, sensor_callback: SensorCalls,
-                      object_map: SensorObjectClassification, step_number):
-        empty_dict: Dict[int, np.NDArray] = {}
+        self.array_storage: Dict[str, np.ndarray] = {}
+        self.object_columns: Dict[str, Dict[int, int]] = {}
+
+    @staticmethod
+    def _get_sample_shape(sensor_callback, starting_values) -> Optional[Tuple[int, ...]]:
+        if sensor_callback in SENSOR_DATA_SHAPE:
+            return SENSOR_DATA_SHAPE[sensor_callback]
+        # the shape of the data from a custom callback is determined by the starting values
+        shapes = {np.shape(value) for value in starting_values.values() if value is not None}
+        if len(shapes) == 1 and all(value is not None for value in starting_values.values()):
+            return shapes.pop()
+        return None
+
+    def add_data_type(self,
+                      key: str,
+                      sensor_callback: SensorCalls,
+                      object_map: SensorObjectClassification,
+                      step_number,
+                      sampling_policy: Optional[SamplingPolicy] = None):
         self.callback_dict[key] = sensor_callback
+        self.sampling_dict[key] = sampling_policy if sampling_policy else SamplingPolicy()
         starting_values = sensor_callback(self.sensor)
-        for idx in object_map(self.sensor):
-            empty_dict[idx] = [np.nan] * (step_number + 1)
-            if starting_values[idx] is None:
-                empty_dict[idx][0] = np.nan
-            else:
-                empty_dict[idx][0] = np.array(starting_values[idx])
-        self.main_storage[key] = empty_dict
+        objects = list(object_map(self.sensor))
+        sample_shape = self._get_sample_shape(sensor_callback, starting_values)
+        if sample_shape is None:
+            empty_dict: Dict[int, List[Any]] = {}
+            for idx in objects:
+                empty_dict[idx] = [np.nan] * (step_number + 1)
+                if starting_values[idx] is None:
+                    empty_dict[idx][0] = np.nan
+                else:
+                    empty_dict[idx][0] = np.array(starting_values[idx])
+            self.main_storage[key] = empty_dict
+            return
+
+        data_array = np.full((step_number + 1, len(objects), *sample_shape), np.nan)
+        columns = {idx: column for column, idx in enumerate(objects)}
+        for idx, column in columns.items():
+            if starting_values[idx] is not None:
+                data_array[0, column] = starting_values[idx]
+        self.array_storage[key] = data_array
+        self.object_columns[key] = columns
+        self._update_views(key)
+
+    def _update_views(self, key):
+        data_array = self.array_storage[key]
+        self.main_storage[key] = {
+            idx: data_array[:, column] for idx, column in self.object_columns[key].items()
+        }
 
     def add_data(self, key, data_list, step_n):
         if data_list:
+            if key in self.array_storage:
+                data_array = self.array_storage[key]
+                columns = self.object_columns[key]
+                for idx, data in data_list.items():
+                    data_array[step_n + 1, columns[idx]] = np.nan if data is None else data
+                return
+
             for idx, data in data_list.items():
                 if not data is None:
                     self.main_storage[key][idx][step_n + 1] = np.array(data)
@@ -253,8 +511,93 @@ class DataStorage():
                     self.main_storage[key][idx][step_n + 1] = np.nan
 
     def update_storage(self, step_n):
+        """Record the data of the keys with the periodic sampling at this step."""
+        for key, sensor_callback in self.callback_dict.items():
+            if self.sampling_dict[key].is_periodic_step(step_n):
+                self.add_data(key, sensor_callback(self.sensor), step_n)
+
+    def update_storage_on_event(self, step_n):
+        """Record the data of the keys sampled on events that are not recorded at this step."""
         for key, sensor_callback in self.callback_dict.items():
-            self.add_data(key, sensor_callback(self.sensor), step_n)
+            policy = self.sampling_dict[key]
+            if policy.on_event and not policy.is_periodic_step(step_n):
+                self.add_data(key, sensor_callback(self.sensor), step_n)
+
+    def update_storage_at_end(self, step_n):
+        """Record the data of the keys sampled at the end that are not recorded at this step."""
+        for key, sensor_callback in self.callback_dict.items():
+            policy = self.sampling_dict[key]
+            if policy.at_end and not policy.is_periodic_step(step_n):
+                self.add_data(key, sensor_callback(self.sensor), step_n)
+
+    def reduce_ending(self, step_n):
+        """Drop the unused steps after the last step of the simulation.
+
+        Args:
+            step_n (int): the last simulated step
+        """
+        for key, key_storage in self.main_storage.items():
+            if key in self.array_storage:
+                self.array_storage[key] = self.array_storage[key][:step_n + 2]
+                self._update_views(key)
+            else:
+                for idx, value in key_storage.items():
+                    key_storage[idx] = value[:step_n + 2]
+
+    def shift_positions(self, shift):
+        """Add the shift to the coordinates recorded by the trajectory and contact callbacks.
+
+        Args:
+            shift: the vector added to all recorded positions
+        """
+        shift = np.asarray(shift, dtype=float)
+        for key, sensor_callback in self.callback_dict.items():
+            if sensor_callback in (SensorCalls.BODY_TRAJECTORY, SensorCalls.FORCE_CENTER):
+                if key in self.array_storage:
+                    self.array_storage[key] += shift
+            elif sensor_callback is SensorCalls.FORCE:
+                for values in self.main_storage[key].values():
+                    for contacts in values:
+                        # contacts of a step are stored as (points and forces, 2, 3) arrays
+                        if isinstance(contacts, np.ndarray) and contacts.ndim == 3:
+                            contacts[:, 0] += shift
+
+    def get_state(self) -> Tuple[Dict[str, np.ndarray], Dict[str, Dict[int, List[Any]]]]:
+        """Return the copy of the recorded data."""
+        arrays = {key: data_array.copy() for key, data_array in self.array_storage.items()}
+        lists = {
+            key: deepcopy(key_storage)
+            for key, key_storage in self.main_storage.items()
+            if key not in self.array_storage
+        }
+        return arrays, lists
+
+    def fork(self, state) -> "DataStorage":
+        """Create the storage with the same sensor and data types and the data from get_state.
+
+        Args:
+            state: the data returned by get_state
+
+        Returns:
+            DataStorage: the new storage, the state is copied
+        """
+        arrays, lists = state
+        storage = DataStorage(self.sensor)
+        storage.callback_dict = dict(self.callback_dict)
+        storage.sampling_dict = dict(self.sampling_dict)
+        storage.object_columns = dict(self.object_columns)
+        storage.main_storage = deepcopy(lists)
+        for key, data_array in arrays.items():
+            storage.array_storage[key] = data_array.copy()
+            storage._update_views(key)
+        return storage
 
     def get_data(self, key):
         return self.main_storage[key]
+
+    def get_array(self, key) -> np.ndarray:
+        """Return the contiguous array of the fixed shape data with shape (steps, objects, *dims).
+
+        The columns of the array are ordered as the objects in the object map.
+        """
+        return self.array_storage[key]
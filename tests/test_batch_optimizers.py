@@ -0,0 +1,75 @@
+import numpy as np
+
+from rostok.trajectory_optimizer.batch_optimizers import (CrossEntropyOptimizer,
+                                                          RandomSearchOptimizer)
+
+BOUNDS = [(0, 1), (-2, 2), (1, 3)]
+TARGET = np.array([0.7, -1.5, 2.0])
+
+
+def distance_reward(points: np.ndarray) -> np.ndarray:
+    return -np.sum((points - TARGET)**2, axis=1)
+
+
+def run_optimizer(optimizer) -> list[np.ndarray]:
+    batches = []
+    while not optimizer.is_done():
+        points = optimizer.ask()
+        optimizer.tell(points, distance_reward(points))
+        batches.append(points)
+    return batches
+
+
+def test_random_search():
+    optimizer = RandomSearchOptimizer(BOUNDS, np.random.default_rng(1), 5, 6)
+    batches = run_optimizer(optimizer)
+    assert len(batches) == 5 and optimizer.n_evaluations == optimizer.budget == 30
+    points = np.concatenate(batches)
+    assert points.shape == (30, 3)
+    assert (points >= optimizer.bounds[:, 0]).all() and (points <= optimizer.bounds[:, 1]).all()
+    best_idx = np.argmax(distance_reward(points))
+    assert optimizer.best_reward == distance_reward(points)[best_idx]
+    assert np.array_equal(optimizer.best_x, points[best_idx])
+
+
+def test_cross_entropy():
+    optimizer = CrossEntropyOptimizer(BOUNDS, np.random.default_rng(0), 15, 16)
+    batches = run_optimizer(optimizer)
+    assert optimizer.best_reward > -1e-2
+    assert np.allclose(optimizer.mean, TARGET, atol=0.1)
+    for points in batches:
+        assert (points >= optimizer.bounds[:, 0]).all()
+        assert (points <= optimizer.bounds[:, 1]).all()
+    assert (optimizer.std >= optimizer.min_std * (optimizer.bounds[:, 1] -
+                                                  optimizer.bounds[:, 0]) - 1e-12).all()
+
+    same_optimizer = CrossEntropyOptimizer(BOUNDS, np.random.default_rng(0), 15, 16)
+    assert all(np.array_equal(a, b) for a, b in zip(run_optimizer(same_optimizer), batches))
+
+
+def test_cross_entropy_failed():
+    optimizer = CrossEntropyOptimizer(BOUNDS, np.random.default_rng(0), 4, 8)
+    points = optimizer.ask()
+    mean, std = optimizer.mean.copy(), optimizer.std.copy()
+    # the failed evaluations don't change the distribution
+    optimizer.tell(points, np.full(len(points), -np.inf))
+    assert np.array_equal(optimizer.mean, mean) and np.array_equal(optimizer.std, std)
+    assert optimizer.best_reward == -np.inf
+
+
+def test_warm_start():
+    # the same seed gives the same batches, the starting vector is clipped by the bounds
+    batches = run_optimizer(RandomSearchOptimizer(BOUNDS, np.random.default_rng(1), 5, 6))
+    optimizer = RandomSearchOptimizer(BOUNDS, np.random.default_rng(1), 5, 6)
+    optimizer.warm_start([0.5, 5, 2], 0.4)
+    warm_batches = run_optimizer(optimizer)
+    assert len(warm_batches) == 2
+    assert np.array_equal(warm_batches[0][0], [0.5, 2, 2])
+    assert np.array_equal(warm_batches[0][1:], batches[0][1:])
+
+    optimizer = CrossEntropyOptimizer(BOUNDS, np.random.default_rng(0), 4, 8)
+    optimizer.warm_start(TARGET, 0.5)
+    assert optimizer.n_iterations == 2
+    assert np.array_equal(optimizer.mean, TARGET)
+    assert np.allclose(optimizer.std, [0.25, 1, 0.5])
+    assert np.array_equal(optimizer.ask()[0], TARGET)
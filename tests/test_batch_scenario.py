@@ -0,0 +1,100 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from test_prescreening import make_finger
+
+import rostok.simulation_chrono.simulation_scenario as simulation_scenario
+from rostok.block_builder_api.block_blueprints import EnvironmentBodyBlueprint
+from rostok.block_builder_api.easy_body_shapes import Box
+from rostok.trajectory_optimizer.prescreening import get_finger_reach
+
+
+class FakeDataStorage:
+
+    def __init__(self):
+        self.shifts = []
+
+    def shift_positions(self, shift):
+        self.shifts.append(list(shift))
+
+
+class FakeCandidate(SimpleNamespace):
+
+    def add_accumulators(self, accumulators):
+        self.accumulators = accumulators
+
+
+class FakeMultiRobotSimulation:
+    """Return a result with the candidate shift and the controller data of each candidate."""
+
+    def __init__(self, system):
+        self.candidates = []
+
+    def add_candidate(self, env_creator):
+        candidate = FakeCandidate(accumulators=None)
+        self.candidates.append(candidate)
+        return candidate
+
+    def simulate(self, number_of_steps, step_length, event_lists):
+        return [
+            SimpleNamespace(controller_data=candidate.controller_data,
+                            shift=candidate.shift,
+                            accumulators=candidate.accumulators,
+                            robot_final_ds=FakeDataStorage(),
+                            environment_final_ds=FakeDataStorage())
+            for candidate in self.candidates
+        ]
+
+
+class FakeBatchScenario(simulation_scenario.BatchGraspScenario):
+
+    def build_system(self):
+        return None
+
+    def setup_simulation(self, simulation, graph, controller_data, event_list,
+                         starting_positions, shift):
+        simulation.controller_data = controller_data
+        simulation.shift = shift
+
+
+def create_scenario(monkeypatch, spacing=None) -> FakeBatchScenario:
+    monkeypatch.setattr(simulation_scenario, "MultiRobotSimulation", FakeMultiRobotSimulation)
+    monkeypatch.setattr(simulation_scenario, "EnvCreator", lambda bodies: None)
+    scenario = FakeBatchScenario(0.001, 1, spacing=spacing, batch_size=2)
+    scenario.headless = True
+    scenario.grasp_object_callback = EnvironmentBodyBlueprint(shape=Box(0.2, 0.2, 0.2))
+    return scenario
+
+
+def test_batch_min_spacing(monkeypatch):
+    scenario = create_scenario(monkeypatch)
+    graph = make_finger(0.0)
+    # the far corner of the object box on the reference point
+    object_radius = np.linalg.norm([0.1, 0.3, 0.1])
+    min_spacing = scenario.get_min_spacing(graph)
+    assert np.isclose(min_spacing, 2 * max(get_finger_reach(graph), object_radius))
+    scenario.object_reference_point = (0, 2, 0)
+    assert np.isclose(scenario.get_min_spacing(graph), 2 * np.linalg.norm([0.1, 2.2, 0.1]))
+
+    scenario = create_scenario(monkeypatch, spacing=min_spacing / 2)
+    with pytest.raises(Exception):
+        scenario.run_batch_simulation(graph, [0, 1])
+    # the single candidate isn't checked
+    assert len(scenario.run_batch_simulation(graph, [0])) == 1
+
+
+def test_batch_result_splitting(monkeypatch):
+    scenario = create_scenario(monkeypatch, spacing=5.0)
+    graph = make_finger(0.0)
+    controller_data_list = [10, 11, 12, 13, 14]
+    accumulators_list = [[i] for i in range(5)]
+    results = scenario.run_batch_simulation(graph, controller_data_list,
+                                            accumulators_list=accumulators_list)
+    # the results keep the order of the candidates, the shift restarts in each batch
+    assert [result.controller_data for result in results] == controller_data_list
+    assert [result.shift for result in results] == [0, 5, 0, 5, 0]
+    assert [result.accumulators for result in results] == accumulators_list
+    for result in results:
+        assert result.robot_final_ds.shifts == [[-result.shift, 0, 0]]
+        assert result.environment_final_ds.shifts == [[-result.shift, 0, 0]]
@@ -0,0 +1,146 @@
+import pickle
+import time
+from itertools import product
+from types import SimpleNamespace
+
+import numpy as np
+from test_ruleset import get_terminal_graph_two_finger
+
+from rostok.trajectory_optimizer.control_optimizer import (BasePrepareOptiVar,
+                                                           BruteForceOptimisation1D,
+                                                           GlobalOptimisationEachSim,
+                                                           SuccessiveHalvingOptimisation1D)
+
+
+class LengthScenario:
+
+    def __init__(self, name: str, simulation_length: float):
+        self.name = name
+        self.simulation_length = simulation_length
+
+    def get_scenario_name(self):
+        return self.name
+
+
+class DistancePrepare(BasePrepareOptiVar):
+    """The reward is the negative distance to the target vector, the lengths of the simulations
+    are recorded."""
+
+    def __init__(self, target: list[float]):
+        super().__init__(None, None, None)
+        self.target = np.array(target)
+        self.lengths = []
+
+    def bound_parameters(self, graph, bound_1d):
+        return [bound_1d] * len(self.target)
+
+    def reward_one_sim_scenario(self, x, graph, sim):
+        self.lengths.append(sim.simulation_length)
+        return -float(np.sum((np.array(x) - self.target)**2)), x, sim
+
+
+def test_brute_force_pool():
+    scenarios = [LengthScenario("grasp", 1.0), LengthScenario("shake", 1.0)]
+    graph = get_terminal_graph_two_finger()
+    serial = BruteForceOptimisation1D([0, 0.5, 1], scenarios, DistancePrepare([0.8, 0.1]))
+    serial_reward, serial_control = serial.calculate_reward(graph)
+    with BruteForceOptimisation1D([0, 0.5, 1],
+                                  scenarios,
+                                  DistancePrepare([0.8, 0.1]),
+                                  num_cpu_workers=2) as optimiser:
+        reward, control = optimiser.calculate_reward(graph)
+        pool = optimiser.get_pool()
+        # the pool lives between the graphs
+        assert optimiser.calculate_reward(graph)[0] == reward
+        assert optimiser.get_pool() is pool
+        assert pickle.loads(pickle.dumps(optimiser))._pool is None
+    assert optimiser._pool is None
+    assert np.isclose(reward, serial_reward)
+    assert np.allclose(control, serial_control)
+
+    # the next parallel call starts a new pool
+    assert optimiser.calculate_reward(graph)[0] == reward
+    assert optimiser._pool is not None and optimiser._pool is not pool
+    optimiser.shutdown()
+    assert optimiser._pool is None
+
+
+def create_optimiser(target, budget=None, n_variants=4):
+    variants = list(np.linspace(0, 1, n_variants))
+    return SuccessiveHalvingOptimisation1D(variants, [LengthScenario("grasp", 2.0)],
+                                           DistancePrepare(target),
+                                           min_length_fraction=0.25,
+                                           eta=2,
+                                           budget=budget)
+
+
+def test_successive_halving_sample_candidates():
+    optimiser = create_optimiser([0, 0, 0])
+    assert optimiser.get_length_fractions() == [0.25, 0.5, 1.0]
+    all_combinations = list(product(optimiser.variants, repeat=3))
+    assert optimiser.sample_candidates(3) == all_combinations
+    # 64 * 0.25 + 32 * 0.5 + 16 * 1
+    assert optimiser.get_race_cost(64) == 48
+
+    # at least one candidate is raced
+    assert len(create_optimiser([0, 0, 0], 0.5).sample_candidates(3)) == 1
+    for budget in (2, 10, 20.5, 47.9):
+        optimiser = create_optimiser([0, 0, 0], budget)
+        candidates = optimiser.sample_candidates(3)
+        # the sample is the largest one in the budget
+        assert optimiser.get_race_cost(len(candidates)) <= budget
+        assert optimiser.get_race_cost(len(candidates) + 1) > budget
+        assert len(set(candidates)) == len(candidates)
+        assert set(candidates) <= set(all_combinations)
+        assert candidates == sorted(candidates)
+        assert create_optimiser([0, 0, 0], budget).sample_candidates(3) == candidates
+
+
+def test_successive_halving_race():
+    target = [1., 0., 1 / 3]
+    optimiser = create_optimiser(target)
+    graph = get_terminal_graph_two_finger()
+    reward, control = optimiser.calculate_reward(graph)
+    assert reward == 0
+    assert np.allclose(control[0], target)
+    # the candidates are halved between the rungs
+    lengths = optimiser.prepare_reward.lengths
+    assert [lengths.count(length) for length in (0.5, 1.0, 2.0)] == [64, 32, 16]
+    assert sum(lengths) / 2 == optimiser.get_race_cost(64)
+
+    optimiser = create_optimiser(target, budget=10)
+    reward, control = optimiser.calculate_reward(graph)
+    candidates = optimiser.sample_candidates(3)
+    assert reward == max(-np.sum((np.array(x) - target)**2) for x in candidates)
+    assert sum(optimiser.prepare_reward.lengths) / 2 <= 10
+
+
+def center_tool(function, bounds):
+    x = np.mean(bounds, axis=1)
+    return SimpleNamespace(fun=function(x), x=x)
+
+
+def hung_tool(function, bounds):
+    time.sleep(5)
+    return center_tool(function, bounds)
+
+
+def test_global_optimisation_pool_timeout():
+    graph = get_terminal_graph_two_finger()
+    scenarios = [LengthScenario("grasp", 1.0), LengthScenario("shake", 1.0)]
+    with GlobalOptimisationEachSim(scenarios,
+                                   DistancePrepare([0.8, 0.1]), (0, 1),
+                                   optimisation_tool=center_tool,
+                                   num_cpu_workers=2,
+                                   timeout_parallel=5) as optimiser:
+        rewards = optimiser.calculate_unique_rewards([graph])
+    assert np.isclose(rewards[0][0], -2 * (0.3**2 + 0.4**2))
+
+    with GlobalOptimisationEachSim(scenarios,
+                                   DistancePrepare([0.8, 0.1]), (0, 1),
+                                   optimisation_tool=hung_tool,
+                                   num_cpu_workers=2,
+                                   timeout_parallel=0.1) as optimiser:
+        # the hung batch is dropped and the pool is stopped
+        assert optimiser.calculate_unique_rewards([graph]) == [(0.01, [])]
+        assert optimiser._pool is None
@@ -0,0 +1,48 @@
+import pickle
+
+from test_ruleset import rule_action_three_finger, rule_vocab
+
+from rostok.graph_generators.environments.design_environment import StateGraphStore
+from rostok.graph_grammar.node import GraphGrammar
+
+
+def build_chain(store: StateGraphStore, rule_names) -> list[GraphGrammar]:
+    """Store the states 0, 1, ... of the rule sequence and return their graphs."""
+    graph = GraphGrammar()
+    store[0] = graph
+    graphs = [graph]
+    for state, rule_name in enumerate(rule_names, start=1):
+        graph = graph.copy_structure()
+        graph.apply_rule(rule_vocab.get_rule(rule_name))
+        store.add_transition(state - 1, rule_name, state, graph)
+        graphs.append(graph)
+    return graphs
+
+
+def test_state_graph_store_replay():
+    store = StateGraphStore(rule_vocab, cache_size=3)
+    graphs = build_chain(store, rule_action_three_finger)
+    assert len(store) == len(graphs)
+    assert list(store._cache) == [len(graphs) - 3, len(graphs) - 2, len(graphs) - 1]
+    # the evicted states are rebuilt from the records
+    for state in (5, 1, len(graphs) - 1, 7):
+        assert store[state] == graphs[state]
+        assert set(store[state].nodes) == set(graphs[state].nodes)
+    assert list(store._cache)[-2:] == [len(graphs) - 1, 7]
+    assert len(store._cache) == 3
+
+    restored = pickle.loads(pickle.dumps(store))
+    assert not restored._cache
+    assert restored[len(graphs) - 1] == graphs[-1]
+
+
+def test_state_graph_store_roots():
+    store = StateGraphStore(rule_vocab, cache_size=1)
+    graphs = build_chain(store, rule_action_three_finger[:4])
+    # the next state of an unknown state is stored completely
+    store.add_transition(100, "Mount", 101, graphs[2])
+    store.add_transition(3, "Mount", 4, graphs[3])
+    assert store[4] == graphs[4]
+    assert store[101] == graphs[2]
+    assert 101 in store._root_graphs and 100 not in store
+    assert dict(store.items()).keys() == {0, 1, 2, 3, 4, 101}
@@ -11,6 +11,7 @@ from test_ruleset import (get_terminal_graph_three_finger, get_terminal_graph_tw
 from rostok.graph_grammar.mutation import add_mut, del_mut
 from rostok.graph_grammar.crossovers import subtree_crossover
 from rostok.graph_grammar import make_random_graph
+from rostok.adapters.golem_adapter import GraphGrammarAdapter
 
 
 def add_mutation_rule(graph: GraphGrammar, rule_vocab1: RuleVocabulary):
@@ -78,3 +79,11 @@ def test_build_mutation_mechs():
     
     for mech in tets_mechs:
         mock_build_mech(mech)
+
+
+def test_adapter_round_trip():
+    adapter = GraphGrammarAdapter()
+    for mech in create_random_mechs(10):
+        restored = adapter.restore(adapter.adapt(mech))
+        assert restored == mech
+        assert restored.get_uniq_representation() == mech.get_uniq_representation()
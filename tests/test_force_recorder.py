@@ -0,0 +1,47 @@
+from copy import deepcopy
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from rostok.control_chrono.external_force import (FORCE_DATA_COLUMNS, ForceDataRecorder,
+                                                  load_force_data)
+from rostok.control_chrono.tendon_controller import TipForce
+
+
+def vector(x, y, z):
+    return SimpleNamespace(x=x, y=y, z=z)
+
+
+def test_force_data_round_trip(tmp_path):
+    recorder = ForceDataRecorder(tmp_path, "1_t", buffer_size=2)
+    rows = np.arange(5 * len(FORCE_DATA_COLUMNS), dtype=float).reshape(5, -1)
+    for row in rows:
+        recorder.record(row[0], vector(*row[1:4]), vector(*row[4:]))
+    # the last row is in the buffer until the flush
+    assert len(load_force_data(tmp_path)["1_t"]) == 4
+    recorder.flush()
+    recorder.flush()
+
+    other = ForceDataRecorder(tmp_path, "1_b")
+    other.record(0.5, vector(1, 2, 3), vector(4, 5, 6))
+    other.flush()
+    data = load_force_data(tmp_path)
+    assert np.array_equal(data["1_t"], rows)
+    assert np.array_equal(data["1_b"], [[0.5, 1, 2, 3, 4, 5, 6]])
+    assert list(load_force_data(tmp_path, "1_b")) == ["1_b"]
+
+    # the second run must not append to the data of the first one
+    with pytest.raises(Exception):
+        ForceDataRecorder(tmp_path, "1_t")
+
+
+def test_force_flush_data_dump(tmp_path):
+    force = TipForce(name="2_t")
+    force.enable_data_dump(tmp_path)
+    fork_force = deepcopy(force)
+    assert fork_force.recorder is force.recorder
+    force.recorder.record(0.1, vector(0, 0, 0), vector(1, 0, 0))
+    fork_force.recorder.record(0.1, vector(0, 0, 0), vector(2, 0, 0))
+    force.flush_data_dump()
+    assert np.array_equal(load_force_data(tmp_path)["2_t"][:, 4], [1, 2])
@@ -0,0 +1,63 @@
+from test_ruleset import (get_terminal_graph_three_finger, get_terminal_graph_two_finger,
+                          get_terminal_graph_two_finger_mix)
+
+from rostok.adapters.golem_evolution import CachedFitness
+from rostok.trajectory_optimizer.control_optimizer import GraphRewardCalculator
+
+
+def count_nodes(graph) -> float:
+    return float(len(graph))
+
+
+class NodeRewardCalculator(GraphRewardCalculator):
+
+    def __init__(self):
+        self.batches = []
+
+    def calculate_reward(self, graph):
+        return len(graph), []
+
+    def calculate_rewards(self, graphs):
+        self.batches.append(len(graphs))
+        return super().calculate_rewards(graphs)
+
+
+def get_population():
+    # the first two graphs are equal
+    return [
+        get_terminal_graph_two_finger(),
+        get_terminal_graph_two_finger_mix(),
+        get_terminal_graph_three_finger(),
+        get_terminal_graph_three_finger()
+    ]
+
+
+def test_cached_fitness_dedup():
+    graphs = get_population()
+    fitness = CachedFitness(count_nodes)
+    expected = [count_nodes(graph) for graph in graphs]
+    assert fitness.evaluate(graphs) == expected
+    assert (fitness.misses, fitness.hits, len(fitness.cache)) == (2, 2, 2)
+    assert fitness.evaluate(graphs[::-1]) == expected[::-1]
+    assert (fitness.misses, fitness.hits) == (2, 6)
+    # the individual calls after the batch are the lookups
+    assert [fitness(graph) for graph in graphs] == expected
+    assert (fitness.misses, fitness.hits) == (2, 6)
+
+
+def test_cached_fitness_calculator():
+    graphs = get_population()
+    calculator = NodeRewardCalculator()
+    fitness = CachedFitness(calculator)
+    assert fitness.evaluate(graphs) == [-count_nodes(graph) for graph in graphs]
+    assert fitness(get_terminal_graph_three_finger()) == -count_nodes(graphs[2])
+    assert calculator.batches == [2]
+
+
+def test_cached_fitness_parallel():
+    graphs = get_population()
+    with CachedFitness(count_nodes, num_cpu_workers=2) as fitness:
+        assert fitness.evaluate(graphs) == [count_nodes(graph) for graph in graphs]
+        assert fitness.get_pool() is fitness.get_pool()
+        assert (fitness.misses, fitness.hits) == (2, 2)
+    assert fitness._pool is None
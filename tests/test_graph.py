@@ -1,8 +1,15 @@
+from copy import deepcopy
+
+import numpy as np
+
 from test_ruleset import (get_terminal_graph_three_finger,
                           get_terminal_graph_two_finger,
                           get_terminal_graph_two_finger_mix, rule_vocab)
 
 from rostok.graph_grammar import make_random_graph
+from rostok.graph_grammar.node import GraphGrammar, Node
+from rostok.graph_grammar.graphgrammar_explorer import (load_explored_graphs, ruleset_explorer,
+                                                        ruleset_explorer_to_file)
 
 
 def test_graph_equal():
@@ -17,4 +24,123 @@ def test_create_graph():
     """
         Test for graph grammar and rule
     """
-    graph = make_random_graph.make_random_graph(5, rule_vocab)
\ No newline at end of file
+    graph = make_random_graph.make_random_graph(5, rule_vocab)
+
+def test_graph_signature_cache():
+    graph = make_random_graph.make_random_graph(7, rule_vocab)
+    cached_signature = graph.get_canonical_signature()
+    graph.invalidate_caches()
+    assert graph.get_canonical_signature() == cached_signature
+    assert hash(graph) == hash(deepcopy(graph))
+
+    root_id = graph.get_root_id()
+    graph.add_node(-1, Node=graph.get_node_by_id(root_id))
+    graph.add_edge(root_id, -1)
+    assert graph.get_canonical_signature() != cached_signature
+
+
+def make_tree_graph(edges: list[tuple[str, str]]) -> GraphGrammar:
+    """Build the graph from the edges between the labels, the labels must be unique."""
+    graph = GraphGrammar()
+    ids = {"ROOT": graph.get_root_id()}
+    for parent, child in edges:
+        ids[child] = graph.get_uniq_id()
+        graph.add_node(ids[child], Node=Node(child, True))
+        graph.add_edge(ids[parent], ids[child])
+    return graph
+
+
+def test_graph_signature_branches():
+    # the same labels hang on the different branches
+    graph_1 = make_tree_graph([("ROOT", "A"), ("A", "B"), ("ROOT", "C")])
+    graph_2 = make_tree_graph([("ROOT", "A"), ("ROOT", "C"), ("C", "B")])
+    assert graph_1.get_uniq_representation() != graph_2.get_uniq_representation()
+    assert graph_1.get_canonical_signature() != graph_2.get_canonical_signature()
+    assert graph_1 != graph_2
+    assert len({graph_1, graph_2}) == 2
+
+    graph_3 = make_tree_graph([("ROOT", "C"), ("ROOT", "A"), ("A", "B")])
+    assert graph_1 == graph_3
+    assert graph_1.get_canonical_key() == graph_3.get_canonical_key()
+
+    # the same label paths on the different trees
+    graph_4 = make_tree_graph([("ROOT", "A"), ("A", "B"), ("A", "C")])
+    graph_5 = make_tree_graph([("ROOT", "A"), ("A", "B")])
+    root_id, a_id, c_id = graph_5.get_root_id(), graph_5.get_uniq_id(), graph_5.get_uniq_id()
+    graph_5.add_node(a_id, Node=Node("A", True))
+    graph_5.add_node(c_id, Node=Node("C", True))
+    graph_5.add_edges_from([(root_id, a_id), (a_id, c_id)])
+    assert graph_4.get_uniq_representation() == graph_5.get_uniq_representation()
+    assert graph_4 != graph_5
+
+
+def test_canonical_key_cache():
+    graph = make_tree_graph([("ROOT", "A"), ("A", "B")])
+    key = graph.get_canonical_key()
+    assert graph.get_canonical_key() is key
+    assert graph.copy_structure().get_canonical_key() is key
+    root_id, node_id = graph.get_root_id(), graph.get_uniq_id()
+    graph.add_node(node_id, Node=Node("C", True))
+    graph.add_edge(root_id, node_id)
+    assert graph.get_canonical_key() != key
+
+
+def test_closest_node_to_root():
+    np.random.seed(3)
+    for n_iter in range(2, 14):
+        graph = make_random_graph.make_random_graph(n_iter, rule_vocab, False)
+        # the order of the nodes of the full walk of the sorted root based paths
+        path_index = {}
+        for index, path in enumerate(graph.get_sorted_root_based_paths()):
+            for node_id in path:
+                path_index.setdefault(node_id, index)
+        depth = {node_id: len(path) for path in graph.get_root_based_paths()
+                 for node_id, path in zip(path, [path[:i + 1] for i in range(len(path))])}
+        for label in {graph.get_node_by_id(node_id).label for node_id in graph.nodes}:
+            ids = [node_id for node_id in graph.nodes
+                   if graph.get_node_by_id(node_id).label == label]
+            expected = min(ids, key=lambda node_id: (depth[node_id], path_index[node_id]))
+            assert graph.closest_node_to_root(ids) == expected
+
+
+def test_ruleset_explorer(tmp_path):
+    uniq_graphs, n_sequences = ruleset_explorer(2, rule_vocab)
+    assert (len(uniq_graphs), n_sequences) == (10, 50)
+    path = tmp_path / "graphs.jsonl"
+    assert ruleset_explorer_to_file(2, rule_vocab, path) == (10, 50)
+    assert set(load_explored_graphs(path, rule_vocab)) == uniq_graphs
+
+
+def test_ruleset_explorer_parallel(tmp_path):
+    uniq_graphs, n_sequences = ruleset_explorer(2, rule_vocab)
+    assert ruleset_explorer(2, rule_vocab, num_workers=2, chunks_per_worker=2) == (uniq_graphs,
+                                                                                  n_sequences)
+    path = tmp_path / "graphs.jsonl"
+    assert ruleset_explorer_to_file(2, rule_vocab, path, num_workers=2) == (len(uniq_graphs),
+                                                                            n_sequences)
+    assert set(load_explored_graphs(path, rule_vocab)) == uniq_graphs
+
+
+def get_applicable_rules_by_loop(rule_dict, graph: GraphGrammar) -> set[str]:
+    """Return the applicable rules by the search of the replaced label over the nodes."""
+    labels = [node["Node"].label for _, node in graph.nodes.items()]
+    return {name for name, rule in rule_dict.items() if rule.replaced_node.label in labels}
+
+
+def test_applicable_rules_mask():
+    np.random.seed(0)
+    for _ in range(20):
+        graph = GraphGrammar()
+        for _ in range(8):
+            mask = rule_vocab.get_applicable_rules_mask(graph)
+            assert mask.shape == (len(rule_vocab.rule_dict),)
+            rules = rule_vocab.get_list_of_applicable_rules(graph)
+            assert set(rules) == get_applicable_rules_by_loop(rule_vocab.rule_dict, graph)
+            assert len(rules) == len(set(rules)) == mask.sum()
+            assert set(rule_vocab.get_list_of_applicable_nonterminal_rules(
+                graph)) == get_applicable_rules_by_loop(rule_vocab.nonterminal_rule_dict, graph)
+            assert set(rule_vocab.get_list_of_applicable_terminal_rules(
+                graph)) == get_applicable_rules_by_loop(rule_vocab.terminal_rule_dict, graph)
+            if not rules:
+                break
+            graph.apply_rule(rule_vocab.get_rule(rules[np.random.choice(len(rules))]))
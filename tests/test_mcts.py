@@ -0,0 +1,155 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+from test_ruleset import rule_vocab
+
+from rostok.graph_generators.environments.design_environment import (DesignEnvironment,
+                                                                     SubDesignEnvironment)
+from rostok.graph_generators.search_algorithms.mcts import MCTS, ParallelMCTS
+from rostok.graph_grammar.node import GraphGrammar
+from rostok.trajectory_optimizer.control_optimizer import GraphRewardCalculator
+
+
+class NodeReward(GraphRewardCalculator):
+
+    def calculate_reward(self, graph):
+        return 1 + (len(graph) % 7) / 7, [len(graph)]
+
+
+class FailedReward(GraphRewardCalculator):
+
+    def calculate_reward(self, graph):
+        raise ValueError("Failed simulation")
+
+
+def create_environment(reward_calculator: GraphRewardCalculator) -> SubDesignEnvironment:
+    return SubDesignEnvironment(rule_vocab, reward_calculator, 4, GraphGrammar())
+
+
+class ScaledRewardEnvironment(SubDesignEnvironment):
+
+    def _calculate_reward(self, state):
+        reward, data = super()._calculate_reward(state)
+        return 2 * reward, data
+
+
+class WorkersReward(NodeReward):
+    num_cpu_workers = 4
+
+    def calculate_reward(self, graph):
+        assert self.num_cpu_workers == 1
+        return super().calculate_reward(graph)
+
+
+def run_search(mcts: MCTS, n_iterations: int, num_actions: int = 2):
+    np.random.seed(0)
+    return [mcts.search(mcts.environment.initial_state, num_actions) for _ in range(n_iterations)]
+
+
+def test_parallel_mcts_matches_serial():
+    serial = MCTS(create_environment(NodeReward()))
+    serial_values = run_search(serial, 15)
+    # one descent per search call repeats the serial updates
+    parallel = ParallelMCTS(create_environment(NodeReward()), num_workers=1, batch_size=1)
+    try:
+        parallel_values = run_search(parallel, 15)
+    finally:
+        parallel.shutdown()
+    assert np.allclose(parallel_values, serial_values)
+    assert parallel.records.keys() == serial.records.keys()
+    for state, record in serial.records.items():
+        parallel_record = parallel.records[state]
+        assert np.array_equal(parallel_record.N, record.N)
+        assert parallel_record.Ns == record.Ns
+        assert np.allclose(parallel_record.Q, record.Q)
+        assert not parallel_record.virtual_N.any() and parallel_record.virtual_Ns == 0
+
+
+def test_parallel_mcts_environment_reward():
+    # the workers use _calculate_reward of the environment and run the calculator serially
+    environment = ScaledRewardEnvironment(rule_vocab, WorkersReward(), 4, GraphGrammar())
+    mcts = ParallelMCTS(environment, num_workers=2, batch_size=4)
+    try:
+        run_search(mcts, 3)
+    finally:
+        mcts.shutdown()
+    assert environment.reward_calculator.num_cpu_workers == 4
+    assert environment.terminal_states
+    for state, (reward, data) in environment.terminal_states.items():
+        assert reward == 2 * NodeReward().calculate_reward(environment.state2graph[state])[0]
+
+
+def test_parallel_mcts_failed_reward():
+    environment = create_environment(NodeReward())
+    mcts = ParallelMCTS(environment, num_workers=2, batch_size=4)
+    try:
+        run_search(mcts, 3)
+        mcts.shutdown()
+        environment.reward_calculator = FailedReward()
+        with pytest.raises(ValueError):
+            for _ in range(10):
+                mcts.search(environment.initial_state, 2)
+    finally:
+        mcts.shutdown()
+    for record in mcts.records.values():
+        assert not record.virtual_N.any() and record.virtual_Ns == 0
+    assert not environment.defer_rewards
+
+
+def assert_same_records(records, loaded_records):
+    assert loaded_records.keys() == records.keys()
+    for state, record in records.items():
+        loaded_record = loaded_records[state]
+        assert np.array_equal(loaded_record.actions, record.actions)
+        assert np.array_equal(loaded_record.Q, record.Q)
+        assert np.array_equal(loaded_record.N, record.N)
+        assert (loaded_record.Ns, loaded_record.V) == (record.Ns, record.V)
+
+
+@pytest.mark.parametrize("environment_type", [SubDesignEnvironment, DesignEnvironment])
+def test_mcts_save_load(tmp_path, environment_type):
+
+    def create():
+        if environment_type is SubDesignEnvironment:
+            return create_environment(NodeReward())
+        return DesignEnvironment(rule_vocab, NodeReward(), GraphGrammar())
+
+    mcts = MCTS(create())
+    run_search(mcts, 15)
+    path = mcts.save("mcts", str(tmp_path), use_date=False)
+    loaded_mcts = MCTS(create())
+    loaded_mcts.load(path)
+    assert_same_records(mcts.records, loaded_mcts.records)
+    assert all(type(state) is type(mcts.environment.initial_state) for state in loaded_mcts.records)
+
+
+def test_mcts_load_legacy(tmp_path):
+    mcts = MCTS(create_environment(NodeReward()))
+    run_search(mcts, 15)
+    path = mcts.save("mcts", str(tmp_path), use_date=False)
+    # the tree of the old versions is saved as the dictionaries of the states and actions
+    os.remove(os.path.join(path, "tree.npz"))
+    Qsa, Nsa, Ns, Vs = {}, {}, {}, {}
+    for state, record in mcts.records.items():
+        for action, q, n in zip(record.actions, record.Q, record.N):
+            if n > 0:
+                Qsa[(state, action)] = q
+                Nsa[(state, action)] = n
+        if record.Ns > 0:
+            Ns[state] = record.Ns
+        if record.V is not None:
+            Vs[state] = record.V
+    for file_name, variable in zip(["Qsa.p", "Nsa.p", "Ns.p", "Vs.p"], [Qsa, Nsa, Ns, Vs]):
+        with open(os.path.join(path, file_name), "wb") as file:
+            pickle.dump(variable, file)
+
+    loaded_mcts = MCTS(create_environment(NodeReward()))
+    loaded_mcts.load(path)
+    visited_records = {
+        state: record
+        for state, record in mcts.records.items()
+        if record.Ns > 0 or record.V is not None or record.N.any()
+    }
+    assert_same_records(visited_records, loaded_mcts.records)
@@ -0,0 +1,50 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+import rostok.block_builder_chrono.mesh as mesh
+
+
+class FakeChronoMesh:
+    """Record the triangles of the built mesh and the source of the copy."""
+
+    def __init__(self, source=None):
+        self.source = source
+        self.triangles = [] if source is None else source.triangles
+
+    def addTriangle(self, *vertices):
+        self.triangles.append(vertices)
+
+
+def test_mesh_cache_mtime(monkeypatch, tmp_path):
+    reads = []
+
+    def read_triangle_mesh(path):
+        reads.append(path)
+        return SimpleNamespace(vertices=np.eye(3) * len(reads), triangles=[[0, 1, 2]])
+
+    monkeypatch.setattr(mesh, "o3d", SimpleNamespace(io=SimpleNamespace(
+        read_triangle_mesh=read_triangle_mesh)))
+    monkeypatch.setattr(mesh, "ChTriangleMeshConnected", FakeChronoMesh)
+    monkeypatch.setattr(mesh, "ChVectorD", lambda *xyz: xyz)
+    mesh.clear_mesh_cache()
+    path = tmp_path / "object.obj"
+    path.write_text("")
+    os.utime(path, ns=(1, 1))
+
+    coordinates = mesh.load_triangle_coordinates(path)
+    assert coordinates.shape == (1, 3, 3) and not coordinates.flags.writeable
+    chrono_mesh = mesh.load_chrono_trianglemesh(path)
+    other_mesh = mesh.load_chrono_trianglemesh(path)
+    # the bodies get the copies of the cached mesh, the file is read once
+    assert len(reads) == 1
+    assert chrono_mesh is not other_mesh and chrono_mesh.source is other_mesh.source
+    assert chrono_mesh.triangles == [((1., 0., 0.), (0., 1., 0.), (0., 0., 1.))]
+
+    os.utime(path, ns=(2, 2))
+    changed_mesh = mesh.load_chrono_trianglemesh(path)
+    assert len(reads) == 2
+    assert changed_mesh.source is not chrono_mesh.source
+    assert np.array_equal(mesh.load_triangle_coordinates(path), 2 * coordinates)
+    mesh.clear_mesh_cache()
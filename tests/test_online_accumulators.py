@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from rostok.criterion.criterion_calculation import (Criterion, ForceCriterion, SimulationReward)
+from rostok.criterion.online_accumulators import (ForceModuleAccumulator, SensorValueAccumulator)
+from rostok.criterion.simulation_flags import (EventBuilder, EventContact, EventContactBuilder,
+                                               EventContactTimeOut, EventContactTimeOutBuilder)
+from rostok.virtual_experiment.sensors import ContactReporter
+
+
+def create_block(identifier: int):
+    return SimpleNamespace(body=SimpleNamespace(GetIdentifier=lambda: identifier))
+
+
+def create_env_sensor() -> SimpleNamespace:
+    reporter = ContactReporter()
+    reporter.set_body_map({0: create_block(10), 4: create_block(14)})
+    return SimpleNamespace(contact_reporter=reporter)
+
+
+def feed_forces(accumulator: ForceModuleAccumulator, env_sensor, step_forces):
+    for step_n, forces in enumerate(step_forces):
+        env_sensor.contact_reporter.reset_contact_dict()
+        for force in forces:
+            env_sensor.contact_reporter.add_contact(0, (0, 0, 0), force, is_outer=True)
+        env_sensor.contact_reporter.add_contact(1, (0, 0, 0), (50, 0, 0), is_outer=True)
+        accumulator.update(step_n, None, env_sensor)
+
+
+def test_force_module_accumulator():
+    env_sensor = create_env_sensor()
+    accumulator = ForceModuleAccumulator()
+    feed_forces(accumulator, env_sensor, [[]])
+    assert accumulator.get_mean() is None
+    # the module of the total force, the step with the huge force is not counted
+    feed_forces(accumulator, env_sensor, [[(3, 0, 0), (0, 4, 0)], [(200, 0, 0)], [(0, 0, 1)]])
+    assert accumulator.n_steps == 2
+    assert np.isclose(accumulator.get_mean(), 3)
+
+
+class StepEvent(EventContact):
+    pass
+
+
+def test_sensor_value_accumulator():
+    robot_sensor = SimpleNamespace(step=0)
+    env_sensor = SimpleNamespace(step=0)
+    sensor_calls = {
+        "robot": (lambda sensor: ("robot", sensor.step), True),
+        "env": (lambda sensor: ("env", sensor.step), False)
+    }
+    accumulator = SensorValueAccumulator(EventContactBuilder(), sensor_calls, at_end=True)
+    for step_n in range(5):
+        robot_sensor.step = env_sensor.step = step_n
+        if step_n in (2, 3):
+            # only the first occurrence of the event of the builder is taken
+            accumulator.on_event(step_n, EventContact(), robot_sensor, env_sensor)
+        accumulator.update(step_n, robot_sensor, env_sensor)
+    accumulator.finalize(4, robot_sensor, env_sensor)
+    assert accumulator.values == {"robot": ("robot", 2), "env": ("env", 2)}
+    assert accumulator.final_values == {"robot": ("robot", 4), "env": ("env", 4)}
+
+    # the other events are skipped
+    accumulator = SensorValueAccumulator(EventBuilder(StepEvent),
+                                         {"robot": (lambda sensor: sensor.step, True)})
+    accumulator.on_event(1, EventContact(), robot_sensor, env_sensor)
+    accumulator.finalize(4, robot_sensor, env_sensor)
+    assert accumulator.values == {} and accumulator.final_values == {}
+
+
+class ConstantCriterion(Criterion):
+
+    def calculate_reward(self, simulation_output):
+        return 0.5
+
+
+def test_simulation_reward_online():
+    contact_builder = EventContactBuilder()
+    timeout_builder = EventContactTimeOutBuilder(1, contact_builder)
+    rewarder = SimulationReward(online=True)
+    rewarder.add_criterion(ForceCriterion(timeout_builder), 2)
+    rewarder.add_criterion(ConstantCriterion(), 1)
+    accumulators = rewarder.create_accumulators()
+    assert isinstance(accumulators[0], ForceModuleAccumulator) and accumulators[1] is None
+
+    feed_forces(accumulators[0], create_env_sensor(), [[(3, 0, 0)], [(0, 1, 0)]])
+    contact_event = EventContact()
+    timeout_event = EventContactTimeOut(1, contact_event)
+    simulation_output = SimpleNamespace(accumulators=accumulators,
+                                        event_container=[contact_event, timeout_event])
+    assert rewarder.calculate_reward(simulation_output, partial=True) == [0.333, 0.5]
+    assert rewarder.calculate_reward(simulation_output) == round(2 * 0.333 + 0.5, 3)
+    timeout_event.state = True
+    assert rewarder.calculate_reward(simulation_output, partial=True) == [0, 0.5]
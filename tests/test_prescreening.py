@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from rostok.block_builder_api.block_blueprints import (PrimitiveBodyBlueprint,
+                                                       RevolveJointBlueprintWithBody,
+                                                       TransformBlueprint)
+from rostok.block_builder_api.block_parameters import FrameTransform
+from rostok.block_builder_api.easy_body_shapes import (Box, ConvexHull, Cylinder, Ellipsoid,
+                                                       Sphere)
+from rostok.graph_grammar.node import GraphGrammar, Node
+from rostok.trajectory_optimizer.prescreening import (GraspPrescreener, get_finger_reach,
+                                                      get_mount_frames, get_object_box,
+                                                      shape_extents)
+
+
+def add_chain(graph: GraphGrammar, parent: int, blueprints: list) -> int:
+    """Add the chain of the nodes to the parent and return the id of the last node."""
+    for blueprint in blueprints:
+        node_id = graph.get_uniq_id()
+        graph.add_node(node_id, Node=Node(f"B{node_id}", True, blueprint))
+        graph.add_edge(parent, node_id)
+        parent = node_id
+    return parent
+
+
+def make_fingers(offset: float, mounts: list[list[float]]) -> GraphGrammar:
+    """Build the graph of the base with one finger of one phalanx at each mount position."""
+    graph = GraphGrammar()
+    base_id = add_chain(graph, graph.get_root_id(), [PrimitiveBodyBlueprint(Box(0.2, 0.1, 0.2))])
+    for position in mounts:
+        joint = RevolveJointBlueprintWithBody()
+        joint.offset = offset
+        add_chain(graph, base_id, [
+            TransformBlueprint(FrameTransform(position, [1, 0, 0, 0])), joint,
+            PrimitiveBodyBlueprint(Box(0.02, 0.3, 0.04))
+        ])
+    return graph
+
+
+def make_finger(offset: float) -> GraphGrammar:
+    return make_fingers(offset, [[0.1, 0, 0]])
+
+
+def test_shape_extents():
+    assert np.allclose(shape_extents(Box(0.1, 0.2, 0.3)), [0.1, 0.2, 0.3])
+    assert np.allclose(shape_extents(Cylinder(0.1, 0.5)), [0.2, 0.5, 0.2])
+    assert np.allclose(shape_extents(Sphere(0.15)), [0.3, 0.3, 0.3])
+    assert np.allclose(shape_extents(Ellipsoid(0.1, 0.2, 0.3)), [0.2, 0.4, 0.6])
+    hull = ConvexHull([(0, 0, 0), (0.1, -0.2, 0.05), (-0.1, 0.1, 0.)])
+    assert np.allclose(shape_extents(hull), [0.2, 0.3, 0.05])
+
+
+def test_finger_reach_bound():
+    joint = RevolveJointBlueprintWithBody()
+    reach = (np.linalg.norm([0.2, 0.1, 0.2]) + 0.1 + joint.length + 2 * joint.radius +
+             np.linalg.norm([0.02, 0.3, 0.04]))
+    assert np.isclose(get_finger_reach(make_finger(0.0)), reach)
+    assert np.isclose(get_finger_reach(make_finger(0.008)), reach + 0.016)
+    assert np.isclose(get_finger_reach(make_finger(-0.008)), reach + 0.016)
+
+
+def create_scenario(shape, reference_point, rotation=(1, 0, 0, 0)) -> SimpleNamespace:
+    blueprint = SimpleNamespace(shape=shape, pos=FrameTransform([0, 0, 0], rotation))
+    return SimpleNamespace(grasp_object_callback=blueprint, object_reference_point=reference_point)
+
+
+def test_object_box():
+    # the box is rotated by 90 degrees around z and lifted by the half of its local height
+    sim = create_scenario(Box(0.1, 0.2, 0.3), (0.5, 0.1, 0), [2**0.5 / 2, 0, 0, 2**0.5 / 2])
+    center, half_sizes = get_object_box(sim)
+    assert np.allclose(center, [0.5, 0.2, 0])
+    assert np.allclose(half_sizes, [0.1, 0.05, 0.15])
+
+
+def test_prescreener_reach():
+    graph = make_finger(0.008)
+    reach = get_finger_reach(graph)
+    prescreener = GraspPrescreener(check_intersection=False)
+    # the nearest point of the object box is at the distance of the reach
+    assert prescreener.check(graph, create_scenario(Sphere(0.05), (reach + 0.05, -0.05, 0)))
+    assert not prescreener.check(graph, create_scenario(Sphere(0.05), (reach + 0.1, -0.05, 0)), 3)
+    assert (prescreener.n_checked, prescreener.n_skipped) == (4, 3)
+    assert prescreener.is_feasible(graph, SimpleNamespace())
+
+
+def test_prescreener_overlap():
+    sim = create_scenario(Sphere(0.05), (0, 0.1, 0))
+    prescreener = GraspPrescreener()
+    assert prescreener.check(make_fingers(0, [[0.1, 0, 0], [-0.1, 0, 0]]), sim)
+    # the links of the fingers with the same mount overlap in the initial position
+    graph = make_fingers(0, [[0.1, 0, 0], [-0.1, 0, 0], [0.1, 0, 0]])
+    assert len(get_mount_frames(graph)) == 3
+    assert not prescreener.check(graph, sim)
+    prescreener.check_overlap = False
+    assert prescreener.check(graph, sim)
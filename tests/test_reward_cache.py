@@ -0,0 +1,72 @@
+import pickle
+
+from test_graph import make_tree_graph
+from test_ruleset import get_terminal_graph_three_finger, get_terminal_graph_two_finger
+
+from rostok.control_chrono.tendon_controller import TendonControllerParameters
+from rostok.trajectory_optimizer.control_optimizer import (GraphRewardCalculator,
+                                                           TendonForceOptiVar)
+from rostok.utils.reward_cache import RewardCache, cached_reward, get_fingerprint, get_graph_key
+
+
+class CountingCalculator(GraphRewardCalculator):
+    """Calculator that changes its state during the calculation like the control optimizers."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+        self.last_control = []
+        self.n_calls = 0
+
+    @cached_reward
+    def calculate_reward(self, graph):
+        self.n_calls += 1
+        self.last_control = [self.n_calls]
+        return self.scale * len(graph), {"n_nodes": len(graph)}
+
+
+def test_reward_cache_get_put(tmp_path):
+    cache = RewardCache(tmp_path / "rewards.sqlite")
+    graph = get_terminal_graph_two_finger()
+    assert cache.get(graph, "calc") is None
+    cache.put(graph, "calc", 1.5, [0.1, 0.2])
+    # the first reward of the key is kept
+    cache.put(graph, "calc", 2.5)
+    assert cache.get(graph, "calc") == (1.5, [0.1, 0.2])
+    assert cache.get(graph, "other_calc") is None
+    assert cache.get(get_terminal_graph_three_finger(), "calc") is None
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 1)
+
+    cache.close()
+    restored = pickle.loads(pickle.dumps(RewardCache(tmp_path / "rewards.sqlite")))
+    assert restored.get(graph, "calc") == (1.5, [0.1, 0.2])
+    restored.close()
+
+
+def test_graph_key_is_exact():
+    graph_1 = make_tree_graph([("ROOT", "A"), ("A", "B"), ("ROOT", "C")])
+    graph_2 = make_tree_graph([("ROOT", "A"), ("ROOT", "C"), ("C", "B")])
+    graph_3 = make_tree_graph([("ROOT", "C"), ("ROOT", "A"), ("A", "B")])
+    assert get_graph_key(graph_1) != get_graph_key(graph_2)
+    assert get_graph_key(graph_1) == get_graph_key(graph_3)
+
+
+def test_fingerprint_stability(tmp_path):
+    prepare_reward = TendonForceOptiVar(TendonControllerParameters(forces=[1.0, 1.0]))
+    fingerprint = get_fingerprint(prepare_reward)
+    prepare_reward.x_to_control_params(get_terminal_graph_two_finger(), [5.0, 7.0])
+    assert get_fingerprint(prepare_reward) == fingerprint
+    assert get_fingerprint(CountingCalculator(1.0)) != get_fingerprint(CountingCalculator(2.0))
+
+    cache = RewardCache(tmp_path / "rewards.sqlite")
+    calculator = CountingCalculator(1.0)
+    calculator.set_reward_cache(cache)
+    graph = get_terminal_graph_two_finger()
+    assert calculator.calculate_reward(graph) == calculator.calculate_reward(graph)
+    assert calculator.n_calls == 1
+
+    # the new run with the same configuration uses the rewards of the previous run
+    calculator = CountingCalculator(1.0)
+    calculator.set_reward_cache(cache)
+    calculator.calculate_reward(graph)
+    assert (calculator.n_calls, cache.hits) == (0, 2)
+    cache.close()
@@ -0,0 +1,155 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from rostok.simulation_chrono.simulation_utils import SimulationResult
+from rostok.virtual_experiment.sensors import (ContactAccumulator, ContactReporter, DataStorage,
+                                                SamplingPolicy)
+
+
+def position_callback(sensor):
+    return {idx: [idx, sensor.step, 0.] for idx in (3, 7)}
+
+
+def contacts_callback(sensor):
+    return {3: None, 7: [[sensor.step, 0., 0.]] * sensor.step}
+
+
+def objects_map(sensor):
+    return [3, 7]
+
+
+class StepSensor:
+
+    def __init__(self):
+        self.step = 0
+
+
+def create_storage(n_steps: int) -> tuple[DataStorage, StepSensor]:
+    sensor = StepSensor()
+    storage = DataStorage(sensor)
+    storage.add_data_type("position", position_callback, objects_map, n_steps)
+    storage.add_data_type("contacts", contacts_callback, objects_map, n_steps)
+    return storage, sensor
+
+
+def create_block(identifier: int):
+    return SimpleNamespace(body=SimpleNamespace(GetIdentifier=lambda: identifier))
+
+
+def test_contact_accumulator_growth():
+    accumulator = ContactAccumulator(2, capacity=2)
+    for i in range(5):
+        accumulator.add(1, (i, 0, 0), (0, i, 0))
+    accumulator.add(0, (9, 9, 9), (1, 1, 1))
+    assert accumulator.points.shape == (2, 8, 3)
+    assert list(accumulator.counts) == [1, 5]
+    assert np.array_equal(accumulator.get_points(1)[:, 0], range(5))
+    assert np.array_equal(accumulator.get_forces(1)[:, 1], range(5))
+    assert accumulator.to_list(0) == [([9, 9, 9], [1, 1, 1])]
+
+    accumulator.reset()
+    assert len(accumulator.get_points(1)) == 0
+    accumulator.add(1, (1, 2, 3), (4, 5, 6))
+    assert accumulator.to_list(1) == [([1, 2, 3], [4, 5, 6])]
+
+
+def test_contact_reporter_rows():
+    reporter = ContactReporter()
+    reporter.set_body_map({5: create_block(50), 2: create_block(20)})
+    assert reporter.get_body_indices() == [5, 2]
+    reporter.add_contact(1, (0, 0, 1), (0, 0, 2), is_outer=True)
+    reporter.add_contact(1, (0, 1, 0), (0, 2, 0), is_outer=False)
+    assert reporter.get_contacts() == {5: [], 2: [([0, 0, 1], [0, 0, 2]), ([0, 1, 0], [0, 2, 0])]}
+    assert reporter.get_outer_contacts() == {5: [], 2: [([0, 0, 1], [0, 0, 2])]}
+    reporter.reset_contact_dict()
+    assert reporter.get_contacts() == {5: [], 2: []}
+
+
+def test_data_storage_arrays():
+    storage, sensor = create_storage(10)
+    for step_n in range(4):
+        sensor.step = step_n + 1
+        storage.update_storage(step_n)
+
+    data_array = storage.get_array("position")
+    assert data_array.shape == (11, 2, 3)
+    assert "contacts" not in storage.array_storage
+    # the data of the objects are the views of the array
+    assert np.shares_memory(storage.get_data("position")[7], data_array)
+    assert np.array_equal(storage.get_data("position")[7][4], [7, 4, 0])
+    assert np.isnan(data_array[5:]).all()
+    assert np.array_equal(storage.get_data("contacts")[7][2], [[2, 0, 0], [2, 0, 0]])
+
+    storage.reduce_ending(3)
+    assert storage.get_array("position").shape == (5, 2, 3)
+    assert np.shares_memory(storage.get_data("position")[3], storage.get_array("position"))
+    assert len(storage.get_data("contacts")[3]) == 5
+
+
+def test_data_storage_fork():
+    storage, sensor = create_storage(6)
+    sensor.step = 1
+    storage.update_storage(0)
+    state = storage.get_state()
+    sensor.step = 2
+    storage.update_storage(1)
+
+    fork = storage.fork(state)
+    assert np.isnan(fork.get_array("position")[2]).all()
+    assert np.isnan(fork.get_data("contacts")[7][2])
+    sensor.step = 5
+    fork.update_storage(1)
+    assert np.array_equal(fork.get_data("position")[3][2], [3, 5, 0])
+    # the forks don't share the data
+    assert np.array_equal(storage.get_data("position")[3][2], [3, 2, 0])
+    assert len(storage.get_data("contacts")[7][2]) == 2
+    fork_2 = storage.fork(state)
+    assert np.isnan(fork_2.get_array("position")[2]).all()
+
+
+def test_simulation_result_copy():
+    storage, sensor = create_storage(6)
+    sensor.step = 1
+    storage.update_storage(0)
+    result = SimulationResult(time=0.5, time_vector=[0, 0.5], environment_final_ds=storage)
+    result_copy = result.copy()
+    sensor.step = 2
+    result_copy.environment_final_ds.update_storage(0)
+    result_copy.time_vector.append(1)
+    assert np.array_equal(storage.get_data("position")[3][1], [3, 1, 0])
+    assert np.array_equal(result_copy.environment_final_ds.get_data("position")[3][1], [3, 2, 0])
+    assert result.time_vector == [0, 0.5] and result_copy.robot_final_ds is None
+
+
+def test_sampling_policy():
+    policy = SamplingPolicy.every(3)
+    assert [policy.is_periodic_step(step_n) for step_n in range(7)] == [
+        True, False, False, True, False, False, True
+    ]
+    assert (policy.on_event, policy.at_end) == (False, True)
+    # the constructor and every have the same defaults
+    assert vars(SamplingPolicy(3)) == vars(policy)
+    assert not any(SamplingPolicy.only_on_event().is_periodic_step(n) for n in range(5))
+    assert SamplingPolicy.only_at_end().at_end
+
+    sensor = StepSensor()
+    storage = DataStorage(sensor)
+    storage.add_data_type("every", position_callback, objects_map, 6, SamplingPolicy.every(2))
+    storage.add_data_type("event", position_callback, objects_map, 6,
+                          SamplingPolicy.only_on_event())
+    storage.add_data_type("end", position_callback, objects_map, 6, SamplingPolicy.only_at_end())
+    for step_n in range(5):
+        sensor.step = step_n + 1
+        storage.update_storage(step_n)
+        if step_n in (1, 2):
+            storage.update_storage_on_event(step_n)
+    storage.update_storage_at_end(4)
+
+    def recorded(key):
+        """Return the steps with the data, the row 0 is the starting value."""
+        return [step - 1 for step in range(1, 7) if not np.isnan(storage.get_array(key)[step, 0, 0])]
+
+    assert recorded("every") == [0, 2, 4]
+    assert recorded("event") == [1, 2]
+    assert recorded("end") == [4]
@@ -1,4 +1,6 @@
 import random
+
+import numpy as np
 #from rostok.control_chrono.controller import YaxisShaker
 
 from test_ruleset import (get_terminal_graph_no_joints,
@@ -9,10 +11,14 @@ from rostok.block_builder_api.block_blueprints import EnvironmentBodyBlueprint
 from rostok.block_builder_api.block_parameters import FrameTransform
 from rostok.block_builder_chrono.block_builder_chrono_api import \
     ChronoBlockCreatorInterface as creator
+from rostok.control_chrono.external_force import YaxisSin
+from rostok.criterion.simulation_flags import (EventBuilder, EventCommands,
+                                               SimulationSingleEvent)
 from rostok.graph_grammar.node_block_typing import get_joint_vector_from_graph
 #from rostok.simulation_chrono.basic_simulation import RobotSimulationChrono
 from rostok.simulation_chrono.simulation import (ChronoSystems, EnvCreator, SingleRobotSimulation,
                                                  ChronoVisManager)
+from rostok.simulation_chrono.simulation_scenario import GraspScenario
 
 def test_control_bind_and_create_sim():
     """
@@ -43,3 +49,52 @@ def test_control_bind_and_create_sim():
         sim_output = sim.simulate(10000, times_step, 10)
 
 
+class EventActivateAtTime(SimulationSingleEvent):
+
+    def __init__(self, activation_time: float):
+        super().__init__()
+        self.activation_time = activation_time
+
+    def event_check(self, current_time: float, step_n: int, robot_data, env_data):
+        if current_time >= self.activation_time:
+            self.state = True
+            self.step_n = step_n
+            return EventCommands.ACTIVATE
+        return EventCommands.CONTINUE
+
+
+class EventActivateAtTimeBuilder(EventBuilder):
+
+    def __init__(self, activation_time: float):
+        super().__init__(event_class=EventActivateAtTime)
+        self.activation_time = activation_time
+
+    def build_event(self, event_list):
+        event_list.append(EventActivateAtTime(self.activation_time))
+
+
+def test_fork_matches_replay():
+    """The fork from the snapshot at the ACTIVATE command gives the same result as the
+    simulation from the start with the same force."""
+    graph = get_terminal_graph_two_finger()
+    n_joints = len(get_joint_vector_from_graph(graph))
+    controller_data = {"initial_value": [0.05] * n_joints}
+
+    def create_scenario(force):
+        scenario = GraspScenario(1e-3, 0.4, obj_external_forces=force)
+        scenario.grasp_object_callback = EnvironmentBodyBlueprint()
+        scenario.add_event_builder(EventActivateAtTimeBuilder(0.1))
+        return scenario
+
+    force = YaxisSin(amp=2, start_time=0.2)
+    replay = create_scenario(force).run_simulation(graph, controller_data)
+    forks = create_scenario(YaxisSin(amp=0, start_time=0.2)).run_simulation_forks(
+        graph, controller_data, [force, force])
+    for fork in forks:
+        assert np.allclose(fork.time_vector, replay.time_vector)
+        for storage, replay_storage in ((fork.environment_final_ds, replay.environment_final_ds),
+                                        (fork.robot_final_ds, replay.robot_final_ds)):
+            assert np.allclose(storage.get_array("COG"),
+                               replay_storage.get_array("COG"),
+                               atol=1e-6,
+                               equal_nan=True)
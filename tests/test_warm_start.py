@@ -0,0 +1,54 @@
+import numpy as np
+from test_ruleset import rule_vocab
+
+from rostok.graph_grammar.graphgrammar_explorer import create_graph_from_seq
+from rostok.trajectory_optimizer.warm_start import (WarmStartStore, get_structure_distance,
+                                                    get_structure_key)
+
+
+def make_two_fingers(n_phalanxes: int):
+    """Build the terminal graph with two fingers, the phalanxes are added to the fingers in
+    turn."""
+    rule_names = ["FlatCreate", "Mount", "Mount"] + ["FingerUpper"] * n_phalanxes
+    graph = create_graph_from_seq([rule_vocab.get_rule(name) for name in rule_names])
+    rule_vocab.make_graph_terminal(graph)
+    return graph
+
+
+def test_structure_distance():
+    assert get_structure_key(make_two_fingers(5)) == (2, 3)
+    assert get_structure_distance((1, 2), (2, 2)) == 1
+    assert get_structure_distance((1, 3), (3, 1)) == 4
+    assert get_structure_distance((2, 2), (2, 2, 2)) is None
+
+
+def test_warm_start_nearest_key():
+    store = WarmStartStore(max_distance=1)
+    store.update(make_two_fingers(4), "grasp", [1., 1.], 5.)
+    # the worse control of the same structure is not stored
+    store.update(make_two_fingers(4), "grasp", [0., 0.], 3.)
+    store.update(make_two_fingers(3), "grasp", [2., 2.], 9.)
+    store.update(make_two_fingers(6), "grasp", [3., 3.], 6.)
+    store.update(make_two_fingers(6), "shake", [4., 4., 4.], 7.)
+    assert len(store) == 3
+
+    graph = make_two_fingers(5)
+    # (2, 2) and (3, 3) are at the distance 1 from (2, 3), (1, 2) is too far
+    reward, control = store.get(graph, "grasp", 2)
+    assert reward == 6. and np.array_equal(control, [3., 3.])
+    store.update(make_two_fingers(4), "grasp", [1.5, 1.5], 8.)
+    assert store.get(graph, "grasp", 2)[0] == 8.
+    # the exact structure is preferred
+    assert store.get(make_two_fingers(3), "grasp", 2)[0] == 9.
+    assert store.get(graph, "shake", 2) is None
+    assert store.get(make_two_fingers(2), "grasp", 2)[0] == 9.
+    assert (store.hits, store.misses) == (4, 1)
+
+    assert store.is_fallback_needed(0.8, 1.0)
+    assert not store.is_fallback_needed(0.95, 1.0)
+
+
+def test_warm_start_grid_neighbours():
+    store = WarmStartStore(radius=1)
+    neighbours = store.get_grid_neighbours([1.5, 0., 1., 0.5], [0.6, 1.5])
+    assert neighbours == [(0., 1.), (0., 1.5), (0.5, 1.), (0.5, 1.5), (1., 1.), (1., 1.5)]